@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ExoXHunter.settings')
 
 application = get_asgi_application()
+
+# Load the models and start the prediction executor now rather than on the
+# event loop when the first request arrives.
+from api.services.executor import get_executor  # noqa: E402
+
+get_executor()
@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.tracing.CorrelationIdMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -134,10 +135,76 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
-    )
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "api.tracing.TracedJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "api.tracing.TracedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
 
 STATIC_ROOT = BASE_DIR / "static"
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+
+# Saved model set the prediction service loads.
+PREDICTION_MODEL_DIR = Path(os.getenv("PREDICTION_MODEL_DIR", BASE_DIR / "models"))
+
+# Concurrent predictions: replicas of the prediction service (one Keras model
+# clone each) and how long a request waits for a free one before a 503.
+PREDICTION_POOL_SIZE = int(os.getenv("PREDICTION_POOL_SIZE", os.cpu_count() or 1))
+PREDICTION_POOL_TIMEOUT = float(os.getenv("PREDICTION_POOL_TIMEOUT", "30"))
+
+# Where the async views run inference (see api.services.executor), and the
+# keyword arguments the backend is constructed with.
+PREDICTION_EXECUTOR_BACKEND = os.getenv(
+    "PREDICTION_EXECUTOR_BACKEND", "api.services.executor.ThreadPoolPredictionExecutor"
+)
+PREDICTION_EXECUTOR_OPTIONS = {}
+if os.getenv("PREDICTION_MAX_PENDING"):
+    PREDICTION_EXECUTOR_OPTIONS["max_pending"] = int(os.getenv("PREDICTION_MAX_PENDING"))
+
+# CSV uploads to predict/public/csv/ are spooled here (the system temp
+# directory by default) rather than held in memory.
+FILE_UPLOAD_TEMP_DIR = os.getenv("FILE_UPLOAD_TEMP_DIR") or None
+
+# Requests slower than this are logged with their full span tree (parsing,
+# validation, each ensemble stage, rendering) to logs/slow_requests.log.
+SLOW_REQUEST_THRESHOLD_MS = float(os.getenv("SLOW_REQUEST_THRESHOLD_MS", "500"))
+
+# Created with the first slow-request record.
+LOG_DIR = Path(os.getenv("DJANGO_LOG_DIR", BASE_DIR / "logs"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "plain": {"format": "%(asctime)s %(levelname)s %(name)s %(message)s"},
+        "raw": {"format": "%(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "plain"},
+        "slow_requests": {
+            "class": "api.tracing.SlowRequestFileHandler",
+            "filename": LOG_DIR / "slow_requests.log",
+            "maxBytes": 10 * 1024 * 1024,
+            "backupCount": 5,
+            "formatter": "raw",
+            "delay": True,
+        },
+    },
+    "loggers": {
+        "api": {"handlers": ["console"], "level": "INFO"},
+        # One JSON object per line; not propagated to the console.
+        "api.slow_requests": {
+            "handlers": ["slow_requests"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
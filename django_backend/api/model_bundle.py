@@ -0,0 +1,166 @@
+"""
+Reader for the single-file model bundle written by
+``ml/src/models/model_bundle.py`` (see there for the layout).
+"""
+
+import hashlib
+import io
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, List, Union
+
+import joblib
+import numpy as np
+from tensorflow import keras
+
+MAGIC = b"EXOBUNDL"
+SUPPORTED_VERSIONS = [1]
+PREFIX = struct.Struct("<8sIIQ")
+
+
+class ModelBundleError(Exception):
+    """The bundle is missing, truncated, corrupted or of an unknown version."""
+
+
+class ModelBundle:
+    def __init__(self, path: Union[str, Path], verify: bool = True):
+        """
+        Memory-map a model bundle and read its header.
+
+        Sections are read lazily from the mapping, so only the pages that are
+        used are loaded, and array sections share the page cache with every
+        other process mapping the same file.
+
+        Args:
+            path: Path to the bundle file
+            verify: Whether to check each section's sha256 when it is read
+        """
+        self.path = Path(path)
+        self.verify = verify
+
+        try:
+            with open(self.path, "rb") as file:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise ModelBundleError(f"Cannot open model bundle {self.path}: {e}") from e
+
+        self.header = self._read_header()
+        self.sections = self.header["sections"]
+        self.objects = self.header["objects"]
+        self.metadata = self.header.get("metadata", {})
+
+    def _read_header(self) -> Dict:
+        if len(self._mmap) < PREFIX.size:
+            raise ModelBundleError(f"Model bundle {self.path} is truncated")
+
+        magic, version, _, header_length = PREFIX.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ModelBundleError(f"{self.path} is not a model bundle")
+        if version not in SUPPORTED_VERSIONS:
+            raise ModelBundleError(
+                f"Model bundle {self.path} has format version {version}; "
+                f"supported versions are {SUPPORTED_VERSIONS}"
+            )
+
+        end = PREFIX.size + header_length
+        if len(self._mmap) < end:
+            raise ModelBundleError(f"Model bundle {self.path} header is truncated")
+        try:
+            return json.loads(bytes(self._mmap[PREFIX.size : end]))
+        except ValueError as e:
+            raise ModelBundleError(
+                f"Model bundle {self.path} header is corrupted: {e}"
+            ) from e
+
+    def section(self, name: str) -> memoryview:
+        """
+        Read-only view of a section's bytes.
+
+        Args:
+            name: Section name from the header index
+
+        Returns:
+            Zero-copy view into the memory-mapped file
+        """
+        if name not in self.sections:
+            raise ModelBundleError(f"Model bundle {self.path} has no section '{name}'")
+
+        section = self.sections[name]
+        start, length = section["offset"], section["length"]
+        if start + length > len(self._mmap):
+            raise ModelBundleError(
+                f"Section '{name}' of model bundle {self.path} is truncated"
+            )
+
+        view = memoryview(self._mmap)[start : start + length]
+        if self.verify and hashlib.sha256(view).hexdigest() != section["sha256"]:
+            raise ModelBundleError(
+                f"Section '{name}' of model bundle {self.path} is corrupted "
+                f"(checksum mismatch)"
+            )
+        return view
+
+    def array(self, name: str) -> np.ndarray:
+        """
+        Read-only array backed directly by the mapped pages.
+
+        Args:
+            name: Name of an array section
+
+        Returns:
+            Array with the section's dtype and shape
+        """
+        section = self.sections.get(name, {})
+        if section.get("kind") != "array":
+            raise ModelBundleError(
+                f"Model bundle {self.path} has no array section '{name}'"
+            )
+        return np.frombuffer(self.section(name), dtype=section["dtype"]).reshape(
+            section["shape"]
+        )
+
+    def load(self, name: str):
+        """
+        Rebuild a bundled object.
+
+        Args:
+            name: Object name, e.g. "xgb_model" or "mlp_model"
+
+        Returns:
+            The deserialized object
+        """
+        if name not in self.objects:
+            raise ModelBundleError(f"Model bundle {self.path} has no object '{name}'")
+
+        entry = self.objects[name]
+        try:
+            if entry["kind"] == "pickle":
+                return joblib.load(io.BytesIO(self.section(entry["section"])))
+            if entry["kind"] == "keras":
+                model = keras.models.model_from_json(
+                    bytes(self.section(entry["config"])).decode("utf-8")
+                )
+                model.set_weights([self.array(weight) for weight in entry["weights"]])
+                return model
+        except ModelBundleError:
+            raise
+        except Exception as e:
+            raise ModelBundleError(
+                f"Cannot deserialize '{name}' from model bundle {self.path}: {e}"
+            ) from e
+        raise ModelBundleError(
+            f"Object '{name}' in model bundle {self.path} has unknown kind "
+            f"'{entry['kind']}'"
+        )
+
+    def names(self) -> List[str]:
+        """Names of the bundled objects."""
+        return list(self.objects)
+
+    def close(self):
+        self._mmap.close()
+
+
+__all__ = ["ModelBundle", "ModelBundleError"]
@@ -3,26 +3,66 @@ import numpy as np
 from pathlib import Path
 from typing import Union, Dict, List, Optional, Tuple
 import joblib
+import copy
 import warnings
 
 import tensorflow as tf
 from tensorflow import keras
 import xgboost as xgb
 import lightgbm as lgb
+from sklearn.impute import KNNImputer
+
+from .model_bundle import ModelBundle, ModelBundleError
+from .tracing import span
 
 warnings.filterwarnings("ignore")
 
+BUNDLE_FILE = "ensemble.bundle"
+
+# Inputs up to this many rows go through Keras as one batch.
+MAX_SINGLE_BATCH_ROWS = 4096
+
+# "full" is the stacked ensemble; "fast" the distilled single-model student.
+TIERS = ["full", "fast"]
+
+
+def keras_predict(model: keras.Model, X: np.ndarray) -> np.ndarray:
+    """
+    Keras inference without ``predict``'s per-call dataset and callback
+    setup, which dominates request-sized inputs.
+
+    Args:
+        model: Keras model
+        X: Input array
+
+    Returns:
+        Model output as a numpy array
+    """
+    if len(X) <= MAX_SINGLE_BATCH_ROWS:
+        return np.asarray(model.predict_on_batch(X))
+    return model.predict(X, batch_size=MAX_SINGLE_BATCH_ROWS, verbose=0)
+
+
+class ModelLoadError(Exception):
+    """The model set could not be loaded."""
+
 
 class ModelLoader:
-    def __init__(self, model_dir: Union[str, Path]):
+    def __init__(self, model_dir: Union[str, Path], use_bundle: bool = True):
         """
         Initialize the model loader.
 
         Args:
             model_dir: Directory containing saved model files
+            use_bundle: Whether to load from the memory-mapped
+                ``ensemble.bundle`` when the directory has a current one
         """
         self.model_dir = Path(model_dir)
-        self._validate_model_files()
+        self.bundle_path = self.model_dir / BUNDLE_FILE
+        self.bundle = None
+        self.use_bundle = use_bundle and self._bundle_is_current()
+        if not self.use_bundle:
+            self._validate_model_files()
 
         self.feature_scaler = None
         self.xgb_model = None
@@ -30,6 +70,27 @@ class ModelLoader:
         self.mlp_model = None
         self.meta_model = None
         self.ensemble_info = None
+        self.imputer_state = None
+        self.student_model = None
+        self.student_info = None
+
+    def _bundle_is_current(self) -> bool:
+        """
+        Whether the bundle exists and was written for the saved ensemble, i.e.
+        the model files have not been replaced since.
+        """
+        if not self.bundle_path.exists():
+            return False
+
+        info_path = self.model_dir / "ensemble_info.pkl"
+        if not info_path.exists():
+            return True
+        try:
+            self.bundle = ModelBundle(self.bundle_path)
+        except ModelBundleError as e:
+            raise ModelLoadError(str(e)) from e
+        training_date = joblib.load(info_path).get("training_date")
+        return self.bundle.metadata.get("training_date") == training_date
 
     def _validate_model_files(self):
         required_files = [
@@ -49,42 +110,92 @@ class ModelLoader:
         if missing_files:
             raise FileNotFoundError(f"Missing model files: {missing_files}")
 
-    def load_models(self) -> Dict:
-        """
-        Load all model components.
+    def _load_from_bundle(self):
+        bundle = self.bundle or ModelBundle(self.bundle_path)
+        self.bundle = bundle
 
-        Returns:
-            Dictionary containing all loaded models
-        """
+        self.feature_scaler = bundle.load("feature_scaler")
+        self.xgb_model = bundle.load("xgb_model")
+        self.lgb_model = bundle.load("lgb_model")
+        self.mlp_model = bundle.load("mlp_model")
+        self.meta_model = bundle.load("meta_model")
+        self.ensemble_info = bundle.load("ensemble_info")
 
-        try:
-            self.feature_scaler = joblib.load(self.model_dir / "feature_scaler.pkl")
+        names = bundle.names()
+        if "imputer_state" in names:
+            self.imputer_state = bundle.load("imputer_state")
+        if "student_model" in names:
+            self.student_model = bundle.load("student_model")
+            self.student_info = bundle.load("student_info")
 
-            self.xgb_model = joblib.load(self.model_dir / "xgboost_model.pkl")
+    def _load_from_files(self):
+        self.feature_scaler = joblib.load(self.model_dir / "feature_scaler.pkl")
 
-            self.lgb_model = joblib.load(self.model_dir / "lightgbm_model.pkl")
+        self.xgb_model = joblib.load(self.model_dir / "xgboost_model.pkl")
 
-            self.mlp_model = keras.models.load_model(self.model_dir / "mlp_model.keras")
+        self.lgb_model = joblib.load(self.model_dir / "lightgbm_model.pkl")
 
-            self.meta_model = keras.models.load_model(
-                self.model_dir / "meta_model.keras"
-            )
+        # Inference only: the training-side optimizer (and its learning-rate
+        # schedule) is not restored.
+        self.mlp_model = keras.models.load_model(
+            self.model_dir / "mlp_model.keras", compile=False
+        )
+
+        self.meta_model = keras.models.load_model(
+            self.model_dir / "meta_model.keras", compile=False
+        )
+
+        self.ensemble_info = joblib.load(self.model_dir / "ensemble_info.pkl")
+
+        # Optional: model sets trained before the imputer state was
+        # persisted only accept complete rows.
+        imputer_state_path = self.model_dir / "imputer_state.pkl"
+        if imputer_state_path.exists():
+            self.imputer_state = joblib.load(imputer_state_path)
 
-            self.ensemble_info = joblib.load(self.model_dir / "ensemble_info.pkl")
+        # Optional: the distilled student behind the "fast" tier.
+        student_model_path = self.model_dir / "student_model.pkl"
+        if student_model_path.exists():
+            self.student_model = joblib.load(student_model_path)
+            self.student_info = joblib.load(self.model_dir / "student_info.pkl")
 
-            return {
-                "feature_scaler": self.feature_scaler,
-                "xgb_model": self.xgb_model,
-                "lgb_model": self.lgb_model,
-                "mlp_model": self.mlp_model,
-                "meta_model": self.meta_model,
-                "ensemble_info": self.ensemble_info,
-            }
+    def load_models(self) -> Dict:
+        """
+        Load all model components.
 
+        Returns:
+            Dictionary containing all loaded models
+        """
+        source = self.bundle_path if self.use_bundle else self.model_dir
+        try:
+            if self.use_bundle:
+                self._load_from_bundle()
+            else:
+                self._load_from_files()
+        except ModelBundleError as e:
+            raise ModelLoadError(str(e)) from e
         except Exception as e:
-            
-            raise e("Error: {e}")
-        
+            raise ModelLoadError(f"Failed to load models from {source}: {e}") from e
+
+        # A student distilled from an earlier version of the ensemble is not
+        # served.
+        if self.student_info is not None and self.student_info.get(
+            "teacher_training_date"
+        ) != self.ensemble_info.get("training_date"):
+            self.student_model = None
+            self.student_info = None
+
+        return {
+            "feature_scaler": self.feature_scaler,
+            "xgb_model": self.xgb_model,
+            "lgb_model": self.lgb_model,
+            "mlp_model": self.mlp_model,
+            "meta_model": self.meta_model,
+            "ensemble_info": self.ensemble_info,
+            "imputer_state": self.imputer_state,
+            "student_model": self.student_model,
+            "student_info": self.student_info,
+        }
 
 
 class PredictionService:
@@ -104,11 +215,74 @@ class PredictionService:
         self.mlp_model = self.models["mlp_model"]
         self.meta_model = self.models["meta_model"]
         self.ensemble_info = self.models["ensemble_info"]
+        self.imputer_state = self.models["imputer_state"]
+        self.student_model = self.models["student_model"]
+        self.student_info = self.models["student_info"]
 
         self.class_names = self.ensemble_info.get(
             "class_names", ["FALSE_POSITIVE", "CANDIDATE", "CONFIRMED"]
         )
 
+        self.feature_names = None
+        self.fill_values = None
+        self.knn_imputer = None
+        if self.imputer_state is not None:
+            self.feature_names = self.imputer_state.get("feature_names")
+            self.fill_values = np.asarray(
+                self.imputer_state["feature_fill_values"], dtype=np.float64
+            )
+            reference_set = self.imputer_state.get("reference_set")
+            if reference_set is not None:
+                self.knn_imputer = KNNImputer(
+                    n_neighbors=self.imputer_state["n_neighbors"],
+                    weights="distance",
+                    keep_empty_features=True,
+                ).fit(np.asarray(reference_set, dtype=np.float64))
+
+    def replicate(self) -> "PredictionService":
+        """
+        Copy of this service for use by another thread.
+
+        The scaler, tree models, student and metadata are only read during
+        prediction and are shared. The Keras models are cloned with their
+        weights, since concurrent ``predict`` calls on one Keras model
+        serialize and contend.
+
+        Returns:
+            A PredictionService that can predict concurrently with this one
+        """
+        replica = copy.copy(self)
+        for name in ["mlp_model", "meta_model"]:
+            model = getattr(self, name)
+            clone = keras.models.clone_model(model)
+            clone.set_weights(model.get_weights())
+            setattr(replica, name, clone)
+        return replica
+
+    @property
+    def tiers(self) -> List[str]:
+        """Tiers this model set can serve."""
+        return TIERS if self.student_model is not None else ["full"]
+
+    @property
+    def agreement(self) -> Optional[Dict]:
+        """Agreement of the fast tier with the full ensemble on the test split."""
+        if self.student_info is None:
+            return None
+        return self.student_info["agreement"]
+
+    def _validate_tier(self, tier: str):
+        """
+        Validate that the requested tier can be served.
+
+        Args:
+            tier: Prediction tier, "full" or "fast"
+        """
+        if tier not in TIERS:
+            raise ValueError(f"Unknown tier '{tier}', expected one of {TIERS}")
+        if tier not in self.tiers:
+            raise ValueError(f"Tier '{tier}' is not available for this model set")
+
     def _validate_features(self, df: pd.DataFrame):
         """
         Validate that the DataFrame has the expected number of features.
@@ -122,6 +296,69 @@ class PredictionService:
                 f"Expected {expected_features} features, but got {df.shape[1]}"
             )
 
+    def _align_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Reorder named feature columns to the training order. Features that are
+        absent from every row become missing values to be imputed, and extra
+        columns are dropped when every training feature is present (e.g. a
+        full feature row sent to a compressed model set).
+
+        Args:
+            df: Input DataFrame
+
+        Returns:
+            DataFrame with the training feature columns, when they are known
+        """
+        if not self.feature_names or list(df.columns) == self.feature_names:
+            return df
+        columns, expected = set(df.columns), set(self.feature_names)
+        if not (columns <= expected or expected <= columns):
+            return df
+        return df.reindex(columns=self.feature_names)
+
+    def prepare_features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Align and validate input features without predicting, so callers can
+        reject bad input before queueing it for inference.
+
+        Args:
+            df: Input DataFrame
+
+        Returns:
+            DataFrame of float64 features in the training order
+
+        Raises:
+            ValueError: When the features do not match the trained models
+        """
+        df = self._align_features(df)
+        self._validate_features(df)
+        return df.astype(np.float64, copy=False)
+
+    def _impute_missing(self, X: np.ndarray) -> np.ndarray:
+        """
+        Fill missing values the way training did.
+
+        Rows with gaps are imputed from their nearest neighbours in the
+        training donor pool when the models were trained with KNN
+        imputation. Anything still missing takes the training medians.
+
+        Args:
+            X: Raw feature array, possibly containing NaNs
+
+        Returns:
+            Feature array without missing values
+        """
+        if self.fill_values is None:
+            return X
+        missing = np.isnan(X)
+        if self.knn_imputer is not None:
+            rows = missing.any(axis=1)
+            if rows.any():
+                X = X.copy()
+                X[rows] = self.knn_imputer.transform(X[rows])
+                missing = np.isnan(X)
+        return np.where(missing, self.fill_values, X)
+
     def _preprocess_data(self, X: np.ndarray) -> np.ndarray:
         """
         Scale features using the fitted scaler.
@@ -144,9 +381,12 @@ class PredictionService:
         Returns:
             Meta-features array
         """
-        xgb_proba = self.xgb_model.predict_proba(X_scaled)
-        lgb_proba = self.lgb_model.predict_proba(X_scaled)
-        mlp_proba = self.mlp_model.predict(X_scaled, verbose=0)
+        with span("xgboost"):
+            xgb_proba = self.xgb_model.predict_proba(X_scaled)
+        with span("lightgbm"):
+            lgb_proba = self.lgb_model.predict_proba(X_scaled)
+        with span("mlp"):
+            mlp_proba = keras_predict(self.mlp_model, X_scaled)
 
         meta_features = np.hstack([xgb_proba, lgb_proba, mlp_proba])
 
@@ -157,6 +397,7 @@ class PredictionService:
         df: pd.DataFrame,
         return_proba: bool = False,
         return_meta_features: bool = False,
+        tier: str = "full",
     ) -> Dict:
         """
         Make predictions from a pandas DataFrame.
@@ -165,20 +406,35 @@ class PredictionService:
             df: Input DataFrame with features
             return_proba: Whether to return class probabilities
             return_meta_features: Whether to return intermediate meta-features
+                (full tier only)
+            tier: "full" for the stacked ensemble, "fast" for the distilled
+                student model
 
         Returns:
             Dictionary containing predictions and optionally probabilities
         """
+        self._validate_tier(tier)
 
-        self._validate_features(df)
+        with span("validate", rows=len(df)):
+            df = self.prepare_features(df)
 
-        X = df.values
+        with span("impute"):
+            X = self._impute_missing(df.to_numpy(dtype=np.float64))
 
-        X_scaled = self._preprocess_data(X)
+        if tier == "fast":
+            with span("student"):
+                meta_proba = self.student_model.predict_proba(
+                    pd.DataFrame(X, columns=self.student_info["feature_names"])
+                )
+            return_meta_features = False
+        else:
+            with span("scale"):
+                X_scaled = self._preprocess_data(X)
 
-        meta_features = self._generate_meta_features(X_scaled)
+            meta_features = self._generate_meta_features(X_scaled)
 
-        meta_proba = self.meta_model.predict(meta_features, verbose=0)
+            with span("meta_model"):
+                meta_proba = keras_predict(self.meta_model, meta_features)
         predictions = np.argmax(meta_proba, axis=1)
 
         predicted_classes = [self.class_names[pred] for pred in predictions]
@@ -186,7 +442,10 @@ class PredictionService:
         results = {
             "predictions": predicted_classes,
             "prediction_indices": predictions.tolist(),
+            "tier": tier,
         }
+        if tier == "fast":
+            results["agreement"] = self.agreement
 
         if return_proba:
             proba_df = pd.DataFrame(meta_proba, columns=self.class_names)
@@ -211,6 +470,7 @@ class PredictionService:
         csv_path: Union[str, Path],
         return_proba: bool = False,
         return_meta_features: bool = False,
+        tier: str = "full",
         **csv_kwargs,
     ) -> Dict:
         """
@@ -220,6 +480,9 @@ class PredictionService:
             csv_path: Path to the CSV file
             return_proba: Whether to return class probabilities
             return_meta_features: Whether to return intermediate meta-features
+                (full tier only)
+            tier: "full" for the stacked ensemble, "fast" for the distilled
+                student model
             **csv_kwargs: Additional arguments to pass to pd.read_csv
 
         Returns:
@@ -233,14 +496,20 @@ class PredictionService:
 
         df = pd.read_csv(csv_path, **csv_kwargs)
 
-        return self.predict_from_dataframe(df, return_proba, return_meta_features)
+        return self.predict_from_dataframe(
+            df, return_proba, return_meta_features, tier=tier
+        )
 
-    def predict_single(self, features: Union[List, np.ndarray]) -> Dict:
+    def predict_single(
+        self, features: Union[List, np.ndarray], tier: str = "full"
+    ) -> Dict:
         """
         Make prediction for a single sample.
 
         Args:
             features: Feature values for a single sample
+            tier: "full" for the stacked ensemble, "fast" for the distilled
+                student model
 
         Returns:
             Dictionary with prediction details
@@ -253,9 +522,10 @@ class PredictionService:
 
         df = pd.DataFrame(features)
 
-        results = self.predict_from_dataframe(df, return_proba=True)
+        results = self.predict_from_dataframe(df, return_proba=True, tier=tier)
 
         return {
+            "tier": tier,
             "prediction": results["predictions"][0],
             "confidence": results["confidence"][0],
             "probabilities": {
@@ -0,0 +1,221 @@
+import asyncio
+import contextvars
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+import pandas as pd
+
+from ..prediction_service import MAX_SINGLE_BATCH_ROWS
+from .executor import PredictionExecutor
+from .predictor import PoolExhausted, PredictionServicePool
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+# The largest input the Keras models score without model.predict overhead.
+DEFAULT_CHUNK_ROWS = MAX_SINGLE_BATCH_ROWS
+MAX_CHUNK_ROWS = 50000
+
+
+def read_csv_chunks(
+    source, chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV file lazily, ``chunk_rows`` rows at a time.
+
+    Args:
+        source: Path or binary file object of the CSV
+        chunk_rows: Rows per chunk
+
+    Returns:
+        Iterator of DataFrame chunks, indexed by row number in the file
+    """
+    return pd.read_csv(source, chunksize=chunk_rows)
+
+
+def result_frame(chunk: pd.DataFrame, results: Dict) -> pd.DataFrame:
+    """
+    One output row per input row: its row number, the predicted class, the
+    confidence and one probability column per class.
+    """
+    probabilities = results["probabilities"]
+    frame = pd.DataFrame(
+        {
+            "row": chunk.index,
+            "prediction": results["predictions"],
+            "confidence": probabilities.max(axis=1).to_numpy(),
+        }
+    )
+    probabilities.index = frame.index
+    return pd.concat([frame, probabilities], axis=1)
+
+
+def render_chunk(frame: pd.DataFrame, output_format: str, header: bool) -> str:
+    if output_format == "csv":
+        return frame.to_csv(index=False, header=header)
+    # Newer pandas already end the last record with a newline.
+    text = frame.to_json(orient="records", lines=True)
+    return text if text.endswith("\n") else text + "\n"
+
+
+def log_failure(exc: Exception, rows: int, request_id: Optional[str]) -> str:
+    """
+    Log a chunk that failed after the response started, from within the
+    ``except`` block, and return the message the client may see.
+    """
+    if isinstance(exc, PoolExhausted):
+        logger.warning(
+            f"CSV scoring stopped after {rows} rows, all prediction workers "
+            f"are busy [request_id={request_id}]"
+        )
+        return "All prediction workers are busy, retry later"
+    # Bad values further down the file are the client's error, as they would
+    # have been in the first chunk.
+    if isinstance(exc, ValueError):
+        logger.warning(
+            f"CSV input rejected after {rows} rows [request_id={request_id}]: {exc}"
+        )
+        return str(exc)
+    logger.exception(f"CSV scoring failed after {rows} rows [request_id={request_id}]")
+    return "Internal server error"
+
+
+def error_line(exc: Exception, rows: int, request_id: Optional[str]) -> str:
+    """Final NDJSON line of a stream that failed after ``rows`` rows."""
+    error = log_failure(exc, rows, request_id)
+    return json.dumps(
+        {"error": error, "request_id": request_id, "rows_scored": rows}
+    ) + "\n"
+
+
+def stream_predictions(
+    pool: PredictionServicePool,
+    first_chunk: pd.DataFrame,
+    chunks: Iterator[pd.DataFrame],
+    tier: str = "full",
+    output_format: str = "ndjson",
+    request_id: Optional[str] = None,
+) -> Iterator[str]:
+    """
+    Score CSV chunks and yield the rendered results chunk by chunk.
+
+    Scoring runs one chunk ahead on a background thread: chunk ``i + 1`` is
+    read from disk while chunk ``i`` is scored, and scored while chunk ``i``
+    is written to the client. At most three chunks are in memory however
+    large the file is, and the first rows go out as soon as the first chunk
+    is scored. Each chunk checks a replica out of the pool only while it is
+    scored, so a slow client does not hold one.
+
+    A chunk that fails after the response has started ends an NDJSON stream
+    with an ``{"error": ..., "request_id": ...}`` line. A CSV stream is cut
+    off instead, so the client sees an incomplete transfer.
+
+    Args:
+        pool: Prediction service pool
+        first_chunk: The first chunk, already validated by the caller
+        chunks: The remaining chunks
+        tier: Prediction tier, "full" or "fast"
+        output_format: "ndjson" or "csv"
+        request_id: Correlation id to report errors under
+
+    Yields:
+        Rendered result text, one piece per chunk
+    """
+
+    def score(chunk: pd.DataFrame) -> pd.DataFrame:
+        with pool.checkout() as replica:
+            results = replica.predict_from_dataframe(
+                chunk, return_proba=True, tier=tier
+            )
+        return result_frame(chunk, results)
+
+    rows = 0
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="csv-scoring") as scorer:
+        pending = scorer.submit(contextvars.copy_context().run, score, first_chunk)
+        try:
+            for chunk in chunks:
+                ahead = scorer.submit(contextvars.copy_context().run, score, chunk)
+                frame = pending.result()
+                pending = ahead
+                yield render_chunk(frame, output_format, header=rows == 0)
+                rows += len(frame)
+            frame = pending.result()
+            yield render_chunk(frame, output_format, header=rows == 0)
+            rows += len(frame)
+        except Exception as e:
+            pending.cancel()
+            if output_format == "csv":
+                log_failure(e, rows, request_id)
+                raise
+            yield error_line(e, rows, request_id)
+            return
+    logger.info(f"Streamed {rows} scored rows [request_id={request_id}]")
+
+
+async def astream_predictions(
+    executor: PredictionExecutor,
+    first_chunk: pd.DataFrame,
+    chunks: Iterator[pd.DataFrame],
+    tier: str = "full",
+    output_format: str = "ndjson",
+    request_id: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Async counterpart of ``stream_predictions`` for ASGI servers, which would
+    otherwise consume a sync iterator in full before sending any of it.
+
+    Each chunk is scored on the prediction executor, one chunk ahead of the
+    one being sent, and the next chunk is read from disk on a worker thread,
+    so the event loop only renders and sends. The same limits and errors
+    apply as for ``stream_predictions``; a chunk that is refused because the
+    executor is saturated ends the stream like any other failure.
+
+    Args:
+        executor: Prediction executor, see ``get_executor``
+        first_chunk: The first chunk, already validated by the caller
+        chunks: The remaining chunks
+        tier: Prediction tier, "full" or "fast"
+        output_format: "ndjson" or "csv"
+        request_id: Correlation id to report errors under
+
+    Yields:
+        Rendered result text, one piece per chunk
+    """
+
+    async def score(chunk: pd.DataFrame) -> pd.DataFrame:
+        return result_frame(chunk, await executor.predict(chunk, tier))
+
+    rows = 0
+    pending = asyncio.ensure_future(score(first_chunk))
+    ahead = None
+    try:
+        while pending is not None:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is not None:
+                ahead = asyncio.ensure_future(score(chunk))
+            frame = await pending
+            pending, ahead = ahead, None
+            yield render_chunk(frame, output_format, header=rows == 0)
+            rows += len(frame)
+    except Exception as e:
+        if output_format == "csv":
+            log_failure(e, rows, request_id)
+            raise
+        yield error_line(e, rows, request_id)
+        return
+    finally:
+        # Also reached when the client disconnects and the server closes the
+        # generator.
+        for task in (pending, ahead):
+            if task is None:
+                continue
+            if task.done() and not task.cancelled():
+                task.exception()
+            else:
+                task.cancel()
+    logger.info(f"Streamed {rows} scored rows [request_id={request_id}]")
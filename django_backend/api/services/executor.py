@@ -0,0 +1,135 @@
+import abc
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import pandas as pd
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .predictor import PoolExhausted, PredictionServicePool, get_pool
+
+DEFAULT_EXECUTOR_BACKEND = "api.services.executor.ThreadPoolPredictionExecutor"
+# Predictions queued or running per worker before new ones are refused.
+DEFAULT_PENDING_PER_WORKER = 8
+
+
+class PredictionExecutor(abc.ABC):
+    """
+    Where async views send inference. Implementations take the prediction
+    service pool and run ``predict`` off the event loop; a micro-batching
+    backend can coalesce concurrent calls behind the same interface.
+    Selected with the ``PREDICTION_EXECUTOR_BACKEND`` setting and constructed
+    with the pool and the ``PREDICTION_EXECUTOR_OPTIONS`` keyword arguments.
+    """
+
+    def __init__(self, pool: PredictionServicePool):
+        self.pool = pool
+
+    @abc.abstractmethod
+    async def predict(self, df: pd.DataFrame, tier: str = "full") -> Dict:
+        """
+        Predict class probabilities for already validated features.
+
+        Args:
+            df: Feature DataFrame, see ``PredictionService.prepare_features``
+            tier: Prediction tier, "full" or "fast"
+
+        Returns:
+            The ``predict_from_dataframe`` result with ``return_proba=True``
+
+        Raises:
+            PoolExhausted: When the backend is saturated
+        """
+
+    def shutdown(self):
+        pass
+
+
+class ThreadPoolPredictionExecutor(PredictionExecutor):
+    def __init__(
+        self,
+        pool: PredictionServicePool,
+        max_workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ):
+        """
+        Run each prediction on a dedicated thread pool, one worker per
+        replica, so a checkout never waits on the sync views' share of the
+        pool for long. Connections cost a coroutine while they wait, not a
+        thread; only inference does.
+
+        Args:
+            pool: Prediction service pool to check replicas out of
+            max_workers: Inference threads; the pool size when None
+            max_pending: Predictions queued or running before new ones are
+                refused with PoolExhausted; 8 per worker when None
+        """
+        super().__init__(pool)
+        self.max_workers = max_workers or pool.size
+        self.max_pending = max_pending or self.max_workers * DEFAULT_PENDING_PER_WORKER
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="inference"
+        )
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _predict(self, df: pd.DataFrame, tier: str) -> Dict:
+        with self.pool.checkout() as replica:
+            return replica.predict_from_dataframe(df, return_proba=True, tier=tier)
+
+    async def predict(self, df: pd.DataFrame, tier: str = "full") -> Dict:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PoolExhausted(
+                    f"{self._pending} predictions already pending"
+                )
+            self._pending += 1
+        try:
+            # Copy the context so spans recorded in the worker thread join
+            # the request's trace.
+            context = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, context.run, self._predict, df, tier
+            )
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> PredictionExecutor:
+    global executor
+    if executor is None:
+        with _executor_lock:
+            if executor is None:
+                backend = import_string(
+                    getattr(
+                        settings,
+                        "PREDICTION_EXECUTOR_BACKEND",
+                        DEFAULT_EXECUTOR_BACKEND,
+                    )
+                )
+                executor = backend(
+                    get_pool(),
+                    **getattr(settings, "PREDICTION_EXECUTOR_OPTIONS", {}),
+                )
+    return executor
+
+
+async def aget_executor() -> PredictionExecutor:
+    """
+    ``get_executor`` for async views. The first call creates the pool, which
+    loads the models, so it runs on a worker thread rather than the event loop.
+    """
+    if executor is not None:
+        return executor
+    return await asyncio.to_thread(get_executor)
@@ -1,12 +1,131 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator, Optional
+
+from django.conf import settings
+
 from ..prediction_service import PredictionService
+from ..tracing import span
 
 MODEL_DIR = Path(__file__).resolve().parent.parent.parent / "models"
 
-service = None  # placeholder
+DEFAULT_POOL_SIZE = os.cpu_count() or 1
+DEFAULT_CHECKOUT_TIMEOUT = 30.0
+
+
+class PoolExhausted(RuntimeError):
+    """No prediction service became free within the checkout timeout."""
+
+
+class PredictionServicePool:
+    def __init__(
+        self,
+        model_dir: Path = MODEL_DIR,
+        size: int = DEFAULT_POOL_SIZE,
+        timeout: float = DEFAULT_CHECKOUT_TIMEOUT,
+    ):
+        """
+        Bounded pool of PredictionService replicas with check-out/check-in.
+
+        The models are loaded once; replicas share the tree models and get
+        their own Keras model clones (see ``PredictionService.replicate``).
+        Replicas are created on demand, up to ``size``, so startup only pays
+        for the first one. A request holds a replica for the duration of its
+        prediction, so no two threads ever use the same Keras model.
+
+        Args:
+            model_dir: Directory containing saved model files
+            size: Maximum number of replicas, i.e. concurrent predictions
+            timeout: Seconds to wait for a free replica before giving up
+        """
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.service = PredictionService(model_dir)
+
+        self._idle = queue.LifoQueue(maxsize=self.size)
+        self._idle.put(self.service)
+        self._created = 1
+        self._lock = threading.Lock()
+
+    def _acquire(self, timeout: Optional[float]) -> PredictionService:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self.service.replicate()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout if timeout is None else timeout)
+        except queue.Empty:
+            raise PoolExhausted(
+                f"All {self.size} prediction services are busy"
+            ) from None
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None) -> Iterator[PredictionService]:
+        """
+        Borrow a replica for the enclosed block and return it afterwards.
+
+        Args:
+            timeout: Seconds to wait for a free replica; the pool's default
+                when None
+
+        Yields:
+            A PredictionService no other thread is using
+        """
+        with span("checkout"):
+            service = self._acquire(timeout)
+        try:
+            yield service
+        finally:
+            self._idle.put(service)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "created": self._created,
+            "idle": self._idle.qsize(),
+        }
+
+
+pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> PredictionServicePool:
+    """
+    The process-wide pool, created on first use from the PREDICTION_* settings
+    so importing the views does not load the models.
+    """
+    global pool
+    if pool is None:
+        with _pool_lock:
+            if pool is None:
+                pool = PredictionServicePool(
+                    getattr(settings, "PREDICTION_MODEL_DIR", MODEL_DIR),
+                    size=getattr(settings, "PREDICTION_POOL_SIZE", DEFAULT_POOL_SIZE),
+                    timeout=getattr(
+                        settings, "PREDICTION_POOL_TIMEOUT", DEFAULT_CHECKOUT_TIMEOUT
+                    ),
+                )
+    return pool
+
 
-def get_service():
-    global service
-    if service is None:
-        service = PredictionService(MODEL_DIR)
-    return service
+def get_service() -> PredictionService:
+    """The pool's primary service, for metadata such as feature names."""
+    return get_pool().service
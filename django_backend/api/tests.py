@@ -1,3 +1,542 @@
-from django.test import TestCase
+import asyncio
+import contextlib
+import json
+import logging
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import joblib
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, Client, SimpleTestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from lightgbm import LGBMClassifier
+from sklearn.preprocessing import StandardScaler
+from tensorflow import keras
+from xgboost import XGBClassifier
+
+from .model_bundle import PREFIX, ModelBundle, ModelBundleError
+from .prediction_service import PredictionService
+from .services import executor as executor_module
+from .services import predictor as predictor_module
+from .services.predictor import PoolExhausted
+from .tracing import SlowRequestFileHandler
+
+FEATURE_NAMES = ["f0", "f1", "f2", "f3"]
+CLASS_NAMES = ["FALSE_POSITIVE", "CANDIDATE", "CONFIRMED"]
+
+
+def build_model_set(model_dir: Path):
+    """Save a small, quickly trained model set in the layout ml/main.py writes."""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, len(FEATURE_NAMES)))
+    y = np.arange(300) % len(CLASS_NAMES)
+    X[:, 0] += y
+
+    scaler = StandardScaler().fit(X)
+    X_scaled = scaler.transform(X)
+    joblib.dump(scaler, model_dir / "feature_scaler.pkl")
+    joblib.dump(
+        XGBClassifier(n_estimators=5).fit(X_scaled, y),
+        model_dir / "xgboost_model.pkl",
+    )
+    joblib.dump(
+        LGBMClassifier(n_estimators=5, verbose=-1).fit(X_scaled, y),
+        model_dir / "lightgbm_model.pkl",
+    )
+    for name, inputs in [("mlp_model", len(FEATURE_NAMES)), ("meta_model", 9)]:
+        model = keras.Sequential(
+            [
+                keras.Input((inputs,)),
+                keras.layers.Dense(len(CLASS_NAMES), activation="softmax"),
+            ]
+        )
+        model.save(model_dir / f"{name}.keras")
+    joblib.dump(
+        {
+            "n_features": len(FEATURE_NAMES),
+            "feature_names": FEATURE_NAMES,
+            "class_names": CLASS_NAMES,
+            "training_date": "2025-01-01T00:00:00",
+        },
+        model_dir / "ensemble_info.pkl",
+    )
+
+
+def write_bundle(model_dir: Path) -> Path:
+    """Bundle the model set with the writer the training pipeline uses."""
+    ml_dir = str(settings.BASE_DIR.parent / "ml")
+    if ml_dir not in sys.path:
+        sys.path.insert(0, ml_dir)
+    # The pipeline modules open their log files relative to the working
+    # directory when imported; keep them out of the backend.
+    with contextlib.chdir(tempfile.mkdtemp()):
+        from src.models.model_bundle import write_model_bundle
+
+    return write_model_bundle(model_dir)
+
+
+def feature_rows(n: int) -> list:
+    rng = np.random.default_rng(1)
+    return [dict(zip(FEATURE_NAMES, row)) for row in rng.normal(size=(n, 4)).tolist()]
+
+
+class ModelSetTestCase(SimpleTestCase):
+    """Serves a temporary model set through a fresh, single-replica pool."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.model_dir = Path(tempfile.mkdtemp())
+        build_model_set(cls.model_dir)
+        cls.addClassCleanup(shutil.rmtree, cls.model_dir)
+        cls.settings = override_settings(
+            PREDICTION_MODEL_DIR=cls.model_dir,
+            PREDICTION_POOL_SIZE=1,
+            PREDICTION_POOL_TIMEOUT=0.05,
+        )
+        cls.settings.enable()
+        cls.addClassCleanup(cls.settings.disable)
+        super().setUpClass()
+
+    def setUp(self):
+        predictor_module.pool = None
+        executor_module.executor = None
+        self.addCleanup(self.reset_services)
+
+    @staticmethod
+    def reset_services():
+        if executor_module.executor is not None:
+            executor_module.executor.shutdown()
+        executor_module.executor = None
+        predictor_module.pool = None
+
+
+class ModelBundleTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model_dir = Path(tempfile.mkdtemp())
+        cls.addClassCleanup(shutil.rmtree, cls.model_dir)
+        build_model_set(cls.model_dir)
+        cls.bundle_path = write_bundle(cls.model_dir)
+
+    def corrupted_copy(self, edit) -> Path:
+        data = bytearray(self.bundle_path.read_bytes())
+        data = edit(data) or data
+        path = self.model_dir / "corrupted.bundle"
+        path.write_bytes(bytes(data))
+        self.addCleanup(path.unlink)
+        return path
+
+    def test_bundle_predicts_like_the_model_files(self):
+        from_bundle = PredictionService(self.model_dir)
+        self.assertTrue(from_bundle.model_loader.use_bundle)
+
+        files_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, files_dir)
+        shutil.copytree(self.model_dir, files_dir, dirs_exist_ok=True)
+        (files_dir / self.bundle_path.name).unlink()
+        from_files = PredictionService(files_dir)
+        self.assertFalse(from_files.model_loader.use_bundle)
+
+        df = pd.DataFrame(feature_rows(20))
+        expected = from_files.predict_from_dataframe(df, return_proba=True)
+        actual = from_bundle.predict_from_dataframe(df, return_proba=True)
+        self.assertEqual(actual["predictions"], expected["predictions"])
+        np.testing.assert_allclose(
+            actual["probabilities"].to_numpy(), expected["probabilities"].to_numpy()
+        )
+
+    def test_bad_magic(self):
+        def edit(data):
+            data[:8] = b"NOTABUND"
+
+        with self.assertRaisesRegex(ModelBundleError, "not a model bundle"):
+            ModelBundle(self.corrupted_copy(edit))
+
+    def test_unknown_version(self):
+        def edit(data):
+            struct.pack_into("<I", data, 8, 99)
+
+        with self.assertRaisesRegex(ModelBundleError, "format version 99"):
+            ModelBundle(self.corrupted_copy(edit))
+
+    def test_truncated_prefix(self):
+        with self.assertRaisesRegex(ModelBundleError, "truncated"):
+            ModelBundle(self.corrupted_copy(lambda data: data[: PREFIX.size - 1]))
+
+    def test_truncated_section(self):
+        bundle = ModelBundle(self.bundle_path)
+        end = bundle.sections["meta_model/config"]["offset"]
+        bundle.close()
+
+        truncated = ModelBundle(self.corrupted_copy(lambda data: data[:end]))
+        self.addCleanup(truncated.close)
+        with self.assertRaisesRegex(ModelBundleError, "truncated"):
+            truncated.load("meta_model")
+
+    def test_checksum_mismatch(self):
+        bundle = ModelBundle(self.bundle_path)
+        offset = bundle.sections["feature_scaler"]["offset"]
+        bundle.close()
+
+        def edit(data):
+            data[offset] ^= 0xFF
+
+        corrupted = ModelBundle(self.corrupted_copy(edit))
+        self.addCleanup(corrupted.close)
+        with self.assertRaisesRegex(ModelBundleError, "checksum mismatch"):
+            corrupted.load("feature_scaler")
+
+
+class ServingImputationTests(SimpleTestCase):
+    def service(self, n_neighbors) -> PredictionService:
+        model_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, model_dir)
+        build_model_set(model_dir)
+        rng = np.random.default_rng(2)
+        joblib.dump(
+            {
+                "feature_names": FEATURE_NAMES,
+                "feature_fill_values": [10.0, 20.0, 30.0, 40.0],
+                "n_neighbors": n_neighbors,
+                "reference_set": (
+                    rng.normal(size=(50, 4)).astype(np.float32)
+                    if n_neighbors
+                    else None
+                ),
+            },
+            model_dir / "imputer_state.pkl",
+        )
+        return PredictionService(model_dir)
+
+    def test_knn_state_imputes_from_the_reference_rows(self):
+        service = self.service(n_neighbors=3)
+        X = np.array([[0.1, np.nan, 0.3, 0.4], [0.5, 0.6, 0.7, 0.8]])
+
+        imputed = service._impute_missing(X)
+
+        self.assertFalse(np.isnan(imputed).any())
+        np.testing.assert_array_equal(imputed[1], X[1])
+        self.assertLess(abs(imputed[0, 1]), 5)
+
+    def test_without_a_reference_set_the_fill_values_are_used(self):
+        service = self.service(n_neighbors=None)
+        X = np.array([[0.1, np.nan, 0.3, np.nan]])
+
+        np.testing.assert_array_equal(
+            service._impute_missing(X), [[0.1, 20.0, 0.3, 40.0]]
+        )
+
+
+class PredictionPoolTests(ModelSetTestCase):
+    def test_checkout_returns_the_replica(self):
+        pool = predictor_module.get_pool()
+        with pool.checkout() as replica:
+            self.assertIs(replica, pool.service)
+            self.assertEqual(pool.stats["idle"], 0)
+        self.assertEqual(pool.stats["idle"], 1)
+
+    def test_exhausted_pool_raises(self):
+        pool = predictor_module.get_pool()
+        with pool.checkout():
+            with self.assertRaises(PoolExhausted):
+                with pool.checkout(timeout=0):
+                    pass
+
+    def test_busy_pool_answers_503(self):
+        with predictor_module.get_pool().checkout():
+            response = self.client.post(
+                "/predict/public/", feature_rows(1)[0], content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("error", response.json())
+
+    def test_public_predict(self):
+        response = self.client.post(
+            "/predict/public/", feature_rows(3), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(len(body["predictions"]), 3)
+        self.assertEqual(set(body["probabilities"][0]), set(CLASS_NAMES))
+
+
+class CorrelationIdTests(ModelSetTestCase):
+    def test_valid_request_id_is_echoed(self):
+        response = self.client.get("/predict/public/", HTTP_X_REQUEST_ID="abc-123")
+        self.assertEqual(response["X-Request-ID"], "abc-123")
+
+    def test_invalid_request_id_is_replaced(self):
+        response = self.client.get("/predict/public/", HTTP_X_REQUEST_ID="bad id!")
+        self.assertRegex(response["X-Request-ID"], r"^[0-9a-f]{32}$")
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_request_is_logged_with_spans(self):
+        client = Client()
+        with self.assertLogs("api.slow_requests", "WARNING") as logs:
+            response = client.post(
+                "/predict/public/",
+                feature_rows(1)[0],
+                content_type="application/json",
+                HTTP_X_REQUEST_ID="slow-1",
+            )
+        self.assertEqual(response.status_code, 200)
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry["request_id"], "slow-1")
+        self.assertEqual(entry["status"], 200)
+        span_names = {child["name"] for child in entry["spans"]["children"]}
+        self.assertIn("checkout", span_names)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=60000)
+    def test_fast_request_is_not_logged(self):
+        client = Client()
+        with self.assertNoLogs("api.slow_requests"):
+            client.post(
+                "/predict/public/", feature_rows(1)[0], content_type="application/json"
+            )
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_streamed_chunks_are_traced(self):
+        upload = SimpleUploadedFile(
+            "rows.csv",
+            pd.DataFrame(feature_rows(5)).to_csv(index=False).encode(),
+            content_type="text/csv",
+        )
+        with self.assertLogs("api.slow_requests", "WARNING") as logs:
+            response = Client().post(
+                "/predict/public/csv/?chunk_rows=2", {"file": upload}
+            )
+            b"".join(response.streaming_content)
+
+        entry = json.loads(logs.records[0].getMessage())
+        span_names = [child["name"] for child in entry["spans"]["children"]]
+        # One checkout per chunk, made on the scoring thread.
+        self.assertEqual(span_names.count("checkout"), 3)
+
+    def test_log_folder_is_created_with_the_first_record(self):
+        log_dir = Path(tempfile.mkdtemp()) / "logs"
+        self.addCleanup(shutil.rmtree, log_dir.parent)
+        handler = SlowRequestFileHandler(log_dir / "slow_requests.log", delay=True)
+        self.addCleanup(handler.close)
+        self.assertFalse(log_dir.exists())
+
+        handler.emit(logging.makeLogRecord({"msg": "{}"}))
+        self.assertTrue((log_dir / "slow_requests.log").exists())
+
+
+class AsyncPredictTests(ModelSetTestCase):
+    url = "/predict/public/async/"
+
+    async def test_predicts(self):
+        response = await AsyncClient().post(
+            self.url, feature_rows(2), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["predictions"]), 2)
+
+    async def test_bad_json_is_400(self):
+        response = await AsyncClient().post(
+            self.url, "{not json", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    async def test_wrong_feature_count_is_400(self):
+        response = await AsyncClient().post(
+            self.url, [{"f0": 1.0, "f1": 2.0, "x": 3.0}], content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Expected 4 features", response.json()["error"])
+
+    async def test_unknown_tier_is_400(self):
+        response = await AsyncClient().post(
+            f"{self.url}?tier=fast", feature_rows(1), content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["available_tiers"], ["full"])
+
+    async def test_busy_pool_is_503(self):
+        with predictor_module.get_pool().checkout():
+            response = await AsyncClient().post(
+                self.url, feature_rows(1), content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 503)
+
+    async def test_first_request_loads_the_models_off_the_event_loop(self):
+        loop_thread = threading.get_ident()
+        loaded_on = []
+        get_pool = predictor_module.get_pool
+
+        def record(*args, **kwargs):
+            loaded_on.append(threading.get_ident())
+            return get_pool(*args, **kwargs)
+
+        with mock.patch.object(executor_module, "get_pool", record):
+            response = await AsyncClient().post(
+                self.url, feature_rows(1), content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(loaded_on), 1)
+        self.assertNotEqual(loaded_on[0], loop_thread)
+
+
+class CsvPredictTests(ModelSetTestCase):
+    url = "/predict/public/csv/"
+
+    def upload(self, df: pd.DataFrame) -> SimpleUploadedFile:
+        return SimpleUploadedFile(
+            "rows.csv", df.to_csv(index=False).encode(), content_type="text/csv"
+        )
+
+    def test_streams_one_line_per_row(self):
+        df = pd.DataFrame(feature_rows(5))
+        response = self.client.post(
+            f"{self.url}?chunk_rows=2", {"file": self.upload(df)}
+        )
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row["row"] for row in rows], list(range(5)))
+
+    def test_bad_first_chunk_is_400(self):
+        df = pd.DataFrame(feature_rows(3)).drop(columns="f3")
+        df["x"] = 1.0
+        df["y"] = 2.0
+        response = self.client.post(self.url, {"file": self.upload(df)})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bad_later_chunk_ends_with_an_error_line(self):
+        df = pd.DataFrame(feature_rows(6)).astype(object)
+        df.loc[4, "f1"] = "not a number"
+        response = self.client.post(
+            f"{self.url}?chunk_rows=2",
+            {"file": self.upload(df)},
+            HTTP_X_REQUEST_ID="csv-1",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        last = json.loads(lines[-1])
+        self.assertEqual(last["request_id"], "csv-1")
+        self.assertEqual(last["rows_scored"], 4)
+        self.assertIn("error", last)
+        self.assertEqual(len(lines), 5)
+
+
+class AsgiCsvStreamTests(ModelSetTestCase):
+    """The CSV endpoint served by the ASGI handler rather than the test client."""
+
+    async def request(self, body: bytes, query: bytes) -> list:
+        """Send one request through the ASGI application, returning its messages."""
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/predict/public/csv/",
+            "raw_path": b"/predict/public/csv/",
+            "query_string": query,
+            "headers": [
+                (b"host", b"testserver"),
+                (b"content-type", MULTIPART_CONTENT.encode()),
+                (b"content-length", str(len(body)).encode()),
+            ],
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        requests = [{"type": "http.request", "body": body, "more_body": False}]
+        disconnected = asyncio.Event()
+
+        async def receive():
+            if requests:
+                return requests.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        messages = []
+
+        async def send(message):
+            messages.append((message, self.predict.call_count))
+
+        await get_asgi_application()(scope, receive, send)
+        return messages
+
+    def upload_body(self, df: pd.DataFrame) -> bytes:
+        upload = SimpleUploadedFile(
+            "rows.csv", df.to_csv(index=False).encode(), content_type="text/csv"
+        )
+        return encode_multipart(BOUNDARY, {"file": upload})
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(
+            PredictionService,
+            "predict_from_dataframe",
+            autospec=True,
+            side_effect=PredictionService.predict_from_dataframe,
+        )
+        self.predict = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_sends_rows_before_later_chunks_are_scored(self):
+        messages = await self.request(
+            self.upload_body(pd.DataFrame(feature_rows(10))), b"chunk_rows=2"
+        )
+
+        self.assertEqual(messages[0][0]["status"], 200)
+        bodies = [
+            (message["body"], scored)
+            for message, scored in messages
+            if message["type"] == "http.response.body" and message.get("body")
+        ]
+        # Five chunks, each sent while at most the next one had been scored.
+        self.assertEqual(len(bodies), 5)
+        self.assertLessEqual(bodies[0][1], 2)
+        rows = [
+            json.loads(line)
+            for body, _ in bodies
+            for line in body.decode().splitlines()
+        ]
+        self.assertEqual([row["row"] for row in rows], list(range(10)))
+        self.assertEqual(self.predict.call_count, 5)
+
+    async def test_bad_later_chunk_ends_with_an_error_line(self):
+        df = pd.DataFrame(feature_rows(6)).astype(object)
+        df.loc[4, "f1"] = "not a number"
+        messages = await self.request(self.upload_body(df), b"chunk_rows=2")
+
+        body = b"".join(
+            message.get("body", b"")
+            for message, _ in messages
+            if message["type"] == "http.response.body"
+        )
+        lines = body.decode().splitlines()
+        self.assertEqual(len(lines), 5)
+        last = json.loads(lines[-1])
+        self.assertEqual(last["rows_scored"], 4)
+        self.assertIn("error", last)
+
+
+class LoadTestFixtureTests(SimpleTestCase):
+    def test_write_fixtures_need_the_flag(self):
+        import loadtest
+
+        names = {fixture.name for fixture in loadtest.load_fixtures()}
+        self.assertTrue(names)
+        self.assertFalse(names & loadtest.WRITE_FIXTURES)
+        self.assertLessEqual(
+            loadtest.WRITE_FIXTURES,
+            {fixture.name for fixture in loadtest.load_fixtures(include_writes=True)},
+        )
+        with self.assertRaisesRegex(SystemExit, "--include-writes"):
+            loadtest.load_fixtures(["add-planet"])
@@ -0,0 +1,315 @@
+import json
+import logging
+import logging.handlers
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Client-supplied ids are kept only when they look like ids.
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+DEFAULT_SLOW_REQUEST_THRESHOLD_MS = 500.0
+
+slow_request_logger = logging.getLogger("api.slow_requests")
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+class Span:
+    __slots__ = ("name", "start", "end", "children", "attrs")
+
+    def __init__(self, name: str, attrs: Optional[Dict] = None):
+        self.name = name
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+        self.attrs = attrs
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def set(self, **attrs):
+        """Attach attributes, e.g. row counts, to the span."""
+        self.attrs = {**(self.attrs or {}), **attrs}
+
+    def to_dict(self, origin: Optional[float] = None) -> Dict:
+        origin = self.start if origin is None else origin
+        node = {
+            "name": self.name,
+            "start_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": round(self.duration_ms, 3),
+        }
+        if self.attrs:
+            node["attrs"] = self.attrs
+        if self.children:
+            node["children"] = [child.to_dict(origin) for child in self.children]
+        return node
+
+
+class _SpanContext:
+    __slots__ = ("name", "parent", "attrs", "span", "token")
+
+    def __init__(self, name: str, parent: Span, attrs: Optional[Dict]):
+        self.name = name
+        self.parent = parent
+        self.attrs = attrs
+
+    def __enter__(self) -> Span:
+        self.span = Span(self.name, self.attrs)
+        self.parent.children.append(self.span)
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.end = time.perf_counter()
+        if exc is not None:
+            self.span.set(error=f"{exc_type.__name__}: {exc}")
+        _current_span.reset(self.token)
+        return False
+
+
+class _NoSpan:
+    """Stand-in outside a traced request: entering and setting do nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+_END = object()
+
+
+def span(name: str, **attrs):
+    """
+    Context manager timing the enclosed block as a child of the current span.
+
+    Outside a traced request this returns a shared no-op object, so
+    instrumented code costs one context-variable lookup.
+
+    Args:
+        name: Span name, e.g. "parse" or "xgboost"
+        **attrs: Attributes recorded with the span
+
+    Returns:
+        A context manager yielding the span
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return _NO_SPAN
+    return _SpanContext(name, parent, attrs or None)
+
+
+def current_request_id() -> Optional[str]:
+    """Correlation id of the request being handled, if any."""
+    return _request_id.get()
+
+
+class SlowRequestFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that creates the log folder on the first record."""
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
+
+
+@contextmanager
+def _in_request(root: Span, request_id: str):
+    """Make ``root`` and ``request_id`` current for the enclosed block."""
+    span_token = _current_span.set(root)
+    id_token = _request_id.set(request_id)
+    try:
+        yield
+    finally:
+        _current_span.reset(span_token)
+        _request_id.reset(id_token)
+
+
+class CorrelationIdMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """
+        Give every request a correlation id and a root span, and log the span
+        tree of requests slower than ``SLOW_REQUEST_THRESHOLD_MS``, answered
+        with a 5xx status or failed with an exception.
+
+        The id is taken from the ``X-Request-ID`` header when the client sent
+        a valid one, generated otherwise, and returned in the same header.
+        Only those requests are serialized and logged, so fast requests pay
+        for the spans alone. The root span of a streaming response is closed
+        once its body has been sent, not when the view returns. Works in sync
+        and async middleware chains, so async views are not pushed onto a
+        thread by this middleware.
+
+        Args:
+            get_response: The next middleware or view
+        """
+        self.get_response = get_response
+        self.threshold_ms = getattr(
+            settings, "SLOW_REQUEST_THRESHOLD_MS", DEFAULT_SLOW_REQUEST_THRESHOLD_MS
+        )
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    @staticmethod
+    def _request_id(request) -> str:
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        if REQUEST_ID_PATTERN.match(request_id):
+            return request_id
+        return uuid.uuid4().hex
+
+    def _start(self, request):
+        request.request_id = self._request_id(request)
+        root = Span("request")
+        tokens = (_current_span.set(root), _request_id.set(request.request_id))
+        return root, tokens
+
+    def _finish(self, request, response, root: Span, tokens):
+        _current_span.reset(tokens[0])
+        _request_id.reset(tokens[1])
+        if response is not None:
+            response[REQUEST_ID_HEADER] = request.request_id
+            if response.streaming:
+                # The body is produced after the view returns, so the request
+                # ends when the server has sent it or closed the response.
+                content = response.streaming_content
+                response.streaming_content = (
+                    self._atimed(request, response, root, content)
+                    if response.is_async
+                    else self._timed(request, response, root, content)
+                )
+                return
+        self._end(request, response, root)
+
+    def _end(self, request, response, root: Span):
+        root.end = time.perf_counter()
+        if (
+            root.duration_ms >= self.threshold_ms
+            or response is None
+            or response.status_code >= 500
+            or "error" in (root.attrs or {})
+        ):
+            self._log_slow_request(request, response, root)
+
+    # The body is produced after _finish reset the request's context, so each
+    # chunk is produced inside it again: spans opened by the streaming code,
+    # and contexts it copies for worker threads, then belong to the request.
+    def _timed(self, request, response, root: Span, content):
+        iterator = iter(content)
+        try:
+            while True:
+                with _in_request(root, request.request_id):
+                    chunk = next(iterator, _END)
+                if chunk is _END:
+                    break
+                yield chunk
+        except Exception as e:
+            root.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self._end(request, response, root)
+
+    async def _atimed(self, request, response, root: Span, content):
+        iterator = aiter(content)
+        try:
+            while True:
+                with _in_request(root, request.request_id):
+                    chunk = await anext(iterator, _END)
+                if chunk is _END:
+                    break
+                yield chunk
+        except Exception as e:
+            root.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self._end(request, response, root)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        root, tokens = self._start(request)
+        response = None
+        try:
+            response = self.get_response(request)
+            return response
+        except Exception as e:
+            root.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self._finish(request, response, root, tokens)
+
+    async def __acall__(self, request):
+        root, tokens = self._start(request)
+        response = None
+        try:
+            response = await self.get_response(request)
+            return response
+        except Exception as e:
+            root.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            self._finish(request, response, root, tokens)
+
+    def _log_slow_request(self, request, response, root: Span):
+        slow_request_logger.warning(
+            json.dumps(
+                {
+                    "request_id": request.request_id,
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code if response is not None else None,
+                    "duration_ms": round(root.duration_ms, 3),
+                    "threshold_ms": self.threshold_ms,
+                    "spans": root.to_dict(),
+                },
+                default=str,
+            )
+        )
+
+
+class TracedJSONParser(JSONParser):
+    """JSONParser recording request-body parsing as a "parse" span."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        with span("parse"):
+            return super().parse(stream, media_type, parser_context)
+
+
+class TracedJSONRenderer(JSONRenderer):
+    """JSONRenderer recording response rendering as a "render" span."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with span("render"):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+__all__ = [
+    "CorrelationIdMiddleware",
+    "SlowRequestFileHandler",
+    "TracedJSONParser",
+    "TracedJSONRenderer",
+    "current_request_id",
+    "span",
+]
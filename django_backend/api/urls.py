@@ -1,8 +1,15 @@
 from django.urls import path
-from .views import ExoPlanetDataView, PublicPredictView
+from .views import (
+    ExoPlanetDataView,
+    PublicPredictView,
+    public_predict_async,
+    public_predict_csv,
+)
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 urlpatterns = [
     path("exo-planet/", ExoPlanetDataView.as_view(), name="exoplanets"),
     path("predict/public/", PublicPredictView.as_view(), name="predict_public"), # NO auth
+    path("predict/public/async/", public_predict_async, name="predict_public_async"), # NO auth, ASGI
+    path("predict/public/csv/", public_predict_csv, name="predict_public_csv"), # NO auth, streamed
 ]
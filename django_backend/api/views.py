@@ -1,3 +1,12 @@
+import json
+import logging
+
+import pandas as pd
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -5,26 +14,83 @@ from rest_framework.permissions import AllowAny
 
 from . import models
 from . import serializers
-from .services.predictor import get_service
+from .services.csv_scoring import (
+    DEFAULT_CHUNK_ROWS,
+    MAX_CHUNK_ROWS,
+    OUTPUT_FORMATS,
+    astream_predictions,
+    read_csv_chunks,
+    stream_predictions,
+)
+from .services.executor import aget_executor, get_executor
+from .services.predictor import PoolExhausted, get_pool, get_service
+from .tracing import current_request_id, span
+
+logger = logging.getLogger(__name__)
 
 class ExoPlanetDataView(generics.ListCreateAPIView):
     queryset = models.ExoPlanetData.objects.all()
     serializer_class = serializers.ExoPlanetDataSerializer
 
 
-from pathlib import Path
-from django.conf import settings
-from .prediction_service import PredictionService
+def get_tier(request):
+    """
+    Prediction tier from the ``?tier=`` query parameter ("full" by default).
+    Returns None when the tier cannot be served.
+    """
+    tier = request.GET.get("tier", "full")
+    return tier if tier in get_service().tiers else None
+
+
+# Error responses shared by the DRF views and the plain async and CSV views,
+# so every endpoint answers a failure with the same body.
+def busy_response():
+    return JsonResponse(
+        {"error": "All prediction workers are busy, retry later"},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
+def invalid_tier_response(request):
+    return JsonResponse(
+        {
+            "error": f"Unknown or unavailable tier '{request.GET.get('tier')}'",
+            "available_tiers": get_service().tiers,
+        },
+        status=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+def bad_input_response(exc):
+    """400 for inputs the service rejected, e.g. a wrong feature count."""
+    return JsonResponse({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def server_error_response(request):
+    """
+    Log the exception being handled with its traceback and answer with a 500
+    carrying the correlation id, so the log entry can be found from a client
+    report.
+    """
+    request_id = current_request_id()
+    logger.exception(
+        f"Prediction failed [request_id={request_id}] {request.method} {request.path}"
+    )
+    return JsonResponse(
+        {"error": "Internal server error", "request_id": request_id},
+        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+    )
 
-# Correctly point to the models folder
-model_dir = Path(settings.BASE_DIR) / "models"
-service = PredictionService(model_dir)
 
 def do_prediction(request):
     """
     Shared prediction logic for both authenticated and public endpoints.
     Accepts 'features' key (list or list of lists for batch).
     """
+    tier = get_tier(request)
+    if tier is None:
+        return invalid_tier_response(request)
+
     features = request.data.get("features")
     if features is None:
         return Response({"error": "Missing 'features' in request body"},
@@ -35,38 +101,189 @@ def do_prediction(request):
         # Handle single sample vs batch
         if isinstance(features[0], (float, int)):
             # Single prediction
-            result = service.predict_single(features)
+            with get_pool().checkout() as replica:
+                result = replica.predict_single(features, tier=tier)
             return Response(result, status=status.HTTP_200_OK)
         else:
             # Batch prediction
-            import pandas as pd
-            feature_names = service.ensemble_info.get("feature_names")
+            feature_names = get_service().ensemble_info.get("feature_names")
             if not feature_names:
                 feature_names = [f"f{i}" for i in range(len(features[0]))]
             df = pd.DataFrame(features, columns=feature_names)
-            results = service.predict_from_dataframe(df, return_proba=True)
+            with get_pool().checkout() as replica:
+                results = replica.predict_from_dataframe(
+                    df, return_proba=True, tier=tier
+                )
             if "probabilities" in results:
                 results["probabilities"] = results["probabilities"].to_dict(orient="records")
             return Response(results, status=status.HTTP_200_OK)
-    except Exception as e:
-        return Response({"error": str(e)},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    except PoolExhausted:
+        return busy_response()
+    except (ValueError, TypeError, IndexError) as e:
+        return bad_input_response(e)
+    except Exception:
+        return server_error_response(request)
 
 class PublicPredictView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
+        tier = get_tier(request)
+        if tier is None:
+            return invalid_tier_response(request)
+
         data = request.data
-        import pandas as pd
         try:
             if isinstance(data, dict):
                 data = [data]
             df = pd.DataFrame(data)
-            results = service.predict_from_dataframe(df, return_proba=True)
+            with get_pool().checkout() as replica:
+                results = replica.predict_from_dataframe(
+                    df, return_proba=True, tier=tier
+                )
             if "probabilities" in results:
                 results["probabilities"] = results["probabilities"].to_dict(orient="records")
             return Response(results, status=status.HTTP_200_OK)
-        except Exception as e:
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        
+        except PoolExhausted:
+            return busy_response()
+        except (ValueError, TypeError, IndexError) as e:
+            return bad_input_response(e)
+        except Exception:
+            return server_error_response(request)
+
+
+@csrf_exempt
+@require_POST
+async def public_predict_async(request):
+    """
+    Async variant of PublicPredictView for ASGI servers.
+
+    The body is parsed and validated on the event loop and only valid input
+    is queued for inference on the prediction executor, so a connection
+    costs a coroutine rather than a thread while its upload arrives or its
+    prediction waits for a worker.
+
+    Args:
+        request: Django HttpRequest with a JSON feature object or list
+
+    Returns:
+        JsonResponse with the same body as PublicPredictView
+    """
+    executor = await aget_executor()
+
+    tier = get_tier(request)
+    if tier is None:
+        return invalid_tier_response(request)
+
+    try:
+        with span("parse"):
+            data = json.loads(request.body)
+        if isinstance(data, dict):
+            data = [data]
+        with span("validate", rows=len(data)):
+            df = get_service().prepare_features(pd.DataFrame(data))
+    except (ValueError, TypeError) as e:
+        return bad_input_response(e)
+
+    try:
+        results = await executor.predict(df, tier)
+    except PoolExhausted:
+        return busy_response()
+    except (ValueError, TypeError, IndexError) as e:
+        return bad_input_response(e)
+    except Exception:
+        return server_error_response(request)
+
+    results["probabilities"] = results["probabilities"].to_dict(orient="records")
+    with span("render"):
+        return JsonResponse(results)
+
+
+@csrf_exempt
+@require_POST
+def public_predict_csv(request):
+    """
+    Score an uploaded CSV and stream the results back while later rows are
+    still being scored.
+
+    The multipart ``file`` field is spooled to a temporary file rather than
+    memory and read in chunks of ``?chunk_rows=`` rows (4096 by default).
+    The first chunk is validated before the response starts, so bad input
+    still gets a 400. Results are streamed as ``?format=ndjson`` (default) or
+    ``csv``, one row per input row. Under ASGI the body is an async iterator
+    scored on the prediction executor, so it is sent as it is produced.
+
+    Args:
+        request: Django HttpRequest with a multipart CSV upload
+
+    Returns:
+        StreamingHttpResponse of scored rows, or a JsonResponse error
+    """
+    # Must be set before request.FILES is first read; csrf_exempt keeps the
+    # CSRF middleware from reading it earlier.
+    request.upload_handlers = [TemporaryFileUploadHandler(request)]
+
+    tier = get_tier(request)
+    if tier is None:
+        return invalid_tier_response(request)
+    output_format = request.GET.get("format", "ndjson")
+    if output_format not in OUTPUT_FORMATS:
+        return JsonResponse(
+            {
+                "error": f"Unknown format '{output_format}'",
+                "available_formats": list(OUTPUT_FORMATS),
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        chunk_rows = int(request.GET.get("chunk_rows", DEFAULT_CHUNK_ROWS))
+    except ValueError:
+        chunk_rows = 0
+    if not 1 <= chunk_rows <= MAX_CHUNK_ROWS:
+        return JsonResponse(
+            {"error": f"chunk_rows must be an integer from 1 to {MAX_CHUNK_ROWS}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    upload = request.FILES.get("file")
+    if upload is None:
+        return JsonResponse(
+            {"error": "Missing 'file' in multipart body"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    try:
+        with span("parse"):
+            chunks = read_csv_chunks(upload.temporary_file_path(), chunk_rows)
+            first_chunk = next(chunks, None)
+        if first_chunk is None or first_chunk.empty:
+            return JsonResponse(
+                {"error": "The uploaded CSV has no rows"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        with span("validate", rows=len(first_chunk)):
+            get_service().prepare_features(first_chunk)
+    except (ValueError, TypeError) as e:
+        return bad_input_response(e)
 
+    # ASGI servers buffer a sync iterator in full before sending it, so they
+    # get an async one that scores each chunk on the prediction executor.
+    if isinstance(request, ASGIRequest):
+        content = astream_predictions(
+            get_executor(),
+            first_chunk,
+            chunks,
+            tier=tier,
+            output_format=output_format,
+            request_id=current_request_id(),
+        )
+    else:
+        content = stream_predictions(
+            get_pool(),
+            first_chunk,
+            chunks,
+            tier=tier,
+            output_format=output_format,
+            request_id=current_request_id(),
+        )
+    return StreamingHttpResponse(content, content_type=OUTPUT_FORMATS[output_format])
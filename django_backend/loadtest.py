@@ -0,0 +1,499 @@
+"""
+Load generator for the API, seeded from the ``api/tests/*.http`` fixtures.
+
+Each fixture is one endpoint. Requests are replayed with their numeric JSON
+values jittered (and batch bodies resized), either open-loop at Poisson
+arrival rates or closed-loop with a fixed number of concurrent clients, in
+stages. Every stage reports throughput, p50/p95/p99 latency and the error
+rate per endpoint. Fixtures that write to the database (``WRITE_FIXTURES``)
+are left out unless ``--include-writes`` is given.
+
+Examples (from ``django_backend``)::
+
+    # Start a local server and step the arrival rate up
+    python loadtest.py --start-server --rates 5 10 20 --stage-seconds 30
+
+    # Concurrency ramp against a running server, predictions only
+    python loadtest.py --concurrency 1 4 16 --fixtures predict-public-single \\
+        predict-public-batch --json reports/loadtest.json
+
+    # The async endpoints under uvicorn
+    python loadtest.py --start-server --asgi --concurrency 1 16 64 \\
+        --fixtures predict-public-async-single predict-public-async-batch
+"""
+
+import argparse
+import json
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+
+BASE_DIR = Path(__file__).resolve().parent
+FIXTURES_DIR = BASE_DIR / "api" / "tests"
+RANDOM_STATE = 42
+PERCENTILES = [50, 95, 99]
+
+# Fixtures that create rows in the database rather than only reading it
+WRITE_FIXTURES = {"add-planet"}
+
+
+@dataclass
+class HttpRequest:
+    name: str
+    method: str
+    url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: Optional[str] = None
+
+
+def parse_http_file(path: Path) -> List[HttpRequest]:
+    """
+    Parse a REST-client ``.http`` file: a request line, header lines, a blank
+    line and an optional body, with multiple requests separated by ``###``.
+
+    Args:
+        path: Path to the ``.http`` file
+
+    Returns:
+        The requests in the file, named after it
+    """
+    requests_ = []
+    blocks = [block.strip() for block in path.read_text().split("###")]
+    for i, block in enumerate(block for block in blocks if block):
+        lines = [line for line in block.splitlines() if not line.startswith("#")]
+        method, url = lines[0].split()[:2]
+
+        headers = {}
+        body_start = len(lines)
+        for j, line in enumerate(lines[1:], start=1):
+            if not line.strip():
+                body_start = j + 1
+                break
+            key, value = line.split(":", 1)
+            headers[key.strip()] = value.strip()
+
+        body = "\n".join(lines[body_start:]).strip() or None
+        name = path.stem if i == 0 else f"{path.stem}#{i + 1}"
+        requests_.append(HttpRequest(name, method.upper(), url, headers, body))
+    return requests_
+
+
+def load_fixtures(
+    names: Optional[List[str]] = None, include_writes: bool = False
+) -> List[HttpRequest]:
+    """
+    Load the ``.http`` fixtures, skipping empty files.
+
+    Args:
+        names: Fixture file stems to keep; all fixtures when None
+        include_writes: Allow the fixtures in ``WRITE_FIXTURES``
+
+    Returns:
+        One request per fixture
+    """
+    if names:
+        writes = sorted(set(names) & WRITE_FIXTURES)
+        if writes and not include_writes:
+            raise SystemExit(
+                f"{', '.join(writes)} write to the database; "
+                "pass --include-writes to replay them"
+            )
+        paths = [FIXTURES_DIR / f"{name}.http" for name in names]
+    else:
+        paths = [
+            path
+            for path in sorted(FIXTURES_DIR.glob("*.http"))
+            if include_writes or path.stem not in WRITE_FIXTURES
+        ]
+    fixtures = []
+    for path in paths:
+        if not path.exists():
+            raise SystemExit(f"No fixture {path.name} in {FIXTURES_DIR}")
+        if not path.read_text().strip():
+            print(f"Skipping empty fixture {path.name}", file=sys.stderr)
+            continue
+        fixtures.extend(parse_http_file(path))
+    if not fixtures:
+        raise SystemExit(f"No usable .http fixtures in {FIXTURES_DIR}")
+    return fixtures
+
+
+def jitter(value, rng: random.Random, scale: float):
+    """Multiply every number in a JSON value by lognormal noise."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return value * rng.lognormvariate(0, scale) if scale else value
+    if isinstance(value, list):
+        return [jitter(item, rng, scale) for item in value]
+    if isinstance(value, dict):
+        return {key: jitter(item, rng, scale) for key, item in value.items()}
+    return value
+
+
+class RequestFactory:
+    def __init__(
+        self,
+        fixtures: List[HttpRequest],
+        base_url: Optional[str],
+        jitter_scale: float,
+        batch_rows: Optional[int],
+        seed: int = RANDOM_STATE,
+    ):
+        """
+        Build parameterized requests from the fixtures.
+
+        Args:
+            fixtures: Parsed fixture requests
+            base_url: Scheme and host replacing the fixtures' own
+            jitter_scale: Sigma of the lognormal noise on numeric values
+            batch_rows: Resample list bodies to this many rows
+            seed: Random seed, so runs are reproducible
+        """
+        self.fixtures = fixtures
+        self.base_url = base_url
+        self.jitter_scale = jitter_scale
+        self.batch_rows = batch_rows
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _url(self, url: str) -> str:
+        if not self.base_url:
+            return url
+        base = urlsplit(self.base_url)
+        parts = urlsplit(url)
+        return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, ""))
+
+    def build(self, fixture: HttpRequest) -> dict:
+        with self._lock:
+            rng = random.Random(self._rng.random())
+
+        body = None
+        if fixture.body is not None:
+            try:
+                payload = json.loads(fixture.body)
+            except ValueError:
+                body = fixture.body
+            else:
+                if isinstance(payload, list) and self.batch_rows:
+                    payload = [rng.choice(payload) for _ in range(self.batch_rows)]
+                body = json.dumps(jitter(payload, rng, self.jitter_scale))
+
+        return {
+            "method": fixture.method,
+            "url": self._url(fixture.url),
+            "headers": fixture.headers,
+            "data": body,
+        }
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[tuple]] = {}
+
+    def record(self, name: str, latency: float, ok: bool):
+        with self._lock:
+            self.samples.setdefault(name, []).append((latency, ok))
+
+
+_sessions = threading.local()
+
+
+def send(
+    factory: RequestFactory,
+    fixture: HttpRequest,
+    recorder: Recorder,
+    timeout: float,
+    scheduled: Optional[float] = None,
+):
+    """
+    Send one request and record its latency.
+
+    Open-loop latency is measured from the scheduled arrival time, so time
+    spent waiting for a free client counts (no coordinated omission).
+    """
+    session = getattr(_sessions, "session", None)
+    if session is None:
+        session = _sessions.session = requests.Session()
+
+    start = scheduled if scheduled is not None else time.perf_counter()
+    try:
+        response = session.request(timeout=timeout, **factory.build(fixture))
+        ok = response.status_code < 400
+    except requests.RequestException:
+        ok = False
+    recorder.record(fixture.name, time.perf_counter() - start, ok)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> Dict[str, dict]:
+    summary = {}
+    for name, samples in sorted(recorder.samples.items()):
+        latencies = sorted(latency for latency, _ in samples)
+        errors = sum(not ok for _, ok in samples)
+        summary[name] = {
+            "requests": len(samples),
+            "throughput_rps": len(samples) / elapsed if elapsed else 0.0,
+            "error_rate": errors / len(samples),
+            **{
+                f"p{q}_ms": percentile(latencies, q) * 1000 for q in PERCENTILES
+            },
+        }
+    return summary
+
+
+def run_open_loop(
+    factory: RequestFactory,
+    weights: List[float],
+    rate: float,
+    seconds: float,
+    max_in_flight: int,
+    timeout: float,
+    seed: int,
+) -> Dict[str, dict]:
+    """Poisson arrivals at ``rate`` requests/s, independent of response times."""
+    rng = random.Random(seed)
+    recorder = Recorder()
+    futures = []
+
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        start = time.perf_counter()
+        next_arrival = start
+        while next_arrival < start + seconds:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            fixture = rng.choices(factory.fixtures, weights)[0]
+            futures.append(
+                executor.submit(send, factory, fixture, recorder, timeout, next_arrival)
+            )
+            next_arrival += rng.expovariate(rate)
+        wait(futures)
+        elapsed = time.perf_counter() - start
+
+    return summarize(recorder, elapsed)
+
+
+def run_closed_loop(
+    factory: RequestFactory,
+    weights: List[float],
+    concurrency: int,
+    seconds: float,
+    timeout: float,
+    seed: int,
+) -> Dict[str, dict]:
+    """``concurrency`` clients, each sending its next request on a response."""
+    recorder = Recorder()
+    deadline = time.perf_counter() + seconds
+
+    def client(client_seed: int):
+        rng = random.Random(client_seed)
+        while time.perf_counter() < deadline:
+            fixture = rng.choices(factory.fixtures, weights)[0]
+            send(factory, fixture, recorder, timeout)
+
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=client, args=(seed + i,)) for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return summarize(recorder, time.perf_counter() - start)
+
+
+def start_server(
+    port: int, startup_timeout: float, asgi: bool = False
+) -> subprocess.Popen:
+    """
+    Start ``manage.py runserver``, or uvicorn with ``asgi``, on ``port`` and
+    wait until it accepts.
+    """
+    if asgi:
+        command = [
+            sys.executable, "-m", "uvicorn", "ExoXHunter.asgi:application",
+            "--host", "127.0.0.1", "--port", str(port),
+        ]
+    else:
+        command = [
+            sys.executable, "manage.py", "runserver", "--noreload", f"127.0.0.1:{port}"
+        ]
+    server = subprocess.Popen(command, cwd=BASE_DIR)
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited with code {server.returncode}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise SystemExit(f"Server did not start within {startup_timeout}s")
+
+
+def print_stage(label: str, summary: Dict[str, dict]):
+    print(f"\n{label}")
+    print(
+        f"  {'endpoint':<28} {'reqs':>6} {'rps':>8} {'p50_ms':>8} "
+        f"{'p95_ms':>8} {'p99_ms':>8} {'errors':>7}"
+    )
+    for name, stats in summary.items():
+        print(
+            f"  {name:<28} {stats['requests']:>6} {stats['throughput_rps']:>8.1f} "
+            f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} "
+            f"{stats['p99_ms']:>8.1f} {stats['error_rate']:>6.1%}"
+        )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the API from .http fixtures")
+    load = parser.add_mutually_exclusive_group(required=True)
+    load.add_argument(
+        "--rates",
+        type=float,
+        nargs="+",
+        help="Open-loop stages: Poisson arrival rates in requests/s",
+    )
+    load.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        help="Closed-loop stages: numbers of concurrent clients",
+    )
+    parser.add_argument("--stage-seconds", type=float, default=30.0)
+    parser.add_argument(
+        "--fixtures",
+        nargs="+",
+        help="Fixture names to replay (default: all but the write fixtures)",
+    )
+    parser.add_argument(
+        "--include-writes",
+        action="store_true",
+        help=f"Also replay fixtures that write to the database: "
+        f"{', '.join(sorted(WRITE_FIXTURES))}",
+    )
+    parser.add_argument(
+        "--weights",
+        type=float,
+        nargs="+",
+        help="Relative request mix, one weight per fixture in --fixtures order",
+    )
+    parser.add_argument(
+        "--base-url", help="Target instead of the fixtures' host, e.g. http://host:8000"
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.05,
+        help="Sigma of the lognormal noise applied to numeric request values",
+    )
+    parser.add_argument(
+        "--batch-rows", type=int, help="Resample batch request bodies to this many rows"
+    )
+    parser.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=256,
+        help="Open-loop client threads; arrivals beyond this wait for a free one",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--warmup-seconds", type=float, default=5.0)
+    parser.add_argument(
+        "--start-server",
+        action="store_true",
+        help="Start manage.py runserver locally for the duration of the test",
+    )
+    parser.add_argument(
+        "--asgi",
+        action="store_true",
+        help="With --start-server, serve with uvicorn instead of runserver",
+    )
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--seed", type=int, default=RANDOM_STATE)
+    parser.add_argument("--json", type=Path, help="Also write the results here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    fixtures = load_fixtures(args.fixtures, args.include_writes)
+    weights = args.weights or [1.0] * len(fixtures)
+    if len(weights) != len(fixtures):
+        raise SystemExit(f"Expected {len(fixtures)} weights, got {len(weights)}")
+
+    base_url = args.base_url
+    server = None
+    if args.start_server:
+        server = start_server(args.port, startup_timeout=120, asgi=args.asgi)
+        base_url = base_url or f"http://127.0.0.1:{args.port}"
+
+    factory = RequestFactory(fixtures, base_url, args.jitter, args.batch_rows, args.seed)
+    results = {
+        "fixtures": [fixture.name for fixture in fixtures],
+        "weights": weights,
+        "stages": [],
+    }
+    try:
+        if args.warmup_seconds:
+            run_closed_loop(
+                factory, weights, 1, args.warmup_seconds, args.timeout, args.seed
+            )
+
+        stages = (
+            [("rate", rate) for rate in args.rates]
+            if args.rates
+            else [("concurrency", n) for n in args.concurrency]
+        )
+        for i, (kind, level) in enumerate(stages):
+            seed = args.seed + 1000 * (i + 1)
+            if kind == "rate":
+                summary = run_open_loop(
+                    factory,
+                    weights,
+                    level,
+                    args.stage_seconds,
+                    args.max_in_flight,
+                    args.timeout,
+                    seed,
+                )
+                label = f"Open loop, {level:g} req/s for {args.stage_seconds:g}s"
+            else:
+                summary = run_closed_loop(
+                    factory, weights, level, args.stage_seconds, args.timeout, seed
+                )
+                label = f"Closed loop, {level} clients for {args.stage_seconds:g}s"
+            print_stage(label, summary)
+            results["stages"].append({kind: level, "endpoints": summary})
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        args.json.parent.mkdir(parents=True, exist_ok=True)
+        args.json.write_text(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
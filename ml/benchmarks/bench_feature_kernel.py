@@ -0,0 +1,93 @@
+"""
+Benchmark the fused feature kernel against the pandas sanitize/derive chain.
+
+Run from the ``ml`` folder:
+
+    python -m benchmarks.bench_feature_kernel --rows 1000000 5000000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.data.data_preprocessor import DataPreprocessor
+from src.data.feature_kernels import derive_features
+
+RANDOM_STATE = 42
+RAW_COLUMNS = [
+    "period",
+    "duration",
+    "depth",
+    "planet_radius",
+    "star_radius",
+    "snr",
+    "teff",
+    "logg",
+    "semi_major_axis",
+]
+
+
+def make_merged_like(n_rows: int) -> pd.DataFrame:
+    """Log-normal columns with the zeros, negatives and infinities sanitize handles."""
+    rng = np.random.default_rng(RANDOM_STATE)
+    values = rng.lognormal(mean=1.0, sigma=1.5, size=(n_rows, len(RAW_COLUMNS)))
+    special = rng.random(values.shape)
+    values[special < 0.01] = 0
+    values[(special >= 0.01) & (special < 0.02)] *= -1
+    values[(special >= 0.02) & (special < 0.025)] = np.inf
+
+    df = pd.DataFrame(values, columns=RAW_COLUMNS)
+    df["disposition"] = rng.choice(["CONFIRMED", "CANDIDATE", "FALSE POSITIVE"], n_rows)
+    df["source"] = pd.Categorical(rng.choice(["Kepler", "K2", "TESS"], n_rows))
+    return df
+
+
+def pandas_chain(preprocessor: DataPreprocessor, df: pd.DataFrame) -> pd.DataFrame:
+    df = preprocessor.sanitize_dataframe(df)
+    df = preprocessor.add_derived_features(df)
+    return preprocessor.sanitize_dataframe(df)
+
+
+def measured(func, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024**2
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    args = parser.parse_args()
+
+    preprocessor = DataPreprocessor(pd.DataFrame())
+
+    print(
+        f"{'rows':>9} {'pandas_s':>9} {'fused_s':>8} {'speedup':>8} "
+        f"{'pandas_MB':>10} {'fused_MB':>9} {'identical':>9}"
+    )
+    for n_rows in args.rows:
+        df = make_merged_like(n_rows)
+
+        reference, pandas_s, pandas_mb = measured(pandas_chain, preprocessor, df)
+        fused, fused_s, fused_mb = measured(derive_features, df)
+
+        identical = list(reference.columns) == list(fused.columns) and all(
+            np.array_equal(reference[col], fused[col], equal_nan=True)
+            for col in reference.select_dtypes(include=[np.number]).columns
+        )
+        print(
+            f"{n_rows:>9} {pandas_s:>9.2f} {fused_s:>8.2f} "
+            f"{pandas_s / fused_s:>7.1f}x {pandas_mb:>10.0f} {fused_mb:>9.0f} "
+            f"{str(identical):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
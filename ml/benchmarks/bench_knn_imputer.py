@@ -0,0 +1,90 @@
+"""
+Benchmark BlockedKNNImputer against sklearn's KNNImputer across row counts.
+
+Run from the ``ml`` folder:
+
+    python -m benchmarks.bench_knn_imputer --rows 2000 5000 10000 20000 50000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.impute import KNNImputer
+
+from src.data.knn_imputer import (
+    BlockedKNNImputer,
+    EQUIVALENCE_ATOL,
+    EQUIVALENCE_RTOL,
+)
+
+RANDOM_STATE = 42
+
+
+def make_catalog_like(n_rows: int, n_cols: int, missing_ratio: float) -> np.ndarray:
+    """Skewed, correlated columns with values missing at random."""
+    rng = np.random.default_rng(RANDOM_STATE)
+    latent = rng.normal(size=(n_rows, 3))
+    mixing = rng.normal(size=(3, n_cols))
+    X = np.exp(latent @ mixing * 0.5) + rng.normal(scale=0.1, size=(n_rows, n_cols))
+    X[rng.random(X.shape) < missing_ratio] = np.nan
+    return X
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--rows", type=int, nargs="+", default=[2000, 5000, 10000, 20000]
+    )
+    parser.add_argument("--cols", type=int, default=9)
+    parser.add_argument("--missing-ratio", type=float, default=0.15)
+    parser.add_argument(
+        "--sklearn-max-rows",
+        type=int,
+        default=50000,
+        help="Skip the sklearn reference above this many rows",
+    )
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    print(
+        f"{'rows':>8} {'sklearn_s':>10} {'blocked_s':>10} {'speedup':>8} "
+        f"{'max_abs_diff':>13} {'equivalent':>10}"
+    )
+    for n_rows in args.rows:
+        X = make_catalog_like(n_rows, args.cols, args.missing_ratio)
+
+        blocked, blocked_s = timed(
+            BlockedKNNImputer(n_neighbors=5, weights="distance", n_jobs=args.n_jobs)
+            .fit_transform,
+            X,
+        )
+
+        if n_rows > args.sklearn_max_rows:
+            print(
+                f"{n_rows:>8} {'-':>10} {blocked_s:>10.2f} "
+                f"{'-':>8} {'-':>13} {'-':>10}"
+            )
+            continue
+
+        reference, sklearn_s = timed(
+            KNNImputer(n_neighbors=5, weights="distance").fit_transform, X
+        )
+        max_diff = np.max(np.abs(reference - blocked))
+        equivalent = np.allclose(
+            reference, blocked, rtol=EQUIVALENCE_RTOL, atol=EQUIVALENCE_ATOL
+        )
+        print(
+            f"{n_rows:>8} {sklearn_s:>10.2f} {blocked_s:>10.2f} "
+            f"{sklearn_s / blocked_s:>7.1f}x {max_diff:>13.2e} {str(equivalent):>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
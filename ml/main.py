@@ -1,22 +1,197 @@
+import argparse
 import os
+import joblib
 from dotenv import load_dotenv
 from pathlib import Path
 
-from src.data.data_loader_and_merger import ExoPlanetData
-from src.data.data_visualizer import EXODataVisualizer
-from src.data.data_preprocessor import DataPreprocessor
+from src.data.data_loader_and_merger import (
+    ExoPlanetData,
+    TARGET_FEATURES,
+    CATEGORICAL_FEATURES,
+    NUMERIC_DTYPE,
+)
+from src.data.data_visualizer import EXODataVisualizer, VISUALIZATION_MODES
+from src.data.chunked_preprocessor import ChunkedDataPreprocessor
+from src.data.knn_imputer import BlockedKNNImputer, IMPUTER_VERSION
+from src.data.data_preprocessor import (
+    DataPreprocessor,
+    RANDOM_STATE,
+    TRAIN_SIZE,
+    TEST_SIZE,
+    CV_SIZE,
+)
 from src.models.model_trainer import StackedEnsembleTrainer
-from src.models.hyperparameter_tuner import HyperparameterTuner
-from src.utils.common import setup_logger
+from src.models.hyperparameter_tuner import HyperparameterTuner, WARM_START_MODES
+from src.models.incremental_trainer import IncrementalTrainer
+from src.models.ensemble_compressor import EnsembleCompressor
+from src.models.distiller import EnsembleDistiller
+from src.models.input_pipeline import DEFAULT_BATCH_SIZE
+from src.utils.common import apply_log_levels, setup_logger
+from src.utils.step_cache import StepCache, fingerprint, fingerprint_file
+from src.utils.data_io import row_ids, save_model_data
+from src.utils.profiling import RunProfiler
 
 
 load_dotenv()
+apply_log_levels()
 
-LOGGER_FILE_PATH = Path("reports") / "logs" / "Data_loader_merger.log"
+LOGGER_FILE_PATH = Path("reports") / "logs" / "Main.log"
 logger = setup_logger("Main", LOGGER_FILE_PATH)
 
+IMPUTATION_STRATEGY = "knn"
 
-def main():
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Exoplanet classification pipeline")
+    parser.add_argument(
+        "--meta-only",
+        action="store_true",
+        help="Retrain only the meta-model on top of the saved base models, "
+        "reusing cached meta-features when available",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Warm-start the saved models on catalog rows that are new or "
+        "changed since the last merged snapshot",
+    )
+    parser.add_argument(
+        "--resume-from",
+        type=int,
+        choices=[1, 2, 3, 4],
+        default=1,
+        help="Start at this step, loading the outputs of earlier steps from "
+        "their latest cache entry without re-checking the inputs",
+    )
+    parser.add_argument(
+        "--force-step",
+        type=int,
+        choices=[1, 3],
+        default=None,
+        help="Recompute this cached step and every cached step after it, "
+        "even if its inputs are unchanged",
+    )
+    parser.add_argument(
+        "--visualization",
+        choices=VISUALIZATION_MODES + ["skip"],
+        default="fast",
+        help="'full' plots the whole merged frame before preprocessing, 'fast' "
+        "plots a sample in the background while the pipeline continues, "
+        "'skip' does not plot",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help="Batch size for the MLP and the meta-model; their learning rates "
+        "are scaled from the batch size they were tuned at",
+    )
+    parser.add_argument(
+        "--latency-budget-ms",
+        type=float,
+        default=None,
+        help="Tune the tree models for score, prediction latency and model "
+        "size, and train the best-scoring XGBoost and LightGBM pair for which "
+        "the single-row prediction latency of the ensemble fits in this many "
+        "milliseconds. The budget covers both tree models plus the measured "
+        "MLP and meta-model, but not feature scaling or request handling",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="After training, write a compressed copy of the ensemble (fewer "
+        "boosting rounds and features) to models/compressed with a report",
+    )
+    parser.add_argument(
+        "--distill",
+        action="store_true",
+        help="After training, distil the ensemble into a single LightGBM "
+        "student served as the API's fast tier",
+    )
+    parser.add_argument(
+        "--tuning-trials",
+        type=int,
+        default=100,
+        help="Optuna trials per tree model",
+    )
+    parser.add_argument(
+        "--warm-start",
+        choices=WARM_START_MODES,
+        default=None,
+        help="Seed the tuning studies from the previous run's studies when "
+        "the features are unchanged: 'trials' reuses their results, "
+        "'enqueue' re-evaluates their best configurations first",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=None,
+        help="Preprocess the merged data out of core, streaming it from disk "
+        "in blocks of this many rows. Rows are split by a hash of their "
+        "content instead of stratified, so the splits differ from an "
+        "in-memory run",
+    )
+    parser.add_argument(
+        "--profile-loads",
+        action="store_true",
+        help="Load the mission catalogs one at a time instead of in parallel, "
+        "so the run report records each catalog's peak memory",
+    )
+    return parser.parse_args(argv)
+
+
+def run_incremental(
+    data_loader: ExoPlanetData,
+    processed_data_folder,
+    models_folder,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+):
+    previous_df = data_loader.load_merged_data()
+    df = data_loader.merge_data(save=False)
+    if df is None or df.empty:
+        logger.error("Failed to load and merge data.")
+        return
+
+    new_rows = data_loader.select_new_rows(df, previous_df)
+    if new_rows.empty:
+        logger.info("No new or changed rows. Models are up to date.")
+        return
+
+    model_data = DataPreprocessor.load_data(processed_data_folder)
+    X_new, y_new = DataPreprocessor(dataframe=new_rows).prepare_incremental_rows(
+        model_data.X_train
+    )
+    if X_new.empty:
+        logger.info("No new rows with a valid disposition. Models are up to date.")
+        return
+
+    # Previous versions of changed rows, and rows gone from the catalog.
+    stale_row_ids = None
+    if previous_df is not None:
+        stale_row_ids = row_ids(data_loader.select_new_rows(previous_df, df))
+    results = IncrementalTrainer(
+        model_data=model_data,
+        X_new=X_new,
+        y_new=y_new,
+        model_folder=models_folder,
+        batch_size=batch_size,
+        data_folder=processed_data_folder,
+        new_row_ids=row_ids(new_rows).loc[X_new.index],
+        stale_row_ids=stale_row_ids,
+    ).run()
+
+    if results["promoted"]:
+        data_loader.save_merged_data(df)
+
+    logger.info(
+        f"Incremental update {'promoted' if results['promoted'] else 'rejected'}: "
+        f"test accuracy {results['baseline_accuracy']:.4f} -> "
+        f"{results['candidate_accuracy']:.4f}"
+    )
+    return results
+
+
+def run_pipeline(args: argparse.Namespace, profiler: RunProfiler):
     logger.info("EXOPLANET CLASSIFICATION PIPELINE - NASA SPACE APPS COMPETITION")
 
     models_folder = Path("models")
@@ -34,41 +209,184 @@ def main():
         tess_path=tess_path,
         data_folder=processed_data_folder,
     )
-    df = data_loader.merge_data()
+    if args.incremental:
+        with profiler.step("incremental"):
+            return run_incremental(
+                data_loader, processed_data_folder, models_folder, args.batch_size
+            )
+
+    step_cache = StepCache(data_folder / "cache")
+    force_step = args.force_step or float("inf")
+
+    with profiler.step("load_merge") as step:
+        if args.resume_from > 1:
+            merge_key, df = step_cache.load_latest("merge")
+            logger.info(f"Resumed merged data from cache ({merge_key})")
+        else:
+            merge_key = fingerprint(
+                sources={
+                    "kepler": fingerprint_file(kepler_path),
+                    "k2": fingerprint_file(k2_path),
+                    "tess": fingerprint_file(tess_path),
+                },
+                target_features=TARGET_FEATURES,
+                categorical_features=CATEGORICAL_FEATURES,
+                numeric_dtype=NUMERIC_DTYPE,
+            )
+            df = step_cache.load("merge", merge_key) if force_step > 1 else None
+            if df is None:
+                df = data_loader.merge_data(
+                    profiler=profiler if args.profile_loads else None
+                )
+                if df is not None and not df.empty:
+                    step_cache.save("merge", merge_key, df)
+
+        step["rows"] = None if df is None else len(df)
+
     if df is None or df.empty:
         logger.error("Failed to load and merge data.")
         return
 
-    logger.info("\n[STEP 2/5] Generating visualizations...")
-    try:
-        data_visualizer = EXODataVisualizer(df)
-        data_visualizer.visualize_data()
-        logger.info(f"Visualizations saved to: reports/figures/")
-    except Exception as e:
-        logger.warning(f"Visualization failed: {e}. Continuing")
+    data_visualizer = None
+    if args.resume_from <= 2 and args.visualization != "skip":
+        logger.info("\n[STEP 2/5] Generating visualizations...")
+        with profiler.step("visualize", rows=len(df)):
+            try:
+                data_visualizer = EXODataVisualizer(df, mode=args.visualization)
+                data_visualizer.visualize_data()
+                logger.info(f"Visualizations saved to: reports/figures/")
+            except Exception as e:
+                logger.warning(f"Visualization failed: {e}. Continuing")
 
     logger.info("\n[STEP 3/5] Preprocessing data...")
-    data_preprocessor = DataPreprocessor(
-        dataframe=df, data_folder=processed_data_folder, imputation_strategy="knn"
-    )
-    model_data = data_preprocessor.processing_pipeline()
+    with profiler.step("preprocess", rows=len(df)):
+        if args.resume_from > 3:
+            preprocess_key, preprocessed = step_cache.load_latest("preprocess")
+            logger.info(f"Resumed processed splits from cache ({preprocess_key})")
+            cache_hit = True
+        else:
+            preprocess_key = fingerprint(
+                outputs=["model_data", "imputation_state"],
+                merge=merge_key,
+                imputation_strategy=IMPUTATION_STRATEGY,
+                imputer=f"{BlockedKNNImputer.__name__}/{IMPUTER_VERSION}",
+                target_features=TARGET_FEATURES,
+                split_sizes=[TRAIN_SIZE, TEST_SIZE, CV_SIZE],
+                random_state=RANDOM_STATE,
+                chunk_size=args.chunk_size,
+            )
+            preprocessed = (
+                step_cache.load("preprocess", preprocess_key)
+                if force_step > 3
+                else None
+            )
+            cache_hit = preprocessed is not None
+            if preprocessed is None:
+                if args.chunk_size:
+                    # A snapshot this run did not write may hold other data;
+                    # merged data resumed from the cache is written out first.
+                    merged_path = data_loader.merged_path or (
+                        data_loader.save_merged_data(df)
+                    )
+                    if merged_path is None:
+                        logger.error("Failed to save merged data for chunking.")
+                        return
+                    # The chunks are streamed from the snapshot; holding the
+                    # merged frame as well would defeat the point.
+                    del df
+                    data_preprocessor = ChunkedDataPreprocessor(
+                        merged_path=merged_path,
+                        data_folder=processed_data_folder,
+                        imputation_strategy=IMPUTATION_STRATEGY,
+                        chunk_size=args.chunk_size,
+                    )
+                    data_preprocessor.processing_pipeline()
+                    # Training needs the splits in memory.
+                    model_data = DataPreprocessor.load_data(processed_data_folder)
+                else:
+                    data_preprocessor = DataPreprocessor(
+                        dataframe=df,
+                        data_folder=processed_data_folder,
+                        imputation_strategy=IMPUTATION_STRATEGY,
+                    )
+                    model_data = data_preprocessor.processing_pipeline()
+                preprocessed = {
+                    "model_data": model_data,
+                    "imputation_state": data_preprocessor.get_imputation_state(),
+                }
+                step_cache.save("preprocess", preprocess_key, preprocessed)
+        if cache_hit:
+            # The split files may be left over from a run with other inputs,
+            # and --incremental reads them back.
+            save_model_data(preprocessed["model_data"], processed_data_folder)
+
+    model_data = preprocessed["model_data"]
+    imputation_state = preprocessed["imputation_state"]
 
     logger.info("\n[STEP 4/5] Training stacked ensemble model...")
     logger.info("Base models: XGBoost + LightGBM + MLP")
     logger.info("Meta-model: Neural Network")
 
-    tuner = HyperparameterTuner(model_data=model_data, save_folder=optimization_folder)
+    if args.meta_only:
+        # Only used when the saved models predate recording their parameters
+        # in ensemble_info.
+        summary_path = optimization_folder / "optimization_summary.pkl"
+        trainer = StackedEnsembleTrainer(
+            model_data=model_data,
+            save_folder=models_folder,
+            optimized_params=(
+                joblib.load(summary_path) if summary_path.exists() else None
+            ),
+            oof_folds=5,
+            profiler=profiler,
+            batch_size=args.batch_size,
+        )
+        results = trainer.retrain_meta_model()
+    else:
+        tuner = HyperparameterTuner(
+            model_data=model_data,
+            save_folder=optimization_folder,
+            profiler=profiler,
+            multi_objective=args.latency_budget_ms is not None,
+            warm_start=args.warm_start,
+        )
 
-    optimization_summary = tuner.optimize_all(xgb_trials=100, lgb_trials=100)
-    logger.info("Optimization complete")
+        optimization_summary = tuner.optimize_all(
+            xgb_trials=args.tuning_trials, lgb_trials=args.tuning_trials
+        )
+        logger.info("Optimization complete")
 
-    trainer = StackedEnsembleTrainer(
-        model_data=model_data,
-        save_folder=models_folder,
-        optimized_params=optimization_summary,
-    )
+        trainer = StackedEnsembleTrainer(
+            model_data=model_data,
+            save_folder=models_folder,
+            optimized_params=optimization_summary,
+            parallel=True,
+            oof_folds=5,
+            imputation_state=imputation_state,
+            profiler=profiler,
+            batch_size=args.batch_size,
+            latency_budget_ms=args.latency_budget_ms,
+        )
+
+        results = trainer.train_pipeline()
 
-    results = trainer.train_pipeline()
+        if args.compress:
+            with profiler.step("compress", rows=len(model_data.y_train)):
+                compression = EnsembleCompressor(
+                    model_data=model_data,
+                    model_folder=models_folder,
+                    oof_folds=5,
+                    parallel=True,
+                    batch_size=args.batch_size,
+                ).run()
+            results["compression"] = compression
+
+        if args.distill:
+            with profiler.step("distill", rows=len(model_data.y_train)):
+                student_info = EnsembleDistiller(
+                    model_data=model_data, model_folder=models_folder
+                ).run()
+            results["distillation"] = student_info["agreement"]
 
     logger.info("\n[STEP 5/5] Final Results")
     logger.info("=" * 80)
@@ -77,6 +395,10 @@ def main():
     logger.info(f"\nClassification Report:\n{results['classification_report']}")
     logger.info(f"\nConfusion Matrix:\n{results['confusion_matrix']}")
 
+    if data_visualizer is not None:
+        with profiler.step("visualize_wait"):
+            data_visualizer.wait()
+
     logger.info("\n" + "=" * 80)
     logger.info("PIPELINE COMPLETE!")
 
@@ -89,9 +411,19 @@ def main():
     return results
 
 
+def main(args: argparse.Namespace = None):
+    args = args if args is not None else parse_args([])
+
+    profiler = RunProfiler()
+    try:
+        return run_pipeline(args, profiler)
+    finally:
+        profiler.save()
+
+
 if __name__ == "__main__":
     try:
-        main()
+        main(parse_args())
         print("Pipeline Executed")
     except Exception as e:
         logger.error(f"Pipeline failed with error: {e}", exc_info=True)
@@ -0,0 +1,279 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+
+from ..utils.common import setup_logger
+from ..utils.data_io import DEFAULT_FORMAT, FrameWriter, iter_frames, row_ids
+from .data_preprocessor import (
+    DataPreprocessor,
+    RANDOM_STATE,
+    TRAIN_SIZE,
+    TEST_SIZE,
+    CV_SIZE,
+)
+from .knn_imputer import BlockedKNNImputer
+
+LOGGER_FILE_PATH = Path("reports") / "logs" / "Chunked_preprocessor.log"
+logger = setup_logger("ChunkedPreprocessor", LOGGER_FILE_PATH)
+
+DEFAULT_CHUNK_SIZE = 250_000
+DEFAULT_SAMPLE_SIZE = 200_000
+# Same cut-off as DataPreprocessor.handle_missing_values.
+MAX_MISSING_RATIO = 0.8
+
+SPLITS = ["train", "test", "cv"]
+
+
+class ChunkedDataPreprocessor(DataPreprocessor):
+    """
+    Out-of-core variant of ``DataPreprocessor`` for merged catalogs that do
+    not fit in memory.
+
+    The merged file is streamed twice in blocks of ``chunk_size`` rows. The
+    first pass collects what needs the whole dataset: per-column missing
+    counts, category and class counts, and a uniform sample of
+    ``sample_size`` rows of the numeric columns whose medians (and, for KNN,
+    donor rows) drive the imputation. The second pass sanitizes, imputes and
+    derives features block by block and appends each block to the split
+    files, so memory is bounded by ``chunk_size`` and ``sample_size`` instead
+    of by the catalog size. On catalogs no larger than the sample, medians and
+    KNN donors are the same as in memory.
+
+    Rows are assigned to train/test/CV by a seeded hash of their content. This
+    keeps the split proportions per class in expectation rather than exactly,
+    as the stratified in-memory split does, and sends duplicate rows to the
+    same split.
+    """
+
+    def __init__(
+        self,
+        merged_path: Path,
+        data_folder: Path,
+        imputation_strategy: str = "knn",
+        file_format: str = DEFAULT_FORMAT,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+    ):
+        # No frame is held in memory; the merged data is read from disk.
+        super().__init__(
+            pd.DataFrame(),
+            data_folder=data_folder,
+            imputation_strategy=imputation_strategy,
+            file_format=file_format,
+        )
+        self.merged_path = Path(merged_path)
+        self.chunk_size = chunk_size
+        self.sample_size = sample_size
+
+        self.columns_to_keep = []
+        self.categorical_fill_values = None
+        self.n_rows = 0
+
+    def _chunks(self):
+        return iter_frames(self.merged_path, self.chunk_size)
+
+    def _clean_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        return self.sanitize_dataframe(self._filter_valid_labels(chunk))
+
+    def _update_sample(
+        self, sample: np.ndarray, values: np.ndarray, rng: np.random.Generator
+    ) -> np.ndarray:
+        """Reservoir sampling (Algorithm R), vectorized over one block."""
+        n_filled = min(self.n_rows, self.sample_size)
+        n_fill = min(len(values), self.sample_size - n_filled)
+        if n_fill:
+            sample = np.vstack([sample, values[:n_fill]])
+
+        rest = values[n_fill:]
+        if len(rest):
+            seen = self.n_rows + n_fill + np.arange(len(rest))
+            slots = rng.integers(0, seen + 1)
+            keep = slots < self.sample_size
+            sample[slots[keep]] = rest[keep]
+        return sample
+
+    def collect_statistics(self) -> np.ndarray:
+        """
+        First pass: decide the kept columns and fit the imputation from
+        whole-dataset counts and the row sample. Returns the sample.
+        """
+        rng = np.random.default_rng(RANDOM_STATE)
+        missing_counts = None
+        category_counts = {}
+        class_counts = pd.Series(dtype=np.int64)
+        sample = None
+        numeric_cols = []
+
+        for chunk in self._chunks():
+            chunk = self._clean_chunk(chunk)
+            if missing_counts is None:
+                numeric_cols = [
+                    col
+                    for col in chunk.select_dtypes(include=[np.number]).columns
+                    if col != "disposition"
+                ]
+                missing_counts = pd.Series(0, index=chunk.columns, dtype=np.int64)
+                sample = np.empty((0, len(numeric_cols)))
+
+            missing_counts += chunk.isnull().sum()
+            class_counts = class_counts.add(
+                chunk["disposition"].value_counts(), fill_value=0
+            )
+            for col in chunk.columns.difference(numeric_cols + ["disposition"]):
+                category_counts[col] = (
+                    category_counts.get(col, pd.Series(dtype=np.int64))
+                    .add(chunk[col].value_counts(), fill_value=0)
+                )
+
+            sample = self._update_sample(
+                sample, chunk[numeric_cols].to_numpy(dtype=np.float64), rng
+            )
+            self.n_rows += len(chunk)
+
+        if not self.n_rows:
+            raise ValueError(f"No rows with a valid disposition in {self.merged_path}")
+
+        missing_ratio = missing_counts / self.n_rows
+        self.columns_to_keep = missing_ratio[
+            missing_ratio < MAX_MISSING_RATIO
+        ].index.tolist()
+        kept_numeric = [
+            i for i, col in enumerate(numeric_cols) if col in self.columns_to_keep
+        ]
+        sample = sample[:, kept_numeric]
+
+        self.numeric_columns = [numeric_cols[i] for i in kept_numeric]
+        self.categorical_columns = [
+            col for col in category_counts if col in self.columns_to_keep
+        ]
+        with np.errstate(all="ignore"):
+            self.numeric_fill_values = np.nanmedian(sample, axis=0)
+        # Ties go to the smallest value, like SimpleImputer(most_frequent).
+        self.categorical_fill_values = [
+            category_counts[col].sort_index().idxmax()
+            for col in self.categorical_columns
+        ]
+
+        if self.numeric_columns and self.imputation_strategy.startswith("knn"):
+            self.numeric_imputer = BlockedKNNImputer(
+                n_neighbors=5, weights="distance", n_jobs=-1
+            ).fit(sample)
+
+        logger.info(
+            f"Pass 1: {self.n_rows} rows, {len(sample)} sampled, "
+            f"kept {len(self.columns_to_keep)}/{len(missing_ratio)} columns"
+        )
+        logger.info(f"Class counts: {class_counts.astype(int).to_dict()}")
+        return sample
+
+    def handle_missing_values(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        """Impute one block with the statistics from ``collect_statistics``."""
+        dataframe = dataframe[self.columns_to_keep].copy()
+
+        if self.numeric_columns:
+            fill_values = pd.Series(self.numeric_fill_values, index=self.numeric_columns)
+            numeric = dataframe[self.numeric_columns]
+            if self.numeric_imputer is not None:
+                numeric = pd.DataFrame(
+                    self.numeric_imputer.transform(numeric),
+                    index=numeric.index,
+                    columns=self.numeric_columns,
+                )
+            dataframe[self.numeric_columns] = numeric.fillna(fill_values)
+
+        for col, value in zip(self.categorical_columns, self.categorical_fill_values):
+            dataframe[col] = dataframe[col].fillna(value)
+
+        return dataframe
+
+    @staticmethod
+    def assign_splits(
+        dataframe: pd.DataFrame,
+        train_size: float = TRAIN_SIZE,
+        test_size: float = TEST_SIZE,
+        cv_size: float = CV_SIZE,
+    ) -> np.ndarray:
+        """Split name of every row, from a seeded hash of the row's values."""
+        assert (
+            abs(train_size + test_size + cv_size - 1.0) < 1e-6
+        ), "Train, test, and CV sizes must sum to 1.0"
+
+        hashes = pd.util.hash_pandas_object(
+            dataframe, index=False, hash_key=f"{RANDOM_STATE:016d}"
+        ).to_numpy()
+        uniform = (hashes >> np.uint64(11)) / float(1 << 53)
+        return np.select(
+            [uniform < train_size, uniform < train_size + test_size],
+            SPLITS[:2],
+            default=SPLITS[2],
+        )
+
+    def processing_pipeline(self) -> dict[str, Path]:
+        """
+        Write the train/test/CV splits to ``data_folder`` and return their
+        paths, keyed like the ``save_model_data`` files (``"X_train"``,
+        ``"y_cv"``, ...). The splits are not read back: load them with
+        ``load_data`` when they fit in memory, or stream them with
+        ``iter_frames``.
+        """
+        self.collect_statistics()
+
+        self.data_folder.mkdir(parents=True, exist_ok=True)
+        writers = {
+            f"{prefix}_{split}": FrameWriter(
+                self.data_folder / f"{prefix}_{split}.{self.file_format}"
+            )
+            for prefix in ["X", "y", "row_ids"]
+            for split in SPLITS
+        }
+        class_counts = {split: pd.Series(dtype=np.int64) for split in SPLITS}
+
+        try:
+            for i, chunk in enumerate(self._chunks()):
+                ids = row_ids(chunk)
+                chunk = self._filter_valid_labels(chunk)
+                ids = ids[chunk.index]
+                assignment = self.assign_splits(chunk)
+
+                chunk = self.sanitize_dataframe(chunk)
+                chunk = self.handle_missing_values(chunk)
+                chunk = self.derive_and_sanitize(chunk)
+
+                y = self._encode_target_variable(chunk["disposition"]).astype(np.int64)
+                X = chunk.drop(columns=["disposition", "source"], errors="ignore")
+                # Other categorical columns are not model features.
+                X = X.select_dtypes(include=[np.number]).astype(np.float64)
+
+                for split in SPLITS:
+                    in_split = assignment == split
+                    # The first block opens every file, even with no rows.
+                    if i == 0 or in_split.any():
+                        writers[f"X_{split}"].write(X[in_split])
+                        writers[f"y_{split}"].write(y[in_split].to_frame())
+                        writers[f"row_ids_{split}"].write(
+                            ids[in_split].to_frame()
+                        )
+                    class_counts[split] = class_counts[split].add(
+                        y[in_split].value_counts(), fill_value=0
+                    )
+                logger.info(f"Pass 2: wrote block {i} ({len(chunk)} rows)")
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        for split in SPLITS:
+            logger.info(
+                f"Split {split}: {writers[f'X_{split}'].n_rows} rows, class "
+                f"distribution {class_counts[split].astype(int).to_dict()}"
+            )
+        logger.info("Chunked preprocessing pipeline complete!")
+
+        return {name: writer.path for name, writer in writers.items()}
+
+    def get_imputation_state(self) -> dict:
+        state = super().get_imputation_state()
+        state["categorical_fill_values"] = self.categorical_fill_values
+        return state
+
+
+__all__ = ["ChunkedDataPreprocessor", "DEFAULT_CHUNK_SIZE", "DEFAULT_SAMPLE_SIZE"]
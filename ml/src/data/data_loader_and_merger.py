@@ -1,7 +1,19 @@
 import pandas as pd
+import numpy as np
 from pathlib import Path
 from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+import time
+
 from ..utils.common import setup_logger
+from ..utils.profiling import RunProfiler
+from ..utils.data_io import (
+    DEFAULT_FORMAT,
+    find_frame,
+    read_frame,
+    row_ids,
+    write_frame,
+)
 
 
 LOGGER_FILE_PATH = Path("reports") / "logs" / "Data_loader_merger.log"
@@ -36,6 +48,10 @@ TARGET_FEATURES = {
     "semi_major_axis": ["sma", "koi_sma", "pl_orbsmax", "pl_orbsma"],
 }
 
+# Everything in TARGET_FEATURES that is not listed here is read as float32.
+CATEGORICAL_FEATURES = ["disposition"]
+NUMERIC_DTYPE = np.float32
+
 
 class ExoPlanetData:
     def __init__(
@@ -44,17 +60,71 @@ class ExoPlanetData:
         k2_path,
         tess_path,
         data_folder: Optional[Path] = None,
+        file_format: str = DEFAULT_FORMAT,
     ):
         self.kepler_path = kepler_path
         self.k2_path = k2_path
         self.tess_path = tess_path
         self.data_folder = data_folder
+        self.file_format = file_format
+        self.load_stats = {}
+        # Snapshot written by this instance, if any.
+        self.merged_path = None
+
+    @staticmethod
+    def resolve_columns(header: list[str]) -> dict[str, str]:
+        """
+        Map the raw catalog columns to their standard names, using the first
+        alias of each ``TARGET_FEATURES`` entry found in ``header``.
+        """
+        rename_map = {}
+        for standard_name, potential_names in TARGET_FEATURES.items():
+            for potential_name in potential_names:
+                if potential_name in header and potential_name not in rename_map:
+                    rename_map[potential_name] = standard_name
+                    break
+        return rename_map
+
+    @staticmethod
+    def _column_dtypes(rename_map: dict[str, str]) -> dict[str, object]:
+        return {
+            raw_name: "category"
+            if standard_name in CATEGORICAL_FEATURES
+            else NUMERIC_DTYPE
+            for raw_name, standard_name in rename_map.items()
+        }
 
     def load_data(self, path) -> pd.DataFrame:
+        """
+        Load one mission catalog, reading only the columns that resolve to a
+        ``TARGET_FEATURES`` name, with float32 numeric and categorical dtypes.
+        """
         try:
-            df = pd.read_csv(path, comment="#")
-            logger.info(f"Successfully loaded data from {path} with shape {df.shape}")
-            return self._standardize_data(df)
+            header = pd.read_csv(path, comment="#", nrows=0).columns.tolist()
+            rename_map = self.resolve_columns(header)
+            dtypes = self._column_dtypes(rename_map)
+
+            try:
+                df = pd.read_csv(
+                    path, comment="#", usecols=list(rename_map), dtype=dtypes
+                )
+            except ValueError as e:
+                # A numeric column holding stray text; parse it leniently.
+                logger.warning(f"Strict dtypes failed for {path} ({e}); coercing")
+                df = pd.read_csv(path, comment="#", usecols=list(rename_map))
+                for column, dtype in dtypes.items():
+                    if dtype == "category":
+                        df[column] = df[column].astype("category")
+                    else:
+                        df[column] = pd.to_numeric(
+                            df[column], errors="coerce"
+                        ).astype(dtype)
+
+            logger.info(
+                f"Successfully loaded data from {path} with shape {df.shape} "
+                f"({len(rename_map)} of {len(header)} columns read)"
+            )
+            return self._standardize_data(df, rename_map)
         except FileNotFoundError:
             logger.error(f"File not found: {path}. Skipping this source")
         except Exception as e:
@@ -62,13 +132,11 @@ class ExoPlanetData:
             return None
 
     @staticmethod
-    def _standardize_data(df: pd.DataFrame) -> pd.DataFrame:
-        rename_map = {}
-        for standard_name, potential_names in TARGET_FEATURES.items():
-            for potential_name in potential_names:
-                if potential_name in df.columns:
-                    rename_map[potential_name] = standard_name
-                    break
+    def _standardize_data(
+        df: pd.DataFrame, rename_map: Optional[dict[str, str]] = None
+    ) -> pd.DataFrame:
+        if rename_map is None:
+            rename_map = ExoPlanetData.resolve_columns(df.columns.tolist())
 
         df_renamed = df.rename(columns=rename_map)
         final_cols = [
@@ -76,7 +144,40 @@ class ExoPlanetData:
         ]
         return df_renamed[final_cols]
 
-    def merge_data(self) -> pd.DataFrame:
+    def _load_source(
+        self, source_name: str, path
+    ) -> tuple[str, Optional[pd.DataFrame], dict]:
+        start = time.perf_counter()
+        df = self.load_data(path)
+        stats = {
+            "seconds": time.perf_counter() - start,
+            "rows": 0 if df is None else len(df),
+            "frame_mb": 0.0
+            if df is None
+            else float(df.memory_usage(deep=True).sum()) / 1024**2,
+        }
+        return source_name, df, stats
+
+    def _profile_source(
+        self, profiler: RunProfiler, source_name: str, path
+    ) -> tuple[str, Optional[pd.DataFrame], dict]:
+        with profiler.step(f"load_{source_name.lower()}") as step:
+            result = self._load_source(source_name, path)
+            step["rows"] = result[2]["rows"]
+        result[2]["peak_rss_mb"] = profiler.steps[-1]["peak_rss_mb"]
+        return result
+
+    def merge_data(
+        self, save: bool = True, profiler: Optional[RunProfiler] = None
+    ) -> pd.DataFrame:
+        """
+        Load the three mission catalogs and concatenate them.
+
+        The sources are read in parallel. With a ``profiler`` they are read
+        one at a time instead, each as its own profiler step, so that the
+        peak RSS recorded for a step (``peak_rss_mb`` in ``load_stats``)
+        belongs to that source alone.
+        """
         dataframes_to_merge = []
         sources = {
             "Kepler": self.kepler_path,
@@ -84,8 +185,30 @@ class ExoPlanetData:
             "TESS": self.tess_path,
         }
 
-        for source_name, path in sources.items():
-            df = self.load_data(path)
+        if profiler is not None:
+            results = [
+                self._profile_source(profiler, *item) for item in sources.items()
+            ]
+        else:
+            with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+                results = list(
+                    executor.map(
+                        lambda item: self._load_source(*item), sources.items()
+                    )
+                )
+
+        self.load_stats = {}
+        for source_name, df, stats in results:
+            self.load_stats[source_name] = stats
+            logger.info(
+                f"{source_name}: {stats['rows']} rows in {stats['seconds']:.2f}s, "
+                f"{stats['frame_mb']:.2f} MB frame"
+                + (
+                    f", peak RSS {stats['peak_rss_mb']:.0f} MB"
+                    if stats.get("peak_rss_mb") is not None
+                    else ""
+                )
+            )
             if df is not None and not df.empty:
                 df["source"] = source_name
                 dataframes_to_merge.append(df)
@@ -97,17 +220,63 @@ class ExoPlanetData:
             return None
 
         merged_df = pd.concat(dataframes_to_merge, ignore_index=True, sort=False)
+        # Categories differ between missions, which makes concat fall back
+        # to object columns.
+        for column in CATEGORICAL_FEATURES + ["source"]:
+            if column in merged_df.columns:
+                merged_df[column] = merged_df[column].astype("category")
         logger.info(f"Merging complete. Final DataFrame shape: {merged_df.shape}")
 
-        if self.data_folder:
-            output_path = self.data_folder / "Merged_data.csv"
-            try:
-                output_path.parent.mkdir(parents=True, exist_ok=True)
-                merged_df.to_csv(output_path, index=False)
-                logger.info(f"Successfully saved merged data to {output_path}")
-            except Exception as e:
-                logger.error(f"Failed to save merged data to {output_path}: {e}")
+        if save:
+            self.save_merged_data(merged_df)
         return merged_df
 
+    def save_merged_data(self, merged_df: pd.DataFrame) -> Optional[Path]:
+        """Write the merged snapshot and return its path, or None if not saved."""
+        if not self.data_folder:
+            return None
+
+        output_path = self.data_folder / f"Merged_data.{self.file_format}"
+        try:
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            write_frame(merged_df, output_path)
+            logger.info(f"Successfully saved merged data to {output_path}")
+        except Exception as e:
+            logger.error(f"Failed to save merged data to {output_path}: {e}")
+            return None
+        self.merged_path = output_path
+        return output_path
+
+    def load_merged_data(self) -> Optional[pd.DataFrame]:
+        """Load the merged snapshot written by the previous ``merge_data`` run."""
+        if not self.data_folder:
+            return None
+
+        path = find_frame(self.data_folder, "Merged_data")
+        if path is None:
+            logger.warning(f"No previous merged data found in {self.data_folder}")
+            return None
+        return read_frame(path)
+
+    @staticmethod
+    def select_new_rows(
+        current_df: pd.DataFrame, previous_df: Optional[pd.DataFrame]
+    ) -> pd.DataFrame:
+        """Rows of ``current_df`` that are new or changed since ``previous_df``."""
+        if previous_df is None:
+            return current_df
+
+        # Ids ignore dtypes, so a snapshot from an older run (e.g. a float64
+        # CSV) matches the compact frame the loader reads now.
+        columns = [col for col in current_df.columns if col in previous_df.columns]
+        previous_ids = set(row_ids(previous_df[columns]))
+        current_ids = row_ids(current_df[columns])
+        new_rows = current_df[~current_ids.isin(previous_ids).to_numpy()]
+
+        logger.info(
+            f"Found {len(new_rows)} new or changed rows out of {len(current_df)}"
+        )
+        return new_rows
+
 
 __all__ = ["ExoPlanetData"]
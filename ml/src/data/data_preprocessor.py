@@ -8,9 +8,20 @@ from pathlib import Path
 
 from dataclasses import dataclass
 from ..utils.entity import Disposition, ModelData
-from ..utils.common import setup_logger
+from .knn_imputer import BlockedKNNImputer
+from .feature_kernels import derive_features
+from ..utils.common import Lazy, setup_logger
+from ..utils.data_io import (
+    DEFAULT_FORMAT,
+    load_model_data,
+    row_ids,
+    save_model_data,
+)
 
 RANDOM_STATE = 42
+TRAIN_SIZE = 0.7
+TEST_SIZE = 0.15
+CV_SIZE = 0.15
 
 LOGGER_FILE_PATH = Path("reports") / "logs" / "Data_preprocessor.log"
 logger = setup_logger("DataPreprocessor", LOGGER_FILE_PATH)
@@ -22,16 +33,25 @@ class DataPreprocessor:
         dataframe: pd.DataFrame,
         data_folder: Optional[Path] = None,
         imputation_strategy: str = "knn",
+        file_format: str = DEFAULT_FORMAT,
+        fused_features: bool = True,
     ):
-        self.df = dataframe.copy()
+        self.df = dataframe
         self.data_folder = data_folder
         self.imputation_strategy = imputation_strategy
+        self.file_format = file_format
+        self.fused_features = fused_features
         self.numeric_imputer = None
         self.categorical_imputer = None
+        self.numeric_columns = []
+        self.categorical_columns = []
+        self.numeric_fill_values = None
 
     def handle_missing_values(self, dataframe: pd.DataFrame) -> pd.DataFrame:
         logger.info(f"Initial shape: {dataframe.shape}")
-        logger.info(f"Missing values per column:\n{dataframe.isnull().sum()}")
+        logger.debug(
+            "Missing values per column:\n%s", Lazy(lambda: dataframe.isnull().sum())
+        )
 
         missing_ratio = dataframe.isnull().sum() / len(dataframe)
         columns_to_keep = missing_ratio[missing_ratio < 0.8].index
@@ -49,8 +69,17 @@ class DataPreprocessor:
         dataframe = dataframe.dropna(subset=["disposition"])
         logger.info(f"After removing rows with missing target: {dataframe.shape}")
 
+        self.numeric_columns = numeric_cols
+        self.categorical_columns = categorical_cols
+
         if numeric_cols:
+            self.numeric_fill_values = dataframe[numeric_cols].median().to_numpy()
+
             if self.imputation_strategy == "knn":
+                self.numeric_imputer = BlockedKNNImputer(
+                    n_neighbors=5, weights="distance", n_jobs=-1
+                )
+            elif self.imputation_strategy == "knn_sklearn":
                 self.numeric_imputer = KNNImputer(n_neighbors=5, weights="distance")
             else:
                 self.numeric_imputer = SimpleImputer(strategy="median")
@@ -77,10 +106,39 @@ class DataPreprocessor:
             logger.info("Applied mode imputation for categorical columns")
 
         logger.info(f"Final shape after imputation: {dataframe.shape}")
-        logger.info(f"Remaining missing values: {dataframe.isnull().sum().sum()}")
+        logger.debug(
+            "Remaining missing values: %s", Lazy(lambda: dataframe.isnull().sum().sum())
+        )
 
         return dataframe
 
+    def get_imputation_state(self) -> dict:
+        """
+        Compact, picklable summary of the fitted imputers for inference time.
+
+        Holds the per-column medians for every strategy, the categorical fill
+        values, and for KNN the neighbour count, so that serving can impute
+        the same way against a donor pool drawn from the training matrix.
+        """
+        state = {
+            "strategy": self.imputation_strategy,
+            "numeric_columns": list(self.numeric_columns),
+            "numeric_fill_values": self.numeric_fill_values,
+            "categorical_columns": list(self.categorical_columns),
+            "categorical_fill_values": None,
+            "n_neighbors": None,
+        }
+
+        if self.categorical_imputer is not None:
+            state["categorical_fill_values"] = list(
+                self.categorical_imputer.statistics_
+            )
+
+        if isinstance(self.numeric_imputer, (BlockedKNNImputer, KNNImputer)):
+            state["n_neighbors"] = self.numeric_imputer.n_neighbors
+
+        return state
+
     def _encode_target_variable(self, y: pd.Series) -> pd.Series:
         mapping = {
             "CONFIRMED": Disposition.CONFIRMED,
@@ -144,13 +202,22 @@ class DataPreprocessor:
         df = self.sanitize_dataframe(df)
         return df
 
+    def derive_and_sanitize(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Derived features over sanitized inputs, sanitized again. Uses the fused
+        kernel unless ``fused_features`` is off.
+        """
+        if self.fused_features:
+            return derive_features(df)
+        return self.sanitize_dataframe(self.add_derived_features(df))
+
     def split_data(
         self,
         X: pd.DataFrame,
         y: pd.Series,
-        train_size: float = 0.7,
-        test_size: float = 0.15,
-        cv_size: float = 0.15,
+        train_size: float = TRAIN_SIZE,
+        test_size: float = TEST_SIZE,
+        cv_size: float = CV_SIZE,
     ) -> list[pd.DataFrame]:
         assert (
             abs(train_size + test_size + cv_size - 1.0) < 1e-6
@@ -178,15 +245,12 @@ class DataPreprocessor:
         logger.info(
             f"Data split - Train: {X_train.shape}, Test: {X_test.shape}, CV: {X_cv.shape}"
         )
-        logger.info(
-            f"Class distribution - Train: {pd.Series(y_train).value_counts().to_dict()}"
-        )
-        logger.info(
-            f"Class distribution - Test: {pd.Series(y_test).value_counts().to_dict()}"
-        )
-        logger.info(
-            f"Class distribution - CV: {pd.Series(y_cv).value_counts().to_dict()}"
-        )
+        for split_name, y_split in [("Train", y_train), ("Test", y_test), ("CV", y_cv)]:
+            logger.debug(
+                "Class distribution - %s: %s",
+                split_name,
+                Lazy(lambda y: pd.Series(y).value_counts().to_dict(), y_split),
+            )
 
         return [X_train, y_train, X_test, y_test, X_cv, y_cv]
 
@@ -198,34 +262,62 @@ class DataPreprocessor:
 
             return
 
-        data_folder.mkdir(parents=True, exist_ok=True)
-
-        data.X_train.to_csv(data_folder / "X_train.csv", index=False)
-        data.y_train.to_csv(data_folder / "y_train.csv", index=False)
-        data.X_test.to_csv(data_folder / "X_test.csv", index=False)
-        data.y_test.to_csv(data_folder / "y_test.csv", index=False)
-        data.X_cv.to_csv(data_folder / "X_cv.csv", index=False)
-        data.y_cv.to_csv(data_folder / "y_cv.csv", index=False)
+        save_model_data(data, data_folder, file_format=self.file_format)
 
         logger.info(f"Saved processed data to {data_folder}")
 
-    def processing_pipeline(self) -> ModelData:
-        dataframe = self.df.copy()
-        dataframe["disposition"] = dataframe["disposition"].str.strip()
+    @staticmethod
+    def load_data(data_folder: Path) -> ModelData:
+        """Rebuild the ``ModelData`` splits written by ``save_data``."""
+        model_data = load_model_data(data_folder)
+        logger.info(f"Loaded processed data from {data_folder}")
+        return model_data
+
+    def _filter_valid_labels(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+        # Returns a filtered copy and leaves the caller's frame untouched.
+        labels = dataframe["disposition"].str.strip()
         valid_labels = ["CONFIRMED", "CANDIDATE", "FALSE POSITIVE"]
+        is_valid = labels.isin(valid_labels)
 
         initial_rows = len(dataframe)
-        clean_df = dataframe[dataframe["disposition"].isin(valid_labels)].copy()
+        clean_df = dataframe[is_valid].copy()
+        clean_df["disposition"] = labels[is_valid]
         rows_removed = initial_rows - len(clean_df)
         if rows_removed > 0:
             logger.warning(
                 f"Removed {rows_removed} rows with invalid 'disposition' labels."
             )
+        return clean_df
+
+    def prepare_incremental_rows(
+        self, reference_X: pd.DataFrame
+    ) -> tuple[pd.DataFrame, pd.Series]:
+        """
+        Turn newly arrived merged rows into model features without refitting
+        anything: missing values are filled from the medians of an existing
+        feature matrix and the output columns are aligned to it.
+        """
+        clean_df = self._filter_valid_labels(self.df)
+        clean_df = self.sanitize_dataframe(clean_df)
+
+        fill_values = reference_X.median()
+        raw_cols = [col for col in clean_df.columns if col in fill_values.index]
+        clean_df[raw_cols] = clean_df[raw_cols].fillna(fill_values[raw_cols])
+
+        clean_df = self.derive_and_sanitize(clean_df)
+
+        y = self._encode_target_variable(clean_df["disposition"])
+        X = clean_df.reindex(columns=reference_X.columns).fillna(fill_values)
+
+        logger.info(f"Prepared {len(X)} incremental rows")
+        return X, y
+
+    def processing_pipeline(self) -> ModelData:
+        clean_df = self._filter_valid_labels(self.df)
 
         clean_df = self.sanitize_dataframe(clean_df)
         clean_df = self.handle_missing_values(clean_df)
-        clean_df = self.add_derived_features(clean_df)
-        clean_df = self.sanitize_dataframe(clean_df)
+        clean_df = self.derive_and_sanitize(clean_df)
 
         y_unencoded = clean_df["disposition"]
         y_encoded = self._encode_target_variable(y_unencoded)
@@ -248,6 +340,13 @@ class DataPreprocessor:
             X_cv=X_cv,
             y_cv=y_cv,
         )
+        # Splits keep the merged frame's index, so ids are looked up by it.
+        ids = row_ids(self.df)
+        model_data.row_ids = {
+            "train": ids.loc[X_train.index],
+            "test": ids.loc[X_test.index],
+            "cv": ids.loc[X_cv.index],
+        }
         if self.data_folder:
             self.save_data(model_data)
         logger.info("Preprocessing pipeline complete!")
@@ -1,10 +1,14 @@
 import matplotlib.pyplot as plt
 import seaborn as sns
 import pandas as pd
+import numpy as np
 from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
 from pathlib import Path
-from ..utils.common import setup_logger
+from typing import Iterable, Optional
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from ..utils.common import Lazy, frame_info, setup_logger
 
 
 LOGGING_DIR = Path("reports") / "logs"
@@ -12,27 +16,137 @@ LOGGER_FILE_PATH = LOGGING_DIR / "Data_visualizer.log"
 logger = setup_logger("DataVisualizer", LOGGER_FILE_PATH)
 
 FIGS_PATH = Path("reports") / "figures"
-FIGS_PATH.mkdir(parents=True, exist_ok=True)
+
+RANDOM_STATE = 42
+VISUALIZATION_MODES = ["full", "fast"]
+DEFAULT_SAMPLE_SIZE = 100_000
+BLOCK_SIZE = 100_000
+# Object columns with at most this many distinct values become categoricals.
+MAX_CATEGORIES = 50
+
+
+def reservoir_sample(
+    chunks: Iterable[pd.DataFrame], size: int, random_state: int = RANDOM_STATE
+) -> tuple[pd.DataFrame, int]:
+    """
+    Uniform sample of ``size`` rows from a stream of DataFrame chunks
+    (Algorithm R, vectorized per chunk), and the number of rows seen.
+
+    Works on any chunk iterator, e.g. ``data_io.iter_frames``, so the whole
+    frame never has to be in memory.
+    """
+    rng = np.random.default_rng(random_state)
+    reservoir = None
+    seen = 0
+
+    for chunk in chunks:
+        n_fill = min(len(chunk), size - seen) if seen < size else 0
+        if n_fill:
+            head = chunk.iloc[:n_fill]
+            reservoir = (
+                head if reservoir is None else pd.concat([reservoir, head])
+            ).reset_index(drop=True)
+            seen += n_fill
+
+        rest = chunk.iloc[n_fill:]
+        if len(rest):
+            slots = rng.integers(0, seen + np.arange(len(rest)) + 1)
+            rows = np.flatnonzero(slots < size)
+            # When a slot is drawn twice, the later row wins, as it would
+            # replacing rows one at a time.
+            slots, first = np.unique(slots[rows][::-1], return_index=True)
+            rows = rows[::-1][first]
+            reservoir = pd.concat(
+                [reservoir.drop(index=slots), rest.iloc[rows]], ignore_index=True
+            )
+            seen += len(rest)
+
+    if reservoir is None:
+        return pd.DataFrame(), seen
+    return reservoir, seen
+
+
+def downcast(df: pd.DataFrame) -> pd.DataFrame:
+    """float32/smallest-int numeric columns, low-cardinality text as categoricals."""
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_float_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="float")
+        elif pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+        elif df[col].dtype == object and df[col].nunique() <= MAX_CATEGORIES:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def render_histograms(df: pd.DataFrame, path: Path) -> Path:
+    plt.switch_backend("agg")
+    df.hist(figsize=(15, 10), bins=30)
+    plt.savefig(f"{path}")
+    plt.close("all")
+    return path
+
+
+def render_heatmap(corr: pd.DataFrame, path: Path) -> Path:
+    plt.switch_backend("agg")
+    plt.figure(figsize=(12, 8))
+    sns.set_theme(style="whitegrid")
+    sns.heatmap(corr, annot=False, cmap="coolwarm")
+    plt.savefig(f"{path}")
+    plt.close("all")
+    return path
 
 
 class EXODataVisualizer:
-    def __init__(self, dataframe: pd.DataFrame):
+    """
+    Summary statistics and figures for the merged catalog.
+
+    ``mode="full"`` works on the whole frame and renders in the calling
+    process. ``mode="fast"`` reservoir-samples ``sample_size`` rows, downcasts
+    them, and renders the figures in a background process pool, so
+    ``visualize_data`` returns as soon as the statistics are logged; call
+    ``wait`` before exiting to collect the figures.
+    """
+
+    def __init__(
+        self,
+        dataframe: pd.DataFrame,
+        mode: str = "full",
+        sample_size: int = DEFAULT_SAMPLE_SIZE,
+        figs_path: Path = FIGS_PATH,
+    ):
+        if mode not in VISUALIZATION_MODES:
+            raise ValueError(f"Unsupported visualization mode: {mode}")
+
         self.df = dataframe
+        self.mode = mode
+        self.sample_size = sample_size
+        self.figs_path = figs_path
+        self.futures: list[Future] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
         sns.set_theme(style="whitegrid")
 
     def visualize_data(self) -> None:
+        self.figs_path.mkdir(parents=True, exist_ok=True)
+        if self.mode == "fast":
+            self._visualize_sample()
+            return
+
         logger.info(f"DataFrame shape: {self.df.shape}")
-        logger.info(f"DataFrame dtypes:\n{self.df.dtypes}")
-        logger.info(f"DataFrame head:\n{self.df.head()}")
-        logger.info(f"DataFrame info: \n{self.df.info()}")
-        logger.info(f"DataFrame describe:\n{self.df.describe()}")
-        logger.info(f"DataFrame unique values:\n{self.df.nunique()}")
-        logger.info(f"DataFrame null value:\n{self.df.isnull().sum()}")
-        logger.info(
-            f"DataFrame null value percentage:\n{self.df.isnull().sum() / len(self.df) * 100}"
+        logger.debug("DataFrame dtypes:\n%s", self.df.dtypes)
+        logger.debug("DataFrame head:\n%s", Lazy(self.df.head))
+        logger.debug("DataFrame info: \n%s", Lazy(frame_info, self.df))
+        logger.debug("DataFrame describe:\n%s", Lazy(self.df.describe))
+        logger.debug("DataFrame unique values:\n%s", Lazy(self.df.nunique))
+        logger.debug(
+            "DataFrame null value:\n%s", Lazy(lambda: self.df.isnull().sum())
+        )
+        logger.debug(
+            "DataFrame null value percentage:\n%s",
+            Lazy(lambda: self.df.isnull().sum() / len(self.df) * 100),
         )
         self.df.hist(figsize=(15, 10), bins=30)
-        plt.savefig(f'{FIGS_PATH / "hist"}')
+        plt.savefig(f'{self.figs_path / "hist"}')
 
         plt.figure(figsize=(12, 8))
         sns.heatmap(
@@ -40,7 +154,57 @@ class EXODataVisualizer:
             annot=False,
             cmap="coolwarm",
         )
-        plt.savefig(f'{FIGS_PATH / "heatmap"}')
+        plt.savefig(f'{self.figs_path / "heatmap"}')
+
+    def _blocks(self):
+        for start in range(0, len(self.df), BLOCK_SIZE):
+            yield self.df.iloc[start : start + BLOCK_SIZE]
+
+    def _visualize_sample(self) -> None:
+        sample, n_rows = reservoir_sample(self._blocks(), self.sample_size)
+        sample = downcast(sample)
+
+        logger.info(f"DataFrame shape: {self.df.shape} (sampled {len(sample)} rows)")
+        logger.debug("DataFrame dtypes (downcast sample):\n%s", sample.dtypes)
+        logger.debug("Sample describe:\n%s", Lazy(sample.describe))
+        logger.debug("Sample unique values:\n%s", Lazy(sample.nunique))
+        # Null counts are exact over the whole frame, and like the rest only
+        # computed when DEBUG logging is enabled.
+        logger.debug(
+            "DataFrame null value:\n%s", Lazy(lambda: self.df.isnull().sum())
+        )
+        logger.debug(
+            "DataFrame null value percentage:\n%s",
+            Lazy(lambda: self.df.isnull().sum() / max(n_rows, 1) * 100),
+        )
+
+        numeric = sample.select_dtypes(include=["number"])
+        corr = numeric.corr()
+
+        # Spawned, not forked: TensorFlow may already be loaded in the parent.
+        self._executor = ProcessPoolExecutor(
+            max_workers=2, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.futures = [
+            self._executor.submit(render_histograms, numeric, self.figs_path / "hist"),
+            self._executor.submit(render_heatmap, corr, self.figs_path / "heatmap"),
+        ]
+        self._executor.shutdown(wait=False)
+        logger.info("Rendering figures in the background")
+        # The figures only need the sample, so the full frame is released
+        # for the rest of the pipeline.
+        self.df = None
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until background figures are written, logging any failures."""
+        done, not_done = wait(self.futures, timeout=timeout)
+        for future in done:
+            try:
+                logger.info(f"Saved figure {future.result()}")
+            except Exception as e:
+                logger.warning(f"Figure rendering failed: {e}")
+        if not_done:
+            logger.warning(f"{len(not_done)} figure(s) still rendering")
 
 
-__all__ = ["EXODataVisualizer"]
+__all__ = ["EXODataVisualizer", "VISUALIZATION_MODES", "reservoir_sample", "downcast"]
@@ -0,0 +1,108 @@
+import pandas as pd
+import numpy as np
+
+EPSILON = 1e-10
+CRITICAL_COLUMNS = ["period", "duration", "star_radius", "semi_major_axis"]
+LOG_COLUMNS = ["period", "duration", "depth", "planet_radius", "star_radius"]
+DERIVED_COLUMNS = [
+    "transit_signal_strength",
+    "radius_ratio",
+    "transit_probability",
+    "orbital_velocity",
+    "stellar_flux",
+    "transit_depth_norm",
+    "habitable_zone_proxy",
+    "radius_temp_interaction",
+    "period_depth_interaction",
+]
+
+
+def _sanitize_column(values: np.ndarray, critical: bool) -> np.ndarray:
+    values[np.isinf(values)] = np.nan
+    if critical:
+        values[values == 0] = EPSILON
+        values[values < 0] = np.nan
+    return values
+
+
+def derived_feature_names(columns) -> list[str]:
+    """Names of the columns ``derive_features`` appends, in order."""
+    names = list(DERIVED_COLUMNS)
+    for col in LOG_COLUMNS:
+        if col in columns:
+            names += [f"log_{col}", f"log_{col}_squared"]
+    return names
+
+
+def derive_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fused equivalent of ``sanitize_dataframe`` followed by
+    ``add_derived_features`` and ``sanitize_dataframe`` again.
+
+    Each numeric input column is converted once to a contiguous float64 array
+    and sanitized in place. All derived features are written into one
+    preallocated column-major block, sharing the ``+ EPSILON`` and ``log1p``
+    intermediates instead of recomputing them, and the block is sanitized in
+    a single pass. With float64 input the values are identical to the pandas
+    chain; float32 input is computed in float64.
+    """
+    columns = {}
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]):
+            columns[col] = _sanitize_column(
+                df[col].to_numpy(dtype=np.float64, copy=True),
+                critical=col in CRITICAL_COLUMNS,
+            )
+        else:
+            columns[col] = df[col]
+
+    period = columns["period"]
+    duration = columns["duration"]
+    depth = columns["depth"]
+    planet_radius = columns["planet_radius"]
+    star_radius = columns["star_radius"]
+    semi_major_axis = columns["semi_major_axis"]
+    teff = columns["teff"]
+
+    names = derived_feature_names(df.columns)
+    out = np.empty((len(df), len(names)), dtype=np.float64, order="F")
+
+    with np.errstate(all="ignore"):
+        period_eps = period + EPSILON
+        star_eps = star_radius + EPSILON
+        sma_eps = semi_major_axis + EPSILON
+        log_depth = np.log1p(depth)
+
+        np.multiply(depth, duration, out=out[:, 0])
+        np.divide(out[:, 0], period_eps, out=out[:, 0])
+        np.divide(planet_radius, star_eps, out=out[:, 1])
+        np.divide(star_radius, sma_eps, out=out[:, 2])
+        np.multiply(2 * np.pi, semi_major_axis, out=out[:, 3])
+        np.divide(out[:, 3], period_eps, out=out[:, 3])
+        np.power(teff, 4, out=out[:, 4])
+        np.divide(out[:, 4], np.square(sma_eps), out=out[:, 4])
+        np.divide(depth, np.square(star_eps), out=out[:, 5])
+        np.divide(teff, 5778, out=out[:, 6])
+        np.sqrt(out[:, 6], out=out[:, 6])
+        np.divide(out[:, 6], np.sqrt(sma_eps, out=sma_eps), out=out[:, 6])
+        np.multiply(planet_radius, teff, out=out[:, 7])
+        np.multiply(period, log_depth, out=out[:, 8])
+
+        position = len(DERIVED_COLUMNS)
+        clipped = period_eps
+        for col in LOG_COLUMNS:
+            if col not in columns:
+                continue
+            np.clip(columns[col], 1e-10, 1e10, out=clipped)
+            np.log1p(clipped, out=out[:, position])
+            np.square(out[:, position], out=out[:, position + 1])
+            position += 2
+
+    out[np.isinf(out)] = np.nan
+
+    base = pd.DataFrame(columns, index=df.index)
+    derived = pd.DataFrame(out, index=df.index, columns=names)
+    return pd.concat([base, derived], axis=1)
+
+
+__all__ = ["derive_features", "derived_feature_names", "DERIVED_COLUMNS"]
@@ -0,0 +1,259 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Optional, Union
+import os
+
+from joblib import Parallel, delayed
+
+from ..utils.common import setup_logger
+
+LOGGER_FILE_PATH = Path("reports") / "logs" / "KNN_imputer.log"
+logger = setup_logger("KNNImputer", LOGGER_FILE_PATH)
+
+# Agreement with sklearn.impute.KNNImputer on the same input. The distances
+# are computed with a different (but algebraically identical) expansion, so
+# results differ only by floating-point rounding, except where two donors are
+# equidistant up to rounding and either may be picked as the k-th neighbour.
+EQUIVALENCE_RTOL = 1e-4
+EQUIVALENCE_ATOL = 1e-8
+# Bumped whenever a change can alter the imputed values, so that cached
+# preprocessing outputs keyed on it are recomputed.
+IMPUTER_VERSION = 1
+# Block-by-fit-rows matrices alive at once while a block is imputed: the
+# distances, the present-feature counts and a matrix-product temporary at the
+# peak, plus the fallback's copy of a column's donor distances.
+_BLOCK_MATRICES = 4
+# Below this many rows per block the matrix products stop amortising, so
+# fewer blocks run concurrently rather than smaller ones.
+_MIN_BLOCK_ROWS = 64
+
+
+class BlockedKNNImputer:
+    """
+    Drop-in replacement for ``sklearn.impute.KNNImputer`` (nan-euclidean
+    distance, ``uniform`` or ``distance`` weights) for large frames.
+
+    Rows with missing values are processed in blocks imputed in parallel
+    threads. ``working_memory_mb`` bounds all blocks in flight together: it
+    is split between the concurrent blocks and covers the few block-sized
+    matrices each one holds at its peak, unless a single row already needs
+    more. When an even split would make blocks too small, fewer run at a
+    time. The
+    distance matrix of a block is computed once with three matrix products.
+    Each row then keeps a sorted shortlist of its ``n_neighbors *
+    shortlist_factor`` nearest fit rows, and every column the row needs filled
+    takes its k nearest donors from that shortlist. Only rows whose shortlist
+    holds too few donors for a column fall back to a full scan of the column,
+    instead of the per-column scan over all donors that sklearn performs.
+
+    Columns that are entirely missing in the fit data are left as NaN rather
+    than dropped.
+    """
+
+    def __init__(
+        self,
+        n_neighbors: int = 5,
+        weights: str = "distance",
+        n_jobs: Optional[int] = -1,
+        working_memory_mb: int = 256,
+        shortlist_factor: int = 8,
+        dtype=np.float64,
+    ):
+        if weights not in ("uniform", "distance"):
+            raise ValueError(f"Unsupported weights: {weights}")
+
+        self.n_neighbors = n_neighbors
+        self.weights = weights
+        self.n_jobs = n_jobs
+        self.working_memory_mb = working_memory_mb
+        self.shortlist_factor = shortlist_factor
+        self.dtype = dtype
+
+    def fit(self, X: Union[np.ndarray, pd.DataFrame]) -> "BlockedKNNImputer":
+        fit_X = np.asarray(X, dtype=self.dtype)
+        fit_present = ~np.isnan(fit_X)
+
+        self._fit_X = fit_X
+        self._fit_present_mask = fit_present
+        self._fit_present = fit_present.astype(self.dtype)
+        self._fit_zeroed = np.where(fit_present, fit_X, 0)
+        self._fit_squared = self._fit_zeroed**2
+        self._donors = [
+            np.flatnonzero(fit_present[:, col]) for col in range(fit_X.shape[1])
+        ]
+
+        with np.errstate(invalid="ignore"):
+            self.column_means_ = np.nanmean(fit_X, axis=0)
+        self.n_features_in_ = fit_X.shape[1]
+        return self
+
+    def _plan_blocks(self, n_rows: int) -> tuple[int, int]:
+        """
+        Rows per block and number of blocks imputed concurrently, such that
+        the blocks in flight together stay within ``working_memory_mb``.
+        """
+        itemsize = max(np.dtype(self.dtype).itemsize, np.dtype(np.intp).itemsize)
+        bytes_per_row = _BLOCK_MATRICES * max(1, len(self._fit_X)) * itemsize
+        budget_rows = max(1, int(self.working_memory_mb * 1024 * 1024 // bytes_per_row))
+
+        n_jobs = self.n_jobs if self.n_jobs and self.n_jobs > 0 else os.cpu_count()
+        n_jobs = max(
+            1,
+            min(
+                n_jobs or 1,
+                budget_rows // _MIN_BLOCK_ROWS,
+                -(-n_rows // _MIN_BLOCK_ROWS),
+            ),
+        )
+        block_size = max(1, min(budget_rows // n_jobs, -(-n_rows // n_jobs)))
+        return block_size, n_jobs
+
+    def _nan_euclidean(self, X_block: np.ndarray, present: np.ndarray) -> np.ndarray:
+        zeroed = np.where(present, X_block, 0)
+        present = present.astype(self.dtype)
+
+        squared = (zeroed**2) @ self._fit_present.T
+        squared += present @ self._fit_squared.T
+        squared -= 2 * (zeroed @ self._fit_zeroed.T)
+        np.maximum(squared, 0, out=squared)
+
+        present_count = present @ self._fit_present.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            squared *= X_block.shape[1] / present_count
+        squared[present_count == 0] = np.nan
+        return np.sqrt(squared, out=squared)
+
+    def _donor_weights(self, donor_dist: np.ndarray) -> np.ndarray:
+        finite = np.isfinite(donor_dist)
+        if self.weights == "uniform":
+            return finite.astype(self.dtype)
+
+        with np.errstate(divide="ignore"):
+            weights = np.where(finite, 1.0 / donor_dist, 0.0)
+        # Exact matches take all the weight, as in sklearn's KNN weighting.
+        exact = donor_dist == 0
+        exact_rows = exact.any(axis=1)
+        weights[exact_rows] = exact[exact_rows]
+        return weights
+
+    def _shortlist(self, dist: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Indices and distances of each row's nearest fit rows, closest first."""
+        n_candidates = min(dist.shape[1], self.n_neighbors * self.shortlist_factor)
+        if n_candidates < dist.shape[1]:
+            candidates = np.argpartition(dist, n_candidates - 1, axis=1)[
+                :, :n_candidates
+            ]
+        else:
+            candidates = np.broadcast_to(np.arange(dist.shape[1]), dist.shape)
+
+        candidate_dist = np.take_along_axis(dist, candidates, axis=1)
+        order = np.argsort(candidate_dist, axis=1)
+        return (
+            np.take_along_axis(candidates, order, axis=1),
+            np.take_along_axis(candidate_dist, order, axis=1),
+        )
+
+    def _nearest_donors(
+        self,
+        col: int,
+        receivers: np.ndarray,
+        dist: np.ndarray,
+        shortlist: np.ndarray,
+        shortlist_dist: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        donors = self._donors[col]
+        k = min(self.n_neighbors, len(donors))
+        nearest = np.empty((len(receivers), k), dtype=np.intp)
+        nearest_dist = np.empty((len(receivers), k), dtype=dist.dtype)
+
+        # The first k shortlisted rows that have the column are exactly its k
+        # nearest donors; only rows whose shortlist holds fewer than k of them
+        # fall back to a search over every donor of the column.
+        has_col = self._fit_present_mask[shortlist[receivers], col]
+        rank = np.cumsum(has_col, axis=1)
+        found = rank[:, -1] >= k
+        if found.any():
+            positions = np.nonzero(has_col[found] & (rank[found] <= k))[1]
+            positions = positions.reshape(-1, k)
+            nearest[found] = np.take_along_axis(
+                shortlist[receivers[found]], positions, axis=1
+            )
+            nearest_dist[found] = np.take_along_axis(
+                shortlist_dist[receivers[found]], positions, axis=1
+            )
+
+        missed = ~found
+        if missed.any():
+            donor_dist = dist[np.ix_(receivers[missed], donors)]
+            partition = np.argpartition(donor_dist, k - 1, axis=1)[:, :k]
+            nearest[missed] = donors[partition]
+            nearest_dist[missed] = np.take_along_axis(donor_dist, partition, axis=1)
+
+        return nearest, nearest_dist
+
+    def _impute_block(self, X_block: np.ndarray) -> np.ndarray:
+        missing = np.isnan(X_block)
+        dist = self._nan_euclidean(X_block, ~missing)
+        dist[np.isnan(dist)] = np.inf
+        shortlist, shortlist_dist = self._shortlist(dist)
+
+        for col in np.flatnonzero(missing.any(axis=0)):
+            if len(self._donors[col]) == 0:
+                continue
+
+            receivers = np.flatnonzero(missing[:, col])
+            nearest, nearest_dist = self._nearest_donors(
+                col, receivers, dist, shortlist, shortlist_dist
+            )
+
+            no_donor = np.isinf(nearest_dist).all(axis=1)
+            X_block[receivers[no_donor], col] = self.column_means_[col]
+
+            weights = self._donor_weights(nearest_dist[~no_donor])
+            donor_values = self._fit_X[nearest[~no_donor], col]
+            X_block[receivers[~no_donor], col] = (weights * donor_values).sum(
+                axis=1
+            ) / weights.sum(axis=1)
+
+        return X_block
+
+    def transform(self, X: Union[np.ndarray, pd.DataFrame]) -> np.ndarray:
+        X = np.array(X, dtype=self.dtype)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"Expected {self.n_features_in_} features, but got {X.shape[1]}"
+            )
+
+        rows = np.flatnonzero(np.isnan(X).any(axis=1))
+        if len(rows) == 0:
+            return X
+
+        block_size, n_jobs = self._plan_blocks(len(rows))
+        blocks = [
+            rows[start : start + block_size]
+            for start in range(0, len(rows), block_size)
+        ]
+        logger.info(
+            f"KNN imputation of {len(rows)} rows against {len(self._fit_X)} donors "
+            f"in {len(blocks)} block(s) of up to {block_size} rows, "
+            f"{n_jobs} at a time"
+        )
+
+        imputed = Parallel(n_jobs=min(n_jobs, len(blocks)), prefer="threads")(
+            delayed(self._impute_block)(X[block]) for block in blocks
+        )
+        for block, values in zip(blocks, imputed):
+            X[block] = values
+        return X
+
+    def fit_transform(self, X: Union[np.ndarray, pd.DataFrame], y=None) -> np.ndarray:
+        return self.fit(X).transform(X)
+
+
+__all__ = [
+    "BlockedKNNImputer",
+    "EQUIVALENCE_RTOL",
+    "EQUIVALENCE_ATOL",
+    "IMPUTER_VERSION",
+]
@@ -0,0 +1,244 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import Optional
+import tempfile
+import time
+
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers, models
+from sklearn.metrics import accuracy_score
+
+import xgboost as xgb
+import lightgbm as lgb
+
+from ..utils.common import setup_logger
+from .input_pipeline import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_WARMUP_EPOCHS,
+    EVAL_BATCH_SIZE,
+    ReduceLROnPlateau,
+    fit_with_input_pipeline,
+    scaled_learning_rate,
+)
+
+LOGGER_FILE_PATH = Path("reports") / "logs" / "Base_models.log"
+logger = setup_logger("BaseModels", LOGGER_FILE_PATH)
+
+BASE_MODELS = ("xgboost", "lightgbm", "mlp")
+
+DEFAULT_MLP_PARAMS = {
+    "learning_rate": 0.0005,
+    "epochs": 300,
+    "batch_size": DEFAULT_BATCH_SIZE,
+    "lr_scaling": "sqrt",
+    "warmup_epochs": DEFAULT_WARMUP_EPOCHS,
+}
+
+
+def fit_xgboost(
+    X_train: np.ndarray,
+    y_train: pd.Series,
+    X_cv: np.ndarray,
+    y_cv: pd.Series,
+    sample_weights: np.ndarray,
+    params: dict,
+    n_jobs: Optional[int] = None,
+) -> xgb.XGBClassifier:
+    if n_jobs:
+        params = {**params, "n_jobs": n_jobs}
+
+    model = xgb.XGBClassifier(**params)
+    model.fit(
+        X_train,
+        y_train,
+        sample_weight=sample_weights,
+        eval_set=[(X_cv, y_cv)],
+        verbose=50,
+    )
+
+    train_pred = model.predict(X_train)
+    cv_pred = model.predict(X_cv)
+
+    logger.info(f"XGBoost Train Accuracy: {accuracy_score(y_train, train_pred):.4f}")
+    logger.info(f"XGBoost CV Accuracy: {accuracy_score(y_cv, cv_pred):.4f}")
+
+    return model
+
+
+def fit_lightgbm(
+    X_train: np.ndarray,
+    y_train: pd.Series,
+    X_cv: np.ndarray,
+    y_cv: pd.Series,
+    sample_weights: np.ndarray,
+    params: dict,
+    n_jobs: Optional[int] = None,
+) -> lgb.LGBMClassifier:
+    if n_jobs:
+        params = {**params, "n_jobs": n_jobs}
+
+    model = lgb.LGBMClassifier(**params)
+    model.fit(
+        X_train,
+        y_train,
+        sample_weight=sample_weights,
+        eval_set=[(X_cv, y_cv)],
+        callbacks=[lgb.early_stopping(50), lgb.log_evaluation(50)],
+    )
+
+    train_pred = model.predict(X_train)
+    cv_pred = model.predict(X_cv)
+
+    logger.info(f"LightGBM Train Accuracy: {accuracy_score(y_train, train_pred):.4f}")
+    logger.info(f"LightGBM CV Accuracy: {accuracy_score(y_cv, cv_pred):.4f}")
+
+    return model
+
+
+def build_mlp(n_features: int) -> keras.Model:
+    """The MLP base model's architecture, uncompiled."""
+    return models.Sequential(
+        [
+            layers.Input(shape=(n_features,)),
+            layers.Dense(16, activation="relu"),
+            layers.Dropout(0.5),
+            layers.Dense(3, activation="softmax"),
+        ]
+    )
+
+
+def fit_mlp(
+    X_train: np.ndarray,
+    y_train: pd.Series,
+    X_cv: np.ndarray,
+    y_cv: pd.Series,
+    sample_weights: np.ndarray,
+    params: Optional[dict] = None,
+    n_jobs: Optional[int] = None,
+) -> keras.Model:
+    params = {**DEFAULT_MLP_PARAMS, **(params or {})}
+    model = build_mlp(X_train.shape[1])
+
+    learning_rate = scaled_learning_rate(
+        params["learning_rate"], params["batch_size"], params["lr_scaling"]
+    )
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+        loss="sparse_categorical_crossentropy",
+        metrics=["accuracy"],
+    )
+
+    early_stop = keras.callbacks.EarlyStopping(
+        monitor="val_loss", patience=50, restore_best_weights=True, min_delta=0.001
+    )
+
+    reduce_lr = ReduceLROnPlateau(
+        monitor="val_loss", factor=0.5, patience=10, min_lr=1e-7
+    )
+
+    fit_with_input_pipeline(
+        model,
+        X_train,
+        y_train,
+        X_cv,
+        y_cv,
+        sample_weights=sample_weights,
+        batch_size=params["batch_size"],
+        epochs=params["epochs"],
+        warmup_epochs=params["warmup_epochs"],
+        callbacks=[early_stop, reduce_lr],
+        name="MLP",
+    )
+
+    train_loss, train_acc = model.evaluate(
+        X_train, y_train, batch_size=EVAL_BATCH_SIZE, verbose=0
+    )
+    cv_loss, cv_acc = model.evaluate(X_cv, y_cv, batch_size=EVAL_BATCH_SIZE, verbose=0)
+
+    logger.info(f"MLP Train Accuracy: {train_acc:.4f}")
+    logger.info(f"MLP CV Accuracy: {cv_acc:.4f}")
+
+    return model
+
+
+BASE_MODEL_FITTERS = {
+    "xgboost": fit_xgboost,
+    "lightgbm": fit_lightgbm,
+    "mlp": fit_mlp,
+}
+
+
+def keras_model_to_bytes(model: keras.Model) -> bytes:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "model.keras"
+        model.save(path)
+        return path.read_bytes()
+
+
+def keras_model_from_bytes(payload: bytes) -> keras.Model:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "model.keras"
+        path.write_bytes(payload)
+        return keras.models.load_model(path)
+
+
+def split_thread_budget(n_jobs: int, n_workers: int) -> list[int]:
+    """Spread ``n_jobs`` threads over ``n_workers`` processes, at least one each."""
+    base, extra = divmod(max(n_jobs, n_workers), n_workers)
+    return [base + (1 if i < extra else 0) for i in range(n_workers)]
+
+
+def limit_worker_threads(n_threads: int) -> None:
+    """
+    Cap the TensorFlow thread pools of the current worker process. XGBoost and
+    LightGBM are capped by their ``n_jobs``; ``OMP_NUM_THREADS`` would only
+    take effect if set before they are imported.
+    """
+    tf.config.threading.set_intra_op_parallelism_threads(n_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def train_base_model_worker(
+    model_name: str,
+    X_train: np.ndarray,
+    y_train: pd.Series,
+    X_cv: np.ndarray,
+    y_cv: pd.Series,
+    sample_weights: np.ndarray,
+    params: Optional[dict],
+    n_threads: int,
+):
+    """Entry point of a base-model worker process.
+
+    Keras models are returned as ``.keras`` archive bytes; the tree models
+    pickle cleanly and are returned as-is.
+    """
+    limit_worker_threads(n_threads)
+
+    start = time.perf_counter()
+    model = BASE_MODEL_FITTERS[model_name](
+        X_train, y_train, X_cv, y_cv, sample_weights, params, n_jobs=n_threads
+    )
+    elapsed = time.perf_counter() - start
+
+    if model_name == "mlp":
+        model = keras_model_to_bytes(model)
+
+    return model_name, model, elapsed
+
+
+__all__ = [
+    "BASE_MODELS",
+    "BASE_MODEL_FITTERS",
+    "fit_xgboost",
+    "fit_lightgbm",
+    "fit_mlp",
+    "build_mlp",
+    "train_base_model_worker",
+    "split_thread_budget",
+    "limit_worker_threads",
+    "keras_model_to_bytes",
+    "keras_model_from_bytes",
+]
@@ -0,0 +1,222 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import Optional
+
+from sklearn.metrics import accuracy_score
+import lightgbm as lgb
+import joblib
+
+from ..utils.entity import ModelData
+from ..utils.common import setup_logger
+from ..data.feature_kernels import derive_features, derived_feature_names
+from .hyperparameter_tuner import median_latency_ms
+from .ensemble_compressor import EnsembleCompressor
+from .model_bundle import write_model_bundle
+
+RANDOM_STATE = 42
+LOGGER_FILE_PATH = Path("reports") / "logs" / "Distiller.log"
+logger = setup_logger("Distiller", LOGGER_FILE_PATH)
+
+STUDENT_MODEL_FILE = "student_model.pkl"
+STUDENT_INFO_FILE = "student_info.pkl"
+N_CLASSES = 3
+
+DEFAULT_STUDENT_PARAMS = {
+    "n_estimators": 300,
+    "learning_rate": 0.05,
+    "num_leaves": 15,
+    "max_depth": 6,
+    "min_child_samples": 20,
+    "subsample": 0.8,
+    "subsample_freq": 1,
+    "colsample_bytree": 0.8,
+    "objective": "multiclass",
+    "num_class": N_CLASSES,
+    "random_state": RANDOM_STATE,
+    "verbose": -1,
+}
+
+
+def agreement_metrics(teacher_proba: np.ndarray, student_proba: np.ndarray) -> dict:
+    """How closely the student reproduces the teacher's predictions."""
+    teacher_proba = np.clip(teacher_proba, 1e-12, 1.0)
+    student_proba = np.clip(student_proba, 1e-12, 1.0)
+    return {
+        "top1_agreement": float(
+            np.mean(teacher_proba.argmax(axis=1) == student_proba.argmax(axis=1))
+        ),
+        "mean_total_variation": float(
+            0.5 * np.abs(teacher_proba - student_proba).sum(axis=1).mean()
+        ),
+        "mean_kl_divergence": float(
+            (teacher_proba * np.log(teacher_proba / student_proba)).sum(axis=1).mean()
+        ),
+    }
+
+
+class EnsembleDistiller:
+    """
+    Distil the saved stacked ensemble into one small LightGBM student.
+
+    The student is trained on the ensemble's soft probabilities over the
+    training rows plus ``augment_factor`` times as many augmented rows
+    (training rows whose source columns are jittered by ``noise_scale``
+    standard deviations, with the derived features recomputed), so it also
+    learns the teacher's behaviour between the training points. Soft targets are fitted exactly by repeating each row
+    once per class, weighted by the teacher's probability for that class.
+
+    The student works on the raw (imputed) features, so the fast tier skips
+    the scaler, the three base models and the meta-model. It is saved next to
+    the ensemble as ``student_model.pkl`` with ``student_info.pkl``, which
+    holds its agreement with the ensemble on the test split.
+    """
+
+    def __init__(
+        self,
+        model_data: ModelData,
+        model_folder: Path,
+        augment_factor: float = 2.0,
+        noise_scale: float = 0.1,
+        student_params: Optional[dict] = None,
+    ):
+        self.model_data = model_data
+        self.model_folder = model_folder
+        self.augment_factor = augment_factor
+        self.noise_scale = noise_scale
+        self.student_params = {**DEFAULT_STUDENT_PARAMS, **(student_params or {})}
+
+        self.teacher = None
+        self.student = None
+
+    def augment(self, X: pd.DataFrame) -> pd.DataFrame:
+        """
+        Random training rows with their source columns jittered and the
+        derived features recomputed from them, as preprocessing would. The
+        noise is ``noise_scale`` times each column's scaler standard
+        deviation, and values are clipped to the range seen in ``X`` so the
+        log and ratio features stay defined.
+        """
+        rng = np.random.default_rng(RANDOM_STATE)
+        n_augmented = int(len(X) * self.augment_factor)
+        if n_augmented == 0:
+            return X.iloc[:0]
+
+        derived = set(derived_feature_names(X.columns))
+        source = [col for col in X.columns if col not in derived]
+        scaler = self.teacher["feature_scaler"]
+        scale = pd.Series(
+            scaler.scale_, index=getattr(scaler, "feature_names_in_", X.columns)
+        )[source].to_numpy()
+
+        rows = rng.integers(0, len(X), n_augmented)
+        jittered = X[source].iloc[rows].to_numpy(dtype=np.float64, copy=True)
+        jittered += rng.normal(0, self.noise_scale, jittered.shape) * scale
+        np.clip(
+            jittered,
+            X[source].min().to_numpy(),
+            X[source].max().to_numpy(),
+            out=jittered,
+        )
+        augmented = derive_features(pd.DataFrame(jittered, columns=source))
+        return augmented[X.columns]
+
+    def soft_targets(self, X: pd.DataFrame) -> np.ndarray:
+        return EnsembleCompressor.predict_proba(self.teacher, X)
+
+    def _fit_soft(self, X: pd.DataFrame, proba: np.ndarray, X_cv, proba_cv):
+        """Cross-entropy on soft targets as weighted hard labels, one per class."""
+
+        def expand(X, proba):
+            X_rep = pd.concat([X] * N_CLASSES, ignore_index=True)
+            y_rep = np.repeat(np.arange(N_CLASSES), len(X))
+            weights = proba.T.reshape(-1)
+            return X_rep, y_rep, weights
+
+        X_rep, y_rep, weights = expand(X, proba)
+        X_cv_rep, y_cv_rep, weights_cv = expand(X_cv, proba_cv)
+
+        student = lgb.LGBMClassifier(**self.student_params)
+        student.fit(
+            X_rep,
+            y_rep,
+            sample_weight=weights,
+            eval_set=[(X_cv_rep, y_cv_rep)],
+            eval_sample_weight=[weights_cv],
+            callbacks=[lgb.early_stopping(30, verbose=False)],
+        )
+        return student
+
+    def _latency(self, predict_proba, X: pd.DataFrame) -> float:
+        row = X.iloc[:1]
+        predict_proba(row)
+        return median_latency_ms(lambda: predict_proba(row))
+
+    def run(self) -> dict:
+        logger.info(f"Distilling the ensemble in {self.model_folder}")
+        self.teacher = EnsembleCompressor.load_ensemble(self.model_folder)
+        feature_names = self.teacher["ensemble_info"]["feature_names"]
+
+        X_train = self.model_data.X_train[feature_names]
+        X_cv = self.model_data.X_cv[feature_names]
+        X_test = self.model_data.X_test[feature_names]
+
+        X_distill = pd.concat([X_train, self.augment(X_train)], ignore_index=True)
+        logger.info(
+            f"Distillation set: {len(X_train)} training rows + "
+            f"{len(X_distill) - len(X_train)} augmented rows"
+        )
+
+        self.student = self._fit_soft(
+            X_distill, self.soft_targets(X_distill), X_cv, self.soft_targets(X_cv)
+        )
+
+        teacher_test = self.soft_targets(X_test)
+        student_test = self.student.predict_proba(X_test)
+        metrics = {
+            **agreement_metrics(teacher_test, student_test),
+            "teacher_test_accuracy": accuracy_score(
+                self.model_data.y_test, teacher_test.argmax(axis=1)
+            ),
+            "student_test_accuracy": accuracy_score(
+                self.model_data.y_test, student_test.argmax(axis=1)
+            ),
+            "teacher_single_row_latency_ms": self._latency(
+                lambda X: EnsembleCompressor.predict_proba(self.teacher, X), X_test
+            ),
+            "student_single_row_latency_ms": self._latency(
+                self.student.predict_proba, X_test
+            ),
+        }
+
+        student_info = {
+            "feature_names": feature_names,
+            "class_names": self.teacher["ensemble_info"]["class_names"],
+            "teacher_training_date": self.teacher["ensemble_info"]["training_date"],
+            "n_trees": self.student.booster_.current_iteration(),
+            "agreement": metrics,
+            "training_date": pd.Timestamp.now().isoformat(),
+        }
+        joblib.dump(self.student, self.model_folder / STUDENT_MODEL_FILE)
+        joblib.dump(student_info, self.model_folder / STUDENT_INFO_FILE)
+
+        logger.info(
+            f"Student ({student_info['n_trees']} rounds): top-1 agreement "
+            f"{metrics['top1_agreement']:.4f}, mean TV distance "
+            f"{metrics['mean_total_variation']:.4f}, test accuracy "
+            f"{metrics['teacher_test_accuracy']:.4f} (ensemble) vs "
+            f"{metrics['student_test_accuracy']:.4f} (student), single row "
+            f"{metrics['teacher_single_row_latency_ms']:.1f} ms vs "
+            f"{metrics['student_single_row_latency_ms']:.1f} ms"
+        )
+        logger.info(f"Saved student model to {self.model_folder / STUDENT_MODEL_FILE}")
+        write_model_bundle(self.model_folder)
+        return student_info
+
+
+__all__ = [
+    "EnsembleDistiller",
+    "agreement_metrics",
+    "STUDENT_MODEL_FILE",
+    "STUDENT_INFO_FILE",
+]
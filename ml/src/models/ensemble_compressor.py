@@ -0,0 +1,310 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import Optional
+import json
+import time
+
+from tensorflow import keras
+from sklearn.metrics import accuracy_score, f1_score, log_loss
+import joblib
+
+from ..utils.entity import ModelData
+from ..utils.common import setup_logger
+from .hyperparameter_tuner import LATENCY_BATCH_ROWS, median_latency_ms
+from .incremental_trainer import MODEL_FILES
+from .input_pipeline import DEFAULT_BATCH_SIZE
+from .model_trainer import StackedEnsembleTrainer
+
+RANDOM_STATE = 42
+LOGGER_FILE_PATH = Path("reports") / "logs" / "Ensemble_compressor.log"
+logger = setup_logger("EnsembleCompressor", LOGGER_FILE_PATH)
+
+ARTIFACT_FILES = ["feature_scaler.pkl", "imputer_state.pkl"] + MODEL_FILES
+REPORT_FILE = "compression_report.json"
+# Fractions of the trained boosting rounds tried when truncating.
+ROUND_FRACTIONS = np.linspace(0.05, 1.0, 20)
+
+
+class EnsembleCompressor:
+    """
+    Smaller, faster copy of the saved stacked ensemble.
+
+    Two reductions are measured on the CV split against the live models:
+
+    * boosting rounds: each tree model keeps the fewest rounds whose CV log
+      loss is within ``round_tolerance`` (relative) of its trained rounds;
+    * features: each feature is permuted in turn and the increase in ensemble
+      CV log loss is its marginal gain; features gaining less than
+      ``min_feature_gain`` are dropped, keeping at least ``min_features``.
+
+    The ensemble is then retrained on the reduced feature set with the
+    truncated round counts (new scaler, base models and meta-model) and
+    written to ``<model_folder>/compressed`` with ``compression_report.json``,
+    which compares test accuracy, latency and size with the live models. The
+    live models are never touched; ``accepted`` in the report says whether the
+    accuracy drop is within ``max_accuracy_drop``.
+    """
+
+    def __init__(
+        self,
+        model_data: ModelData,
+        model_folder: Path,
+        output_folder: Optional[Path] = None,
+        round_tolerance: float = 0.01,
+        min_feature_gain: float = 1e-4,
+        min_features: int = 5,
+        n_repeats: int = 3,
+        max_accuracy_drop: float = 0.005,
+        oof_folds: int = 0,
+        parallel: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        self.model_data = model_data
+        self.model_folder = model_folder
+        self.output_folder = output_folder or model_folder / "compressed"
+        self.round_tolerance = round_tolerance
+        self.min_feature_gain = min_feature_gain
+        self.min_features = min_features
+        self.n_repeats = n_repeats
+        self.max_accuracy_drop = max_accuracy_drop
+        self.oof_folds = oof_folds
+        self.parallel = parallel
+        self.batch_size = batch_size
+
+    @staticmethod
+    def load_ensemble(folder: Path) -> dict:
+        return {
+            "feature_scaler": joblib.load(folder / "feature_scaler.pkl"),
+            "xgb_model": joblib.load(folder / "xgboost_model.pkl"),
+            "lgb_model": joblib.load(folder / "lightgbm_model.pkl"),
+            "mlp_model": keras.models.load_model(folder / "mlp_model.keras"),
+            "meta_model": keras.models.load_model(folder / "meta_model.keras"),
+            "ensemble_info": joblib.load(folder / "ensemble_info.pkl"),
+        }
+
+    @staticmethod
+    def predict_proba(ensemble: dict, X: pd.DataFrame) -> np.ndarray:
+        """The serving path: scale, base-model probabilities, meta-model."""
+        X_scaled = ensemble["feature_scaler"].transform(
+            X[ensemble["ensemble_info"]["feature_names"]]
+        )
+        meta_features = np.hstack(
+            [
+                ensemble["xgb_model"].predict_proba(X_scaled),
+                ensemble["lgb_model"].predict_proba(X_scaled),
+                ensemble["mlp_model"].predict(X_scaled, verbose=0),
+            ]
+        )
+        return ensemble["meta_model"].predict(meta_features, verbose=0)
+
+    @staticmethod
+    def _xgboost_rounds(model) -> int:
+        try:
+            return model.best_iteration + 1
+        except AttributeError:
+            return model.get_booster().num_boosted_rounds()
+
+    @staticmethod
+    def _lightgbm_rounds(model) -> int:
+        return model.booster_.best_iteration or model.booster_.current_iteration()
+
+    def _shortest_rounds(self, name: str, n_rounds: int, predict_proba) -> dict:
+        """Fewest rounds whose CV log loss is within tolerance of ``n_rounds``."""
+        y_cv = self.model_data.y_cv
+        full_loss = log_loss(y_cv, predict_proba(n_rounds), labels=[0, 1, 2])
+
+        candidates = sorted({max(1, int(round(f * n_rounds))) for f in ROUND_FRACTIONS})
+        for rounds in candidates:
+            proba = predict_proba(rounds)
+            loss = log_loss(y_cv, proba, labels=[0, 1, 2])
+            if loss <= full_loss * (1 + self.round_tolerance):
+                break
+
+        logger.info(
+            f"{name}: {n_rounds} -> {rounds} rounds "
+            f"(CV log loss {full_loss:.4f} -> {loss:.4f})"
+        )
+        return {
+            "before": n_rounds,
+            "after": rounds,
+            "cv_log_loss_before": full_loss,
+            "cv_log_loss_after": loss,
+            "cv_f1_macro_after": f1_score(
+                y_cv, np.argmax(proba, axis=1), average="macro"
+            ),
+        }
+
+    def select_rounds(self, ensemble: dict) -> dict:
+        X_cv_scaled = ensemble["feature_scaler"].transform(self.model_data.X_cv)
+        xgb_model = ensemble["xgb_model"]
+        lgb_model = ensemble["lgb_model"]
+
+        return {
+            "xgboost": self._shortest_rounds(
+                "XGBoost",
+                self._xgboost_rounds(xgb_model),
+                lambda k: xgb_model.predict_proba(X_cv_scaled, iteration_range=(0, k)),
+            ),
+            "lightgbm": self._shortest_rounds(
+                "LightGBM",
+                self._lightgbm_rounds(lgb_model),
+                lambda k: lgb_model.predict_proba(X_cv_scaled, num_iteration=k),
+            ),
+        }
+
+    def feature_gains(self, ensemble: dict) -> pd.Series:
+        """
+        Increase in ensemble CV log loss when each feature is permuted,
+        averaged over ``n_repeats`` permutations.
+        """
+        rng = np.random.default_rng(RANDOM_STATE)
+        X_cv = self.model_data.X_cv
+        y_cv = self.model_data.y_cv
+        baseline = log_loss(y_cv, self.predict_proba(ensemble, X_cv), labels=[0, 1, 2])
+
+        gains = {}
+        for col in X_cv.columns:
+            losses = []
+            for _ in range(self.n_repeats):
+                X_permuted = X_cv.copy()
+                X_permuted[col] = rng.permutation(X_permuted[col].to_numpy())
+                proba = self.predict_proba(ensemble, X_permuted)
+                losses.append(log_loss(y_cv, proba, labels=[0, 1, 2]))
+            gains[col] = float(np.mean(losses) - baseline)
+        return pd.Series(gains).sort_values(ascending=False)
+
+    def select_features(self, gains: pd.Series) -> list[str]:
+        keep = gains[gains >= self.min_feature_gain].index.tolist()
+        if len(keep) < self.min_features:
+            keep = gains.index[: self.min_features].tolist()
+        # Keep the training column order.
+        return [col for col in self.model_data.X_train.columns if col in keep]
+
+    def _reduced_model_data(self, features: list[str]) -> ModelData:
+        data = self.model_data
+        return ModelData(
+            X_train=data.X_train[features],
+            y_train=data.y_train,
+            X_test=data.X_test[features],
+            y_test=data.y_test,
+            X_cv=data.X_cv[features],
+            y_cv=data.y_cv,
+        )
+
+    def _tree_params(self, ensemble: dict, rounds: dict) -> dict:
+        """Trained tree params with the truncated round counts, as tuner output."""
+        params = {}
+        for name, key in [("xgboost", "xgb_model"), ("lightgbm", "lgb_model")]:
+            model_params = {
+                param: value
+                for param, value in ensemble[key].get_params().items()
+                if value is not None
+            }
+            model_params["n_estimators"] = rounds[name]["after"]
+            params[name] = {
+                "best_params": model_params,
+                "best_score": rounds[name]["cv_f1_macro_after"],
+            }
+        return params
+
+    def retrain(self, features: list[str], tree_params: dict) -> dict:
+        imputer_state_path = self.model_folder / "imputer_state.pkl"
+        imputation_state = (
+            joblib.load(imputer_state_path) if imputer_state_path.exists() else None
+        )
+        trainer = StackedEnsembleTrainer(
+            model_data=self._reduced_model_data(features),
+            save_folder=self.output_folder,
+            optimized_params=tree_params,
+            parallel=self.parallel,
+            oof_folds=self.oof_folds,
+            imputation_state=imputation_state,
+            batch_size=self.batch_size,
+        )
+        return trainer.train_pipeline()
+
+    def _measure(self, ensemble: dict, folder: Path) -> dict:
+        X_test = self.model_data.X_test
+        batch = X_test.iloc[:LATENCY_BATCH_ROWS]
+        row = X_test.iloc[:1]
+        self.predict_proba(ensemble, row)
+
+        proba = self.predict_proba(ensemble, X_test)
+        return {
+            "test_accuracy": accuracy_score(
+                self.model_data.y_test, np.argmax(proba, axis=1)
+            ),
+            "single_row_latency_ms": median_latency_ms(
+                lambda: self.predict_proba(ensemble, row)
+            ),
+            "batch_latency_ms": median_latency_ms(
+                lambda: self.predict_proba(ensemble, batch)
+            ),
+            "size_mb": sum(
+                (folder / name).stat().st_size
+                for name in ARTIFACT_FILES
+                if (folder / name).exists()
+            )
+            / 1024**2,
+        }
+
+    def run(self) -> dict:
+        logger.info(f"Compressing the ensemble in {self.model_folder}")
+        live = self.load_ensemble(self.model_folder)
+        before = self._measure(live, self.model_folder)
+
+        rounds = self.select_rounds(live)
+        gains = self.feature_gains(live)
+        features = self.select_features(gains)
+        dropped = [col for col in self.model_data.X_train.columns if col not in features]
+        logger.info(
+            f"Keeping {len(features)} of {len(gains)} features; dropped {dropped}"
+        )
+
+        self.retrain(features, self._tree_params(live, rounds))
+        after = self._measure(self.load_ensemble(self.output_folder), self.output_folder)
+
+        accuracy_delta = after["test_accuracy"] - before["test_accuracy"]
+        report = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "source_folder": str(self.model_folder),
+            "rounds": rounds,
+            "features": {
+                "before": len(gains),
+                "after": len(features),
+                "dropped": dropped,
+                "cv_log_loss_gain": gains.round(6).to_dict(),
+            },
+            **{
+                metric: {
+                    "before": before[metric],
+                    "after": after[metric],
+                    "change": after[metric] - before[metric],
+                }
+                for metric in before
+            },
+            "accepted": accuracy_delta >= -self.max_accuracy_drop,
+        }
+
+        with open(self.output_folder / REPORT_FILE, "w") as file:
+            json.dump(report, file, indent=2)
+
+        logger.info(
+            f"Compressed ensemble: test accuracy {before['test_accuracy']:.4f} -> "
+            f"{after['test_accuracy']:.4f}, single row "
+            f"{before['single_row_latency_ms']:.1f} -> "
+            f"{after['single_row_latency_ms']:.1f} ms, batch "
+            f"{before['batch_latency_ms']:.1f} -> {after['batch_latency_ms']:.1f} ms, "
+            f"size {before['size_mb']:.2f} -> {after['size_mb']:.2f} MB"
+        )
+        if not report["accepted"]:
+            logger.warning(
+                f"Compressed ensemble loses {-accuracy_delta:.4f} test accuracy, "
+                f"more than the allowed {self.max_accuracy_drop}"
+            )
+        logger.info(f"Saved compression report to {self.output_folder / REPORT_FILE}")
+        return report
+
+
+__all__ = ["EnsembleCompressor"]
@@ -1,7 +1,12 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
+from typing import Optional, Tuple
+from contextlib import nullcontext
 import logging
+import math
+import pickle
+import time
 
 import optuna
 from optuna.visualization import (
@@ -17,17 +22,128 @@ import joblib
 
 from ..utils.entity import ModelData
 from ..utils.common import setup_logger
+from ..utils.profiling import RunProfiler
 
 RANDOM_STATE = 42
 LOGGER_FILE_PATH = Path("reports") / "logs" / "Hyperparameter_tuner.log"
 logger = setup_logger("HyperparameterTuner", LOGGER_FILE_PATH)
 
+OBJECTIVES = ["score", "batch_latency_ms", "single_row_latency_ms", "model_size_mb"]
+LATENCY_BATCH_ROWS = 1000
+LATENCY_REPEATS = 5
+# Objective values recorded for a trial that failed to train.
+FAILED_TRIAL_VALUES = (0.0, math.inf, math.inf, math.inf)
+WARM_START_MODES = ["trials", "enqueue"]
+DEFAULT_WARM_START_TOP_K = 10
+
+
+def median_latency_ms(func, repeats: int = LATENCY_REPEATS) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def measure_serving_cost(model, X: pd.DataFrame) -> dict:
+    """
+    Median ``predict_proba`` latency for a batch of up to
+    ``LATENCY_BATCH_ROWS`` rows and for a single row, and the pickled size
+    of ``model``.
+    """
+    batch = X.iloc[:LATENCY_BATCH_ROWS]
+    row = X.iloc[:1]
+    # The first call pays one-off setup costs that serving does not.
+    model.predict_proba(row)
+    return {
+        "batch_latency_ms": median_latency_ms(lambda: model.predict_proba(batch)),
+        "single_row_latency_ms": median_latency_ms(lambda: model.predict_proba(row)),
+        "model_size_mb": len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+        / 1024**2,
+    }
+
+
+def pareto_front(study: optuna.Study) -> list[dict]:
+    """Non-dominated trials of a multi-objective study, best score first."""
+    front = [
+        {
+            "trial": trial.number,
+            "params": trial.params,
+            **dict(zip(OBJECTIVES, trial.values)),
+        }
+        for trial in study.best_trials
+    ]
+    return sorted(front, key=lambda entry: -entry["score"])
+
+
+def select_under_budget(
+    xgb_front: list[dict],
+    lgb_front: list[dict],
+    latency_budget_ms: float,
+    overhead_ms: float = 0.0,
+    latency: str = "single_row_latency_ms",
+) -> Tuple[dict, dict]:
+    """
+    Pair of XGBoost and LightGBM Pareto configurations with the highest
+    combined score whose ``latency`` values, plus ``overhead_ms`` for the
+    rest of the ensemble, add up to at most the budget. Falls back to the
+    fastest pair if none does.
+    """
+
+    def cost(pair):
+        return pair[0][latency] + pair[1][latency] + overhead_ms
+
+    pairs = [
+        (xgb_entry, lgb_entry) for xgb_entry in xgb_front for lgb_entry in lgb_front
+    ]
+    within = [pair for pair in pairs if cost(pair) <= latency_budget_ms]
+    if within:
+        return max(within, key=lambda pair: pair[0]["score"] + pair[1]["score"])
+
+    fastest = min(pairs, key=cost)
+    logger.warning(
+        f"No pair of Pareto configurations within {latency_budget_ms} ms; using "
+        f"the fastest ({cost(fastest):.2f} ms including {overhead_ms:.2f} ms "
+        f"for the MLP and meta-model)"
+    )
+    return fastest
+
 
 class HyperparameterTuner:
+    """
+    Optuna searches for the XGBoost and LightGBM base models.
+
+    By default each search maximizes the validation score alone. With
+    ``multi_objective=True`` every trial also measures the serving cost of its
+    model (batch and single-row prediction latency, model size) and the
+    searches return the Pareto front of score against those costs.
+
+    ``warm_start`` seeds each new study from the ``{model}_study.pkl`` saved
+    by the previous run, provided it was tuned on the same features, metric
+    and objectives: ``"trials"`` adds all of its completed trials to the new
+    study so the sampler starts from their results, ``"enqueue"`` re-evaluates
+    its ``warm_start_top_k`` best configurations first.
+    """
+
+    def __init__(
+        self,
+        model_data: ModelData,
+        save_folder: Path,
+        profiler: Optional[RunProfiler] = None,
+        multi_objective: bool = False,
+        warm_start: Optional[str] = None,
+        warm_start_top_k: int = DEFAULT_WARM_START_TOP_K,
+    ):
+        if warm_start is not None and warm_start not in WARM_START_MODES:
+            raise ValueError(f"Unsupported warm-start mode: {warm_start}")
 
-    def __init__(self, model_data: ModelData, save_folder: Path):
         self.model_data = model_data
         self.save_folder = save_folder
+        self.profiler = profiler
+        self.multi_objective = multi_objective
+        self.warm_start = warm_start
+        self.warm_start_top_k = warm_start_top_k
         self.save_folder.mkdir(parents=True, exist_ok=True)
 
         self.best_xgb_params = None
@@ -72,34 +188,24 @@ class HyperparameterTuner:
                 )
 
                 preds = model.predict(self.model_data.X_cv)
+                return self._objective_values(model, self._score(preds, metric))
 
-                if metric == "accuracy":
-                    return accuracy_score(self.model_data.y_cv, preds)
-                elif metric == "f1_macro":
-                    return f1_score(self.model_data.y_cv, preds, average="macro")
-                elif metric == "f1_weighted":
-                    return f1_score(self.model_data.y_cv, preds, average="weighted")
-                    
             except Exception as e:
                 logger.warning(f"Trial failed: {e}")
-                return 0.0  # Return worst score for failed trials
-
-        study = optuna.create_study(
-            direction="maximize",
-            study_name="xgboost_optimization",
-            sampler=optuna.samplers.TPESampler(seed=RANDOM_STATE),
-        )
+                # Return worst score for failed trials
+                return FAILED_TRIAL_VALUES if self.multi_objective else 0.0
 
+        study = self._create_study("xgboost", metric)
         study.optimize(objective, n_trials=n_trials, show_progress_bar=True)
 
-
-        self.best_xgb_params = study.best_params
-        logger.info(f"Best XGBoost {metric}: {study.best_value:.4f}")
-        logger.info(f"Best XGBoost params: {study.best_params}")
+        best_params, best_score = self._best(study)
+        self.best_xgb_params = best_params
+        logger.info(f"Best XGBoost {metric}: {best_score:.4f}")
+        logger.info(f"Best XGBoost params: {best_params}")
 
         self._save_study_results(study, "xgboost")
 
-        return study.best_params, study
+        return best_params, study
 
     def optimize_lightgbm(self, n_trials: int = 100, metric: str = "f1_macro"):
         logger.info(f"Starting LightGBM optimization with {n_trials} trials")
@@ -133,61 +239,190 @@ class HyperparameterTuner:
             )
 
             preds = model.predict(self.model_data.X_cv)
+            return self._objective_values(model, self._score(preds, metric))
 
-            if metric == "accuracy":
-                return accuracy_score(self.model_data.y_cv, preds)
-            elif metric == "f1_macro":
-                return f1_score(self.model_data.y_cv, preds, average="macro")
-            elif metric == "f1_weighted":
-                return f1_score(self.model_data.y_cv, preds, average="weighted")
+        study = self._create_study("lightgbm", metric)
+        study.optimize(objective, n_trials=n_trials, show_progress_bar=True)
 
-        study = optuna.create_study(
-            direction="maximize",
-            study_name="lightgbm_optimization",
-            sampler=optuna.samplers.TPESampler(seed=RANDOM_STATE),
+        best_params, best_score = self._best(study)
+        self.best_lgb_params = best_params
+        logger.info(f"Best LightGBM {metric}: {best_score:.4f}")
+        logger.info(f"Best LightGBM params: {best_params}")
+
+        self._save_study_results(study, "lightgbm")
+
+        return best_params, study
+
+    def _score(self, preds: np.ndarray, metric: str) -> float:
+        if metric == "accuracy":
+            return accuracy_score(self.model_data.y_cv, preds)
+        elif metric == "f1_macro":
+            return f1_score(self.model_data.y_cv, preds, average="macro")
+        elif metric == "f1_weighted":
+            return f1_score(self.model_data.y_cv, preds, average="weighted")
+
+    def _objective_values(self, model, score: float):
+        if not self.multi_objective:
+            return score
+        cost = measure_serving_cost(model, self.model_data.X_cv)
+        return (score, *(cost[name] for name in OBJECTIVES[1:]))
+
+    def _create_study(self, model_name: str, metric: str) -> optuna.Study:
+        directions = (
+            ["maximize", "minimize", "minimize", "minimize"]
+            if self.multi_objective
+            else ["maximize"]
+        )
+        feature_names = list(self.model_data.X_train.columns)
+        previous = (
+            self._load_previous_study(model_name, feature_names, metric, directions)
+            if self.warm_start is not None
+            else None
         )
 
-        study.optimize(objective, n_trials=n_trials, show_progress_bar=True)
+        # A fresh seed for a warm-started study, so its random startup trials
+        # do not repeat the previous study's.
+        seed = RANDOM_STATE + (len(previous.trials) if previous is not None else 0)
+        sampler = (
+            optuna.samplers.NSGAIISampler(seed=seed)
+            if self.multi_objective
+            else optuna.samplers.TPESampler(seed=seed)
+        )
+        study = optuna.create_study(
+            directions=directions,
+            study_name=f"{model_name}_optimization",
+            sampler=sampler,
+        )
+        study.set_user_attr("feature_names", feature_names)
+        study.set_user_attr("metric", metric)
+
+        if previous is not None:
+            self._warm_start(study, previous, model_name)
+        return study
+
+    def _load_previous_study(
+        self,
+        model_name: str,
+        feature_names: list[str],
+        metric: str,
+        directions: list[str],
+    ) -> Optional[optuna.Study]:
+        """
+        The study saved for ``model_name`` by the previous run, if it was tuned
+        on the same features, metric and objectives.
+        """
+        path = self.save_folder / f"{model_name}_study.pkl"
+        if not path.exists():
+            logger.info(f"No previous {model_name} study to warm-start from")
+            return None
+
+        try:
+            previous = joblib.load(path)
+        except Exception as e:
+            logger.warning(f"Could not load previous {model_name} study: {e}")
+            return None
+
+        if previous.user_attrs.get("feature_names") != feature_names:
+            reason = "different features"
+        elif previous.user_attrs.get("metric") != metric:
+            reason = "a different metric"
+        elif [d.name.lower() for d in previous.directions] != directions:
+            reason = "different objectives"
+        else:
+            return previous
+
+        logger.info(
+            f"Previous {model_name} study was tuned with {reason}; "
+            f"starting from scratch"
+        )
+        return None
 
-        self.best_lgb_params = study.best_params
-        logger.info(f"Best LightGBM {metric}: {study.best_value:.4f}")
-        logger.info(f"Best LightGBM params: {study.best_params}")
+    def _warm_start(
+        self, study: optuna.Study, previous: optuna.Study, model_name: str
+    ) -> None:
+        completed = previous.get_trials(
+            deepcopy=False, states=[optuna.trial.TrialState.COMPLETE]
+        )
+        if self.warm_start == "trials":
+            study.add_trials(completed)
+            logger.info(
+                f"Warm-started {model_name} study with {len(completed)} "
+                f"previous trials"
+            )
+            return
+
+        ranked = sorted(completed, key=lambda trial: -trial.values[0])
+        for trial in ranked[: self.warm_start_top_k]:
+            study.enqueue_trial(trial.params, skip_if_exists=True)
+        logger.info(
+            f"Enqueued the top {min(len(ranked), self.warm_start_top_k)} "
+            f"previous {model_name} configurations"
+        )
 
-        self._save_study_results(study, "lightgbm")
+    def _best(self, study: optuna.Study) -> Tuple[dict, float]:
+        """
+        Params and score of the best trial; for a multi-objective study, the
+        highest-scoring trial on the Pareto front.
+        """
+        if not self.multi_objective:
+            return study.best_params, study.best_value
 
-        return study.best_params, study
+        best = pareto_front(study)[0]
+        return best["params"], best["score"]
 
     def _save_study_results(self, study: optuna.Study, model_name: str):
         """Save optimization results and visualizations"""
 
         # Save best params
         joblib.dump(
-            study.best_params, self.save_folder / f"{model_name}_best_params.pkl"
+            self._best(study)[0], self.save_folder / f"{model_name}_best_params.pkl"
         )
 
+        if self.multi_objective:
+            front = pareto_front(study)
+            joblib.dump(front, self.save_folder / f"{model_name}_pareto_front.pkl")
+            logger.info(f"{model_name} Pareto front ({len(front)} trials):")
+            for entry in front:
+                logger.info(
+                    f"  - trial {entry['trial']}: score {entry['score']:.4f}, "
+                    f"batch {entry['batch_latency_ms']:.1f} ms, single row "
+                    f"{entry['single_row_latency_ms']:.2f} ms, "
+                    f"{entry['model_size_mb']:.2f} MB"
+                )
+
         # Save study object
         joblib.dump(study, self.save_folder / f"{model_name}_study.pkl")
 
         viz_folder = self.save_folder / "optuna_viz"
         viz_folder.mkdir(exist_ok=True)
 
+    def _profiled(self, step: str):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.step(step, rows=len(self.model_data.y_train))
+
     def optimize_all(self, xgb_trials: int = 100, lgb_trials: int = 100):
         logger.info("\nOptimizing XGBoost")
-        xgb_params, xgb_study = self.optimize_xgboost(n_trials=xgb_trials)
+        with self._profiled("tune_xgboost"):
+            xgb_params, xgb_study = self.optimize_xgboost(n_trials=xgb_trials)
 
         logger.info("\nOptimizing LightGBM")
-        lgb_params, lgb_study = self.optimize_lightgbm(n_trials=lgb_trials)
+        with self._profiled("tune_lightgbm"):
+            lgb_params, lgb_study = self.optimize_lightgbm(n_trials=lgb_trials)
 
         summary = {
             "xgboost": {
-                "best_score": xgb_study.best_value,
+                "best_score": self._best(xgb_study)[1],
                 "best_params": xgb_params,
             },
             "lightgbm": {
-                "best_score": lgb_study.best_value,
+                "best_score": self._best(lgb_study)[1],
                 "best_params": lgb_params,
             },
         }
+        if self.multi_objective:
+            summary["xgboost"]["pareto_front"] = pareto_front(xgb_study)
+            summary["lightgbm"]["pareto_front"] = pareto_front(lgb_study)
 
         joblib.dump(summary, self.save_folder / "optimization_summary.pkl")
         logger.info(f"Saved optimization summary to {self.save_folder}")
@@ -195,4 +430,12 @@ class HyperparameterTuner:
         return summary
 
 
-__all__ = ["HyperparameterTuner"]
+__all__ = [
+    "HyperparameterTuner",
+    "OBJECTIVES",
+    "WARM_START_MODES",
+    "measure_serving_cost",
+    "median_latency_ms",
+    "pareto_front",
+    "select_under_budget",
+]
@@ -0,0 +1,367 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import Optional
+import os
+import shutil
+
+from tensorflow import keras
+from sklearn.utils.class_weight import compute_class_weight
+from sklearn.metrics import accuracy_score
+
+import xgboost as xgb
+import lightgbm as lgb
+import joblib
+
+from ..utils.entity import ModelData
+from ..utils.common import setup_logger
+from ..utils.data_io import DEFAULT_FORMAT, ROW_ID_SPLITS, save_model_data
+from .input_pipeline import DEFAULT_BATCH_SIZE, fit_with_input_pipeline
+from .model_bundle import BUNDLE_FILE, write_model_bundle
+
+RANDOM_STATE = 42
+LOGGER_FILE_PATH = Path("reports") / "logs" / "Incremental_trainer.log"
+logger = setup_logger("IncrementalTrainer", LOGGER_FILE_PATH)
+
+MODEL_FILES = [
+    "xgboost_model.pkl",
+    "lightgbm_model.pkl",
+    "mlp_model.keras",
+    "meta_model.keras",
+    "ensemble_info.pkl",
+]
+
+
+class IncrementalTrainer:
+    """
+    Warm-start the saved stacked ensemble on newly arrived catalog rows.
+
+    The boosted models continue from their saved trees, the MLP and the
+    meta-model are fine-tuned from their saved weights, and the feature scaler
+    is kept as-is so all base models keep seeing the same feature space. New
+    rows are mixed with a replay sample of the original training split so the
+    update does not forget the old catalog. The candidate is written to
+    ``<model_folder>/candidate`` and only replaces the live models when its
+    held-out test accuracy does not drop by more than ``tolerance``.
+
+    Rows whose id is in ``stale_row_ids`` (previous versions of changed or
+    removed catalog rows) are dropped from every split first. On promotion
+    the splits, with the new rows appended to the training split, are saved
+    to ``data_folder`` so the next update replays the current catalog.
+    """
+
+    def __init__(
+        self,
+        model_data: ModelData,
+        X_new: pd.DataFrame,
+        y_new: pd.Series,
+        model_folder: Path,
+        boost_rounds: int = 100,
+        mlp_epochs: int = 30,
+        meta_epochs: int = 30,
+        replay_ratio: float = 1.0,
+        tolerance: float = 0.0,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        data_folder: Optional[Path] = None,
+        new_row_ids: Optional[pd.Series] = None,
+        stale_row_ids: Optional[pd.Series] = None,
+    ):
+        self.model_data = self._drop_stale_rows(model_data, stale_row_ids)
+        self.X_new = X_new
+        self.y_new = y_new
+        self.new_row_ids = new_row_ids
+        self.data_folder = data_folder
+        self.batch_size = batch_size
+        self.model_folder = model_folder
+        self.candidate_folder = model_folder / "candidate"
+        self.boost_rounds = boost_rounds
+        self.mlp_epochs = mlp_epochs
+        self.meta_epochs = meta_epochs
+        self.tolerance = tolerance
+
+        self.X_update, self.y_update = self._build_update_set(
+            X_new, y_new, replay_ratio
+        )
+
+        self.feature_scaler = None
+        self.xgb_model = None
+        self.lgb_model = None
+        self.mlp_model = None
+        self.meta_model = None
+        self.ensemble_info = None
+
+    @staticmethod
+    def _drop_stale_rows(
+        model_data: ModelData, stale_row_ids: Optional[pd.Series]
+    ) -> ModelData:
+        if stale_row_ids is None or stale_row_ids.empty:
+            return model_data
+        if model_data.row_ids is None:
+            logger.warning(
+                "Processed splits have no row ids; previous versions of "
+                "changed rows stay in them"
+            )
+            return model_data
+
+        splits, ids, n_dropped = {}, {}, 0
+        for split in ROW_ID_SPLITS:
+            keep = ~model_data.row_ids[split].isin(stale_row_ids).to_numpy()
+            n_dropped += int((~keep).sum())
+            for prefix in ["X", "y"]:
+                name = f"{prefix}_{split}"
+                splits[name] = getattr(model_data, name)[keep].reset_index(drop=True)
+            ids[split] = model_data.row_ids[split][keep].reset_index(drop=True)
+
+        logger.info(f"Dropped {n_dropped} rows superseded by the new catalog")
+        return ModelData(**splits, row_ids=ids)
+
+    def updated_model_data(self) -> ModelData:
+        """The splits with the new rows appended to the training split."""
+        row_ids = None
+        if self.model_data.row_ids is not None and self.new_row_ids is not None:
+            row_ids = dict(self.model_data.row_ids)
+            row_ids["train"] = pd.concat(
+                [row_ids["train"], self.new_row_ids], ignore_index=True
+            )
+        return ModelData(
+            X_train=pd.concat(
+                [self.model_data.X_train, self.X_new[self.model_data.X_train.columns]],
+                ignore_index=True,
+            ),
+            y_train=pd.concat(
+                [self.model_data.y_train, self.y_new.astype(int)], ignore_index=True
+            ),
+            X_test=self.model_data.X_test,
+            y_test=self.model_data.y_test,
+            X_cv=self.model_data.X_cv,
+            y_cv=self.model_data.y_cv,
+            row_ids=row_ids,
+        )
+
+    def _build_update_set(
+        self, X_new: pd.DataFrame, y_new: pd.Series, replay_ratio: float
+    ) -> tuple[pd.DataFrame, pd.Series]:
+        n_replay = min(len(self.model_data.X_train), int(len(X_new) * replay_ratio))
+        replay_index = self.model_data.y_train.sample(
+            n=n_replay, random_state=RANDOM_STATE
+        ).index
+        # Every label must be present in each fit call, so replay at least one
+        # row per class even when the new rows do not cover all of them.
+        replay_index = replay_index.union(self.model_data.y_train.drop_duplicates().index)
+
+        X_update = pd.concat(
+            [X_new, self.model_data.X_train.loc[replay_index]], ignore_index=True
+        )
+        y_update = pd.concat(
+            [y_new, self.model_data.y_train.loc[replay_index]], ignore_index=True
+        )
+        logger.info(
+            f"Update set: {len(X_new)} new rows + {len(replay_index)} replayed rows"
+        )
+        return X_update, y_update.astype(int)
+
+    def _sample_weights(self, y: pd.Series) -> np.ndarray:
+        classes = np.unique(y)
+        weights = dict(
+            zip(classes, compute_class_weight("balanced", classes=classes, y=y))
+        )
+        return np.array([weights[label] for label in y])
+
+    def load_current_models(self):
+        self.feature_scaler = joblib.load(self.model_folder / "feature_scaler.pkl")
+        self.xgb_model = joblib.load(self.model_folder / "xgboost_model.pkl")
+        self.lgb_model = joblib.load(self.model_folder / "lightgbm_model.pkl")
+        self.mlp_model = keras.models.load_model(self.model_folder / "mlp_model.keras")
+        self.meta_model = keras.models.load_model(
+            self.model_folder / "meta_model.keras"
+        )
+        self.ensemble_info = joblib.load(self.model_folder / "ensemble_info.pkl")
+        logger.info(f"Loaded current ensemble from {self.model_folder}")
+
+    def _meta_features(self, X_scaled: np.ndarray) -> np.ndarray:
+        return np.hstack(
+            [
+                self.xgb_model.predict_proba(X_scaled),
+                self.lgb_model.predict_proba(X_scaled),
+                self.mlp_model.predict(X_scaled, batch_size=1024, verbose=0),
+            ]
+        )
+
+    def _test_accuracy(self) -> float:
+        X_test_scaled = self.feature_scaler.transform(self.model_data.X_test)
+        meta_proba = self.meta_model.predict(
+            self._meta_features(X_test_scaled), verbose=0
+        )
+        return accuracy_score(self.model_data.y_test, np.argmax(meta_proba, axis=1))
+
+    def continue_xgboost(self, X_scaled, y, sample_weights, X_cv_scaled):
+        params = self.xgb_model.get_params()
+        params["n_estimators"] = self.boost_rounds
+
+        model = xgb.XGBClassifier(**params)
+        model.fit(
+            X_scaled,
+            y,
+            sample_weight=sample_weights,
+            eval_set=[(X_cv_scaled, self.model_data.y_cv)],
+            xgb_model=self.xgb_model.get_booster(),
+            verbose=50,
+        )
+        self.xgb_model = model
+        logger.info(
+            f"XGBoost continued to {model.get_booster().num_boosted_rounds()} rounds"
+        )
+
+    def continue_lightgbm(self, X_scaled, y, sample_weights, X_cv_scaled):
+        params = self.lgb_model.get_params()
+        params["n_estimators"] = self.boost_rounds
+
+        model = lgb.LGBMClassifier(**params)
+        model.fit(
+            X_scaled,
+            y,
+            sample_weight=sample_weights,
+            eval_set=[(X_cv_scaled, self.model_data.y_cv)],
+            init_model=self.lgb_model.booster_,
+            callbacks=[lgb.early_stopping(50), lgb.log_evaluation(50)],
+        )
+        self.lgb_model = model
+        logger.info(f"LightGBM continued to {model.booster_.current_iteration()} rounds")
+
+    def _fine_tune(self, model, X, y, X_val, y_val, epochs, sample_weights=None):
+        learning_rate = float(keras.ops.convert_to_numpy(model.optimizer.learning_rate))
+        model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=learning_rate * 0.1),
+            loss="sparse_categorical_crossentropy",
+            metrics=["accuracy"],
+        )
+        early_stop = keras.callbacks.EarlyStopping(
+            monitor="val_loss", patience=5, restore_best_weights=True
+        )
+        # The saved weights are trained already, so no warmup.
+        fit_with_input_pipeline(
+            model,
+            X,
+            y,
+            X_val,
+            y_val,
+            sample_weights=sample_weights,
+            batch_size=self.batch_size,
+            epochs=epochs,
+            warmup_epochs=0,
+            callbacks=[early_stop],
+            name=model.name,
+            verbose=0,
+        )
+
+    def fine_tune_mlp(self, X_scaled, y, sample_weights, X_cv_scaled):
+        self._fine_tune(
+            self.mlp_model,
+            X_scaled,
+            y,
+            X_cv_scaled,
+            self.model_data.y_cv,
+            self.mlp_epochs,
+            sample_weights,
+        )
+        logger.info("Fine-tuned MLP from saved weights")
+
+    def fine_tune_meta_model(self, X_scaled, y, X_cv_scaled):
+        self._fine_tune(
+            self.meta_model,
+            self._meta_features(X_scaled),
+            y,
+            self._meta_features(X_cv_scaled),
+            self.model_data.y_cv,
+            self.meta_epochs,
+        )
+        logger.info("Fine-tuned meta-model from saved weights")
+
+    def save_candidate(self):
+        folder = self.candidate_folder
+        shutil.rmtree(folder, ignore_errors=True)
+        folder.mkdir(parents=True)
+
+        joblib.dump(self.xgb_model, folder / "xgboost_model.pkl")
+        joblib.dump(self.lgb_model, folder / "lightgbm_model.pkl")
+        self.mlp_model.save(folder / "mlp_model.keras")
+        self.meta_model.save(folder / "meta_model.keras")
+
+        ensemble_info = dict(self.ensemble_info)
+        ensemble_info.update(
+            {
+                "training_date": pd.Timestamp.now().isoformat(),
+                "incremental_updates": ensemble_info.get("incremental_updates", 0) + 1,
+                "incremental_rows": len(self.y_update),
+            }
+        )
+        joblib.dump(ensemble_info, folder / "ensemble_info.pkl")
+        logger.info(f"Saved candidate models to {folder}")
+
+    def promote_candidate(self):
+        """Swap the candidate files in, keeping the replaced ones in ``previous/``."""
+        previous_folder = self.model_folder / "previous"
+        shutil.rmtree(previous_folder, ignore_errors=True)
+        previous_folder.mkdir(parents=True)
+
+        for file_name in MODEL_FILES:
+            live_path = self.model_folder / file_name
+            if live_path.exists():
+                shutil.copy2(live_path, previous_folder / file_name)
+            os.replace(self.candidate_folder / file_name, live_path)
+
+        bundle_path = self.model_folder / BUNDLE_FILE
+        if bundle_path.exists():
+            shutil.copy2(bundle_path, previous_folder / BUNDLE_FILE)
+        write_model_bundle(self.model_folder)
+
+        shutil.rmtree(self.candidate_folder, ignore_errors=True)
+        logger.info(
+            f"Promoted candidate models; previous version kept in {previous_folder}"
+        )
+
+        if self.data_folder is not None:
+            save_model_data(
+                self.updated_model_data(), self.data_folder, file_format=DEFAULT_FORMAT
+            )
+            logger.info(f"Saved the updated splits to {self.data_folder}")
+
+    def run(self) -> dict:
+        logger.info("Starting incremental retraining...")
+        self.load_current_models()
+
+        baseline_accuracy = self._test_accuracy()
+        logger.info(f"Current ensemble test accuracy: {baseline_accuracy:.4f}")
+
+        X_scaled = self.feature_scaler.transform(self.X_update)
+        X_cv_scaled = self.feature_scaler.transform(self.model_data.X_cv)
+        sample_weights = self._sample_weights(self.y_update)
+
+        self.continue_xgboost(X_scaled, self.y_update, sample_weights, X_cv_scaled)
+        self.continue_lightgbm(X_scaled, self.y_update, sample_weights, X_cv_scaled)
+        self.fine_tune_mlp(X_scaled, self.y_update, sample_weights, X_cv_scaled)
+        self.fine_tune_meta_model(X_scaled, self.y_update, X_cv_scaled)
+
+        candidate_accuracy = self._test_accuracy()
+        logger.info(f"Candidate ensemble test accuracy: {candidate_accuracy:.4f}")
+
+        self.save_candidate()
+        promoted = candidate_accuracy >= baseline_accuracy - self.tolerance
+        if promoted:
+            self.promote_candidate()
+        else:
+            logger.warning(
+                f"Candidate not promoted: test accuracy {candidate_accuracy:.4f} "
+                f"is below current {baseline_accuracy:.4f} "
+                f"(tolerance {self.tolerance})"
+            )
+
+        return {
+            "promoted": promoted,
+            "baseline_accuracy": baseline_accuracy,
+            "candidate_accuracy": candidate_accuracy,
+            "n_update_rows": len(self.y_update),
+        }
+
+
+__all__ = ["IncrementalTrainer"]
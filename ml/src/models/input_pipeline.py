@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Optional, Union
+import math
+import time
+
+import tensorflow as tf
+from tensorflow import keras
+
+from ..utils.common import setup_logger
+
+RANDOM_STATE = 42
+LOGGER_FILE_PATH = Path("reports") / "logs" / "Input_pipeline.log"
+logger = setup_logger("InputPipeline", LOGGER_FILE_PATH)
+
+# The batch size the MLP and meta-model learning rates were tuned for.
+BASE_BATCH_SIZE = 32
+DEFAULT_BATCH_SIZE = 256
+EVAL_BATCH_SIZE = 4096
+DEFAULT_WARMUP_EPOCHS = 5
+LR_SCALING_RULES = ("linear", "sqrt", "none")
+
+ArrayLike = Union[np.ndarray, pd.Series, pd.DataFrame]
+
+
+def scaled_learning_rate(
+    base_learning_rate: float,
+    batch_size: int,
+    rule: str = "sqrt",
+    base_batch_size: int = BASE_BATCH_SIZE,
+) -> float:
+    """
+    Learning rate for ``batch_size`` given one tuned at ``base_batch_size``.
+    ``sqrt`` suits Adam; ``linear`` is the usual rule for SGD.
+    """
+    if rule not in LR_SCALING_RULES:
+        raise ValueError(f"Unsupported learning-rate scaling rule: {rule}")
+
+    ratio = batch_size / base_batch_size
+    if rule == "linear":
+        return base_learning_rate * ratio
+    if rule == "sqrt":
+        return base_learning_rate * math.sqrt(ratio)
+    return base_learning_rate
+
+
+def make_dataset(
+    X: ArrayLike,
+    y: ArrayLike,
+    sample_weights: Optional[np.ndarray] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    shuffle: bool = True,
+    seed: int = RANDOM_STATE,
+) -> tf.data.Dataset:
+    """
+    Cached, shuffled (reshuffled every epoch), batched and prefetched
+    dataset over in-memory arrays, so the training loop is not fed batch by
+    batch from Python.
+    """
+    tensors = (
+        np.asarray(X, dtype=np.float32),
+        np.asarray(y, dtype=np.int32),
+    )
+    if sample_weights is not None:
+        tensors += (np.asarray(sample_weights, dtype=np.float32),)
+
+    dataset = tf.data.Dataset.from_tensor_slices(tensors).cache()
+    if shuffle:
+        dataset = dataset.shuffle(
+            len(tensors[0]), seed=seed, reshuffle_each_iteration=True
+        )
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+@keras.utils.register_keras_serializable(package="exoplanet")
+class LearningRateWarmup(keras.optimizers.schedules.LearningRateSchedule):
+    """
+    Learning rate that ramps linearly up to ``learning_rate`` over the first
+    ``warmup_steps`` optimizer steps, then stays constant. Large-batch
+    training with a scaled learning rate is unstable from random weights
+    otherwise. The rate is computed inside the compiled train step, so the
+    warmup adds no Python call per batch. The constant rate is a variable
+    that ``ReduceLROnPlateau`` below can lower.
+    """
+
+    def __init__(self, learning_rate: float, warmup_steps: int):
+        self.learning_rate = keras.Variable(
+            learning_rate, dtype="float32", trainable=False, name="learning_rate"
+        )
+        self.warmup_steps = warmup_steps
+
+    def __call__(self, step):
+        progress = keras.ops.cast(step + 1, "float32") / self.warmup_steps
+        return self.learning_rate * keras.ops.minimum(progress, 1.0)
+
+    def get_config(self) -> dict:
+        return {
+            "learning_rate": float(keras.ops.convert_to_numpy(self.learning_rate)),
+            "warmup_steps": self.warmup_steps,
+        }
+
+
+class ReduceLROnPlateau(keras.callbacks.ReduceLROnPlateau):
+    """
+    ``keras.callbacks.ReduceLROnPlateau`` that also works during and after a
+    ``LearningRateWarmup``: an optimizer created with a schedule does not let
+    its rate be set, so the schedule's constant rate is lowered instead.
+    """
+
+    def _reduce_optimizer_lr(self, optimizer, epoch, name=""):
+        schedule = optimizer._learning_rate
+        if not isinstance(schedule, LearningRateWarmup):
+            return super()._reduce_optimizer_lr(optimizer, epoch, name)
+
+        old_lr = float(keras.ops.convert_to_numpy(schedule.learning_rate))
+        if old_lr <= np.float32(self.min_lr):
+            return False
+        new_lr = max(old_lr * self.factor, self.min_lr)
+        schedule.learning_rate.assign(new_lr)
+        if self.verbose > 0:
+            logger.info(
+                f"Epoch {epoch + 1}: ReduceLROnPlateau reducing learning rate "
+                f"to {new_lr}."
+            )
+        return True
+
+
+class StepsPerSecond(keras.callbacks.Callback):
+    """
+    Training throughput per epoch, in optimizer steps and samples per second,
+    from the ``steps_per_epoch`` steps of each epoch and its wall time
+    (validation included). Only epoch hooks are used, so no Python runs
+    between batches.
+    """
+
+    def __init__(self, name: str, batch_size: int, steps_per_epoch: int):
+        super().__init__()
+        self.name = name
+        self.batch_size = batch_size
+        self.steps_per_epoch = steps_per_epoch
+        self.steps_per_second = []
+        self._epoch_start = None
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        rate = self.steps_per_epoch / (time.perf_counter() - self._epoch_start)
+        self.steps_per_second.append(rate)
+        logger.debug(f"{self.name} epoch {epoch + 1}: {rate:.1f} steps/s")
+
+    def on_train_end(self, logs=None):
+        if not self.steps_per_second:
+            return
+        rate = float(np.median(self.steps_per_second))
+        logger.info(
+            f"{self.name}: {rate:.1f} steps/s, {rate * self.batch_size:.0f} "
+            f"samples/s (median over {len(self.steps_per_second)} epochs, "
+            f"batch size {self.batch_size})"
+        )
+
+
+def fit_with_input_pipeline(
+    model: keras.Model,
+    X_train: ArrayLike,
+    y_train: ArrayLike,
+    X_val: ArrayLike,
+    y_val: ArrayLike,
+    sample_weights: Optional[np.ndarray] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    epochs: int = 100,
+    warmup_epochs: int = DEFAULT_WARMUP_EPOCHS,
+    callbacks: Optional[list] = None,
+    name: str = "model",
+    verbose: int = 1,
+) -> keras.callbacks.History:
+    """
+    ``model.fit`` over ``make_dataset`` pipelines, with learning-rate warmup
+    and a throughput measurement. ``model`` must already be compiled with the
+    learning rate meant for ``batch_size`` (see ``scaled_learning_rate``).
+    With warmup, the optimizer keeps the ``LearningRateWarmup`` schedule, so
+    lower its rate with this module's ``ReduceLROnPlateau``.
+    """
+    train_dataset = make_dataset(X_train, y_train, sample_weights, batch_size)
+    val_dataset = make_dataset(X_val, y_val, batch_size=EVAL_BATCH_SIZE, shuffle=False)
+
+    steps_per_epoch = math.ceil(len(X_train) / batch_size)
+    throughput = StepsPerSecond(name, batch_size, steps_per_epoch)
+    callbacks = list(callbacks or []) + [throughput]
+    if warmup_epochs:
+        model.optimizer.learning_rate = LearningRateWarmup(
+            float(keras.ops.convert_to_numpy(model.optimizer.learning_rate)),
+            warmup_epochs * steps_per_epoch,
+        )
+
+    history = model.fit(
+        train_dataset,
+        validation_data=val_dataset,
+        epochs=epochs,
+        callbacks=callbacks,
+        # The dataset reshuffles itself every epoch.
+        shuffle=False,
+        verbose=verbose,
+    )
+    history.history["steps_per_second"] = throughput.steps_per_second
+    return history
+
+
+__all__ = [
+    "BASE_BATCH_SIZE",
+    "DEFAULT_BATCH_SIZE",
+    "EVAL_BATCH_SIZE",
+    "LR_SCALING_RULES",
+    "scaled_learning_rate",
+    "make_dataset",
+    "LearningRateWarmup",
+    "ReduceLROnPlateau",
+    "StepsPerSecond",
+    "fit_with_input_pipeline",
+]
@@ -0,0 +1,97 @@
+import numpy as np
+from pathlib import Path
+from typing import Optional, Tuple
+import hashlib
+import os
+import shutil
+
+from ..utils.common import setup_logger
+
+LOGGER_FILE_PATH = Path("reports") / "logs" / "Meta_feature_cache.log"
+logger = setup_logger("MetaFeatureCache", LOGGER_FILE_PATH)
+
+SPLITS = ("train", "cv", "test")
+
+
+def _hash_xgboost(digest, model) -> None:
+    digest.update(bytes(model.get_booster().save_raw("ubj")))
+
+
+def _hash_lightgbm(digest, model) -> None:
+    digest.update(model.booster_.model_to_string().encode())
+
+
+def _hash_keras(digest, model) -> None:
+    for weights in model.get_weights():
+        digest.update(str(weights.shape).encode())
+        digest.update(np.ascontiguousarray(weights).tobytes())
+
+
+class MetaFeatureCache:
+    """
+    On-disk cache of the meta-model's input matrices.
+
+    Entries are keyed by a hash of the fitted base models and of the scaled
+    data split, and stored as plain ``.npy`` files so they can be memory-mapped
+    back without copying.
+    """
+
+    def __init__(self, cache_folder: Path):
+        self.cache_folder = cache_folder
+
+    @staticmethod
+    def key(
+        xgb_model,
+        lgb_model,
+        mlp_model,
+        X_train: np.ndarray,
+        X_cv: np.ndarray,
+        X_test: np.ndarray,
+        oof_folds: int = 0,
+    ) -> str:
+        digest = hashlib.sha256()
+        _hash_xgboost(digest, xgb_model)
+        _hash_lightgbm(digest, lgb_model)
+        _hash_keras(digest, mlp_model)
+
+        for array in (X_train, X_cv, X_test):
+            array = np.ascontiguousarray(array)
+            digest.update(f"{array.shape}{array.dtype}".encode())
+            digest.update(array.tobytes())
+
+        digest.update(f"oof_folds={oof_folds}".encode())
+        return digest.hexdigest()[:16]
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_folder / key
+
+    def load(self, key: str) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        entry_dir = self._entry_dir(key)
+        paths = [entry_dir / f"meta_{split}.npy" for split in SPLITS]
+        if not all(path.exists() for path in paths):
+            return None
+
+        logger.info(f"Loading cached meta-features from {entry_dir}")
+        return tuple(np.load(path, mmap_mode="r") for path in paths)
+
+    def save(
+        self,
+        key: str,
+        meta_train: np.ndarray,
+        meta_cv: np.ndarray,
+        meta_test: np.ndarray,
+    ) -> None:
+        entry_dir = self._entry_dir(key)
+        tmp_dir = entry_dir.with_name(f"{key}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        for split, matrix in zip(SPLITS, (meta_train, meta_cv, meta_test)):
+            np.save(tmp_dir / f"meta_{split}.npy", np.ascontiguousarray(matrix))
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+        logger.info(f"Cached meta-features to {entry_dir}")
+
+
+__all__ = ["MetaFeatureCache"]
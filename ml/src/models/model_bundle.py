@@ -0,0 +1,177 @@
+"""
+Single-file model bundle.
+
+Layout (all integers little-endian)::
+
+    magic "EXOBUNDL" | format version u32 | reserved u32 | header length u64
+    header: UTF-8 JSON index
+    sections, each starting on a ``ALIGNMENT``-byte boundary
+
+The header lists every section (offset, length, sha256, and dtype/shape for
+arrays) and every object, i.e. how to rebuild a model from its sections:
+``pickle`` objects are the bytes of the saved ``.pkl`` file, ``keras`` objects
+are a JSON architecture section plus one array section per weight. The reader
+lives in ``django_backend/api/model_bundle.py``.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import joblib
+from tensorflow import keras
+
+from ..utils.common import setup_logger
+
+LOGGER_FILE_PATH = Path("reports") / "logs" / "Model_bundle.log"
+logger = setup_logger("ModelBundle", LOGGER_FILE_PATH)
+
+BUNDLE_FILE = "ensemble.bundle"
+MAGIC = b"EXOBUNDL"
+FORMAT_VERSION = 1
+ALIGNMENT = 4096
+PREFIX = struct.Struct("<8sIIQ")
+
+# Object name -> (kind, file in the model folder, required)
+BUNDLE_OBJECTS = {
+    "feature_scaler": ("pickle", "feature_scaler.pkl", True),
+    "xgb_model": ("pickle", "xgboost_model.pkl", True),
+    "lgb_model": ("pickle", "lightgbm_model.pkl", True),
+    "mlp_model": ("keras", "mlp_model.keras", True),
+    "meta_model": ("keras", "meta_model.keras", True),
+    "ensemble_info": ("pickle", "ensemble_info.pkl", True),
+    "imputer_state": ("pickle", "imputer_state.pkl", False),
+    "student_model": ("pickle", "student_model.pkl", False),
+    "student_info": ("pickle", "student_info.pkl", False),
+}
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class ModelBundleWriter:
+    def __init__(self):
+        self.sections = {}
+        self.objects = {}
+        self._payloads = {}
+
+    def _add_section(self, name: str, payload: bytes, **meta) -> str:
+        if name in self.sections:
+            raise ValueError(f"Duplicate bundle section: {name}")
+        self.sections[name] = {
+            "length": len(payload),
+            "sha256": hashlib.sha256(payload).hexdigest(),
+            **meta,
+        }
+        self._payloads[name] = payload
+        return name
+
+    def add_array(self, name: str, array: np.ndarray) -> str:
+        array = np.ascontiguousarray(array)
+        return self._add_section(
+            name,
+            array.tobytes(),
+            kind="array",
+            dtype=array.dtype.str,
+            shape=list(array.shape),
+        )
+
+    def add_pickle(self, name: str, payload: bytes) -> None:
+        """Bytes of a joblib/pickle file, stored as-is."""
+        self.objects[name] = {"kind": "pickle", "section": name}
+        self._add_section(name, payload, kind="pickle")
+
+    def add_keras(self, name: str, model: keras.Model) -> None:
+        config = self._add_section(
+            f"{name}/config", model.to_json().encode("utf-8"), kind="json"
+        )
+        weights = [
+            self.add_array(f"{name}/weight_{i}", weight)
+            for i, weight in enumerate(model.get_weights())
+        ]
+        self.objects[name] = {"kind": "keras", "config": config, "weights": weights}
+
+    def write(self, path: Path, metadata: Optional[dict] = None) -> Path:
+        """Write the bundle atomically, so readers never see a partial file."""
+        # Offsets depend on the header length, which depends on the offsets;
+        # reserve room for the header until it fits.
+        header_capacity = ALIGNMENT
+        while True:
+            offset = _aligned(PREFIX.size + header_capacity)
+            for name, section in self.sections.items():
+                section["offset"] = offset
+                offset = _aligned(offset + section["length"])
+
+            header = json.dumps(
+                {
+                    "format_version": FORMAT_VERSION,
+                    "alignment": ALIGNMENT,
+                    "metadata": metadata or {},
+                    "objects": self.objects,
+                    "sections": self.sections,
+                }
+            ).encode("utf-8")
+            if len(header) <= header_capacity:
+                break
+            header_capacity = _aligned(len(header))
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as file:
+            file.write(PREFIX.pack(MAGIC, FORMAT_VERSION, 0, len(header)))
+            file.write(header)
+            for name, section in self.sections.items():
+                file.seek(section["offset"])
+                file.write(self._payloads[name])
+            file.truncate(offset)
+        os.replace(tmp_path, path)
+        return path
+
+
+def write_model_bundle(model_folder: Path, path: Optional[Path] = None) -> Path:
+    """Bundle the model files saved in ``model_folder`` into ``ensemble.bundle``."""
+    path = path or model_folder / BUNDLE_FILE
+    writer = ModelBundleWriter()
+
+    for name, (kind, file_name, required) in BUNDLE_OBJECTS.items():
+        file_path = model_folder / file_name
+        if not file_path.exists():
+            if required:
+                raise FileNotFoundError(f"Cannot bundle missing model file {file_path}")
+            continue
+        if kind == "pickle":
+            writer.add_pickle(name, file_path.read_bytes())
+        else:
+            # Only the architecture and weights are bundled.
+            writer.add_keras(name, keras.models.load_model(file_path, compile=False))
+
+    ensemble_info = joblib.load(model_folder / "ensemble_info.pkl")
+    writer.write(
+        path, metadata={"training_date": ensemble_info.get("training_date")}
+    )
+    logger.info(
+        f"Wrote model bundle {path} ({path.stat().st_size / 1024**2:.2f} MB, "
+        f"{len(writer.sections)} sections)"
+    )
+    return path
+
+
+def main(argv=None):
+    """Bundle an existing model folder: ``python -m src.models.model_bundle models``."""
+    argv = argv if argv is not None else sys.argv[1:]
+    if len(argv) != 1:
+        raise SystemExit("usage: python -m src.models.model_bundle MODEL_FOLDER")
+    print(write_model_bundle(Path(argv[0])))
+    return 0
+
+
+__all__ = ["BUNDLE_FILE", "ModelBundleWriter", "write_model_bundle"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
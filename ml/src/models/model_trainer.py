@@ -1,40 +1,103 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Tuple
-import logging
+from typing import Optional, Tuple
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 
-import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers, models
 from sklearn.preprocessing import StandardScaler
 from sklearn.utils.class_weight import compute_class_weight
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
 
-import xgboost as xgb
-import lightgbm as lgb
 import joblib
 
 from ..utils.entity import ModelData, Disposition
 from ..utils.common import setup_logger
+from ..utils.profiling import RunProfiler
+from .base_models import (
+    BASE_MODELS,
+    build_mlp,
+    fit_lightgbm,
+    fit_mlp,
+    fit_xgboost,
+    keras_model_from_bytes,
+    split_thread_budget,
+    train_base_model_worker,
+)
+from .oof_stacking import OutOfFoldStacker
+from .hyperparameter_tuner import median_latency_ms, select_under_budget
+from .input_pipeline import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_WARMUP_EPOCHS,
+    EVAL_BATCH_SIZE,
+    fit_with_input_pipeline,
+    scaled_learning_rate,
+)
+from .meta_feature_cache import MetaFeatureCache
+from .model_bundle import write_model_bundle
 
 RANDOM_STATE = 42
+# Training rows kept as the KNN donor pool for serving-time imputation.
+IMPUTER_REFERENCE_ROWS = 2000
 LOGGER_FILE_PATH = Path("reports") / "logs" / "Model_trainer.log"
 logger = setup_logger("ModelTrainer", LOGGER_FILE_PATH)
 
 
+def build_meta_network(n_meta_features: int) -> keras.Model:
+    """The meta-model's architecture, uncompiled."""
+    return models.Sequential(
+        [
+            layers.Input(shape=(n_meta_features,)),
+            layers.Dense(64, activation="relu"),
+            layers.BatchNormalization(),
+            layers.Dropout(0.3),
+            layers.Dense(32, activation="relu"),
+            layers.Dropout(0.2),
+            layers.Dense(3, activation="softmax"),
+        ]
+    )
+
+
 class StackedEnsembleTrainer:
     def __init__(
         self,
         model_data: ModelData,
         save_folder: Path,
         optimized_params: dict = None,
+        parallel: bool = False,
+        n_jobs: Optional[int] = None,
+        oof_folds: int = 0,
+        imputation_state: Optional[dict] = None,
+        profiler: Optional[RunProfiler] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        lr_scaling: str = "sqrt",
+        latency_budget_ms: Optional[float] = None,
     ):
         self.model_data = model_data
         self.save_folder = save_folder
         self.save_folder.mkdir(parents=True, exist_ok=True)
 
         self.optimized_params = optimized_params
+        # Resolved parameters of the base models, saved in ensemble_info so a
+        # meta-only retrain fits its out-of-fold models the same way.
+        self.base_params = None
+        self.parallel = parallel
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.oof_folds = oof_folds
+        self.meta_feature_cache = MetaFeatureCache(self.save_folder / "meta_cache")
+        self.imputation_state = imputation_state
+        self.profiler = profiler
+        self.batch_size = batch_size
+        self.lr_scaling = lr_scaling
+        self.latency_budget_ms = latency_budget_ms
+        # Tree configurations chosen together for the latency budget.
+        self.budget_selection = None
+        self.stage_times = {}
 
         self.sample_weights = self.calculate_class_weights()
 
@@ -66,17 +129,70 @@ class StackedEnsembleTrainer:
         joblib.dump(self.feature_scaler, self.save_folder / "feature_scaler.pkl")
         logger.info("Feature scaling complete")
 
-    def build_xgboost_model(self):
-        logger.info("Training XGBoost model")
-
-        class_weights = self.sample_weights
+    def _sample_weight_array(self) -> np.ndarray:
+        return np.array([self.sample_weights[y] for y in self.model_data.y_train])
+
+    def _keras_latency_ms(self) -> float:
+        """
+        Median single-row latency of the MLP and the meta-model. Only their
+        architectures matter, so they are timed untrained.
+        """
+        n_features = self.model_data.X_train.shape[1]
+        # The meta-model reads the class probabilities of every base model.
+        networks = [build_mlp(n_features), build_meta_network(3 * len(BASE_MODELS))]
+        latency_ms = 0.0
+        for network in networks:
+            row = np.zeros((1, network.input_shape[1]), dtype=np.float32)
+            # The first call builds the predict function, which serving does once.
+            network.predict_on_batch(row)
+            latency_ms += median_latency_ms(lambda: network.predict_on_batch(row))
+        return latency_ms
+
+    def _select_under_budget(self) -> dict:
+        overhead_ms = self._keras_latency_ms()
+        xgb_choice, lgb_choice = select_under_budget(
+            self.optimized_params["xgboost"]["pareto_front"],
+            self.optimized_params["lightgbm"]["pareto_front"],
+            self.latency_budget_ms,
+            overhead_ms=overhead_ms,
+        )
+        logger.info(
+            f"Selected XGBoost trial {xgb_choice['trial']} "
+            f"({xgb_choice['single_row_latency_ms']:.2f} ms) and LightGBM trial "
+            f"{lgb_choice['trial']} ({lgb_choice['single_row_latency_ms']:.2f} ms) "
+            f"for a {self.latency_budget_ms} ms budget, with {overhead_ms:.2f} ms "
+            f"for the MLP and meta-model"
+        )
+        return {"xgboost": xgb_choice, "lightgbm": lgb_choice}
+
+    def _optimized(self, model_name: str) -> Tuple[dict, float]:
+        """
+        Tuned params and expected score for ``model_name``. With a latency
+        budget and multi-objective searches, the XGBoost and LightGBM
+        configurations are chosen together from their Pareto fronts, so that
+        the single-row latencies of the whole ensemble fit the budget.
+        """
+        optimized = self.optimized_params[model_name]
+        if self.latency_budget_ms is None or not all(
+            "pareto_front" in self.optimized_params.get(name, {})
+            for name in ("xgboost", "lightgbm")
+        ):
+            return optimized["best_params"].copy(), optimized["best_score"]
+
+        if self.budget_selection is None:
+            self.budget_selection = self._select_under_budget()
+        choice = self.budget_selection[model_name]
+        logger.info(
+            f"{model_name}: batch latency {choice['batch_latency_ms']:.1f} ms, "
+            f"{choice['model_size_mb']:.2f} MB"
+        )
+        return dict(choice["params"]), choice["score"]
 
+    def _xgboost_params(self) -> dict:
         if self.optimized_params and "xgboost" in self.optimized_params:
-            xgb_params = self.optimized_params["xgboost"]["best_params"].copy()
+            xgb_params, expected_score = self._optimized("xgboost")
             logger.info("Using optimized XGBoost parameters")
-            logger.info(
-                f"Expected F1 score: {self.optimized_params['xgboost']['best_score']:.4f}"
-            )
+            logger.info(f"Expected F1 score: {expected_score:.4f}")
         else:
             xgb_params = {
                 "n_estimators": 1024,
@@ -96,38 +212,13 @@ class StackedEnsembleTrainer:
                 "early_stopping_rounds": 50,
             }
         )
-        self.xgb_model = xgb.XGBClassifier(**xgb_params)
-
-        sample_weights = np.array([class_weights[y] for y in self.model_data.y_train])
-        self.xgb_model.fit(
-            self.X_train_scaled,
-            self.model_data.y_train,
-            sample_weight=sample_weights,
-            eval_set=[(self.X_cv_scaled, self.model_data.y_cv)],
-            verbose=50,
-        )
-
-        train_pred = self.xgb_model.predict(self.X_train_scaled)
-        cv_pred = self.xgb_model.predict(self.X_cv_scaled)
-
-        logger.info(
-            f"XGBoost Train Accuracy: {accuracy_score(self.model_data.y_train, train_pred):.4f}"
-        )
-        logger.info(
-            f"XGBoost CV Accuracy: {accuracy_score(self.model_data.y_cv, cv_pred):.4f}"
-        )
-
-    def build_lightgbm_model(self):
-        logger.info("Training LightGBM model")
-        
-        class_weights = self.sample_weights
+        return xgb_params
 
+    def _lightgbm_params(self) -> dict:
         if self.optimized_params and "lightgbm" in self.optimized_params:
-            lgb_params = self.optimized_params["lightgbm"]["best_params"].copy()
+            lgb_params, expected_score = self._optimized("lightgbm")
             logger.info("Using optimized LightGBM parameters")
-            logger.info(
-                f"Expected F1 score: {self.optimized_params['lightgbm']['best_score']:.4f}"
-            )
+            logger.info(f"Expected F1 score: {expected_score:.4f}")
         else:
             lgb_params = {
                 "n_estimators": 1024,
@@ -148,121 +239,222 @@ class StackedEnsembleTrainer:
                 "verbose": -1,
             }
         )
+        return lgb_params
+
+    def _mlp_params(self) -> Optional[dict]:
+        return {"batch_size": self.batch_size, "lr_scaling": self.lr_scaling}
+
+    def _base_model_params(self, model_name: str) -> Optional[dict]:
+        if self.base_params is not None:
+            return dict(self.base_params[model_name])
+        return {
+            "xgboost": self._xgboost_params,
+            "lightgbm": self._lightgbm_params,
+            "mlp": self._mlp_params,
+        }[model_name]()
 
-        self.lgb_model = lgb.LGBMClassifier(**lgb_params)
+    def build_xgboost_model(self):
+        logger.info("Training XGBoost model")
 
-        sample_weights = np.array([class_weights[y] for y in self.model_data.y_train])
-        self.lgb_model.fit(
+        self.xgb_model = fit_xgboost(
             self.X_train_scaled,
             self.model_data.y_train,
-            sample_weight=sample_weights,
-            eval_set=[(self.X_cv_scaled, self.model_data.y_cv)],
-            callbacks=[lgb.early_stopping(50), lgb.log_evaluation(50)],
+            self.X_cv_scaled,
+            self.model_data.y_cv,
+            self._sample_weight_array(),
+            self._base_model_params("xgboost"),
         )
 
-        train_pred = self.lgb_model.predict(self.X_train_scaled)
-        cv_pred = self.lgb_model.predict(self.X_cv_scaled)
+    def build_lightgbm_model(self):
+        logger.info("Training LightGBM model")
 
-        logger.info(
-            f"LightGBM Train Accuracy: {accuracy_score(self.model_data.y_train, train_pred):.4f}"
-        )
-        logger.info(
-            f"LightGBM CV Accuracy: {accuracy_score(self.model_data.y_cv, cv_pred):.4f}"
+        self.lgb_model = fit_lightgbm(
+            self.X_train_scaled,
+            self.model_data.y_train,
+            self.X_cv_scaled,
+            self.model_data.y_cv,
+            self._sample_weight_array(),
+            self._base_model_params("lightgbm"),
         )
 
     def build_mlp_model(self):
         logger.info("Training MLP model")
 
-        class_weights = self.sample_weights
-
-        n_features = self.X_train_scaled.shape[1]
-        self.mlp_model = models.Sequential(
-            [
-            layers.Input(shape=(n_features,)),
-            layers.Dense(16, activation="relu"),
-            layers.Dropout(0.5),
-            layers.Dense(3, activation="softmax"),
-            ]
-        )
-
-        self.mlp_model.compile(
-            optimizer=keras.optimizers.Adam(learning_rate=0.0005),
-            loss="sparse_categorical_crossentropy",
-            metrics=["accuracy"],
-        )
-
-        early_stop = keras.callbacks.EarlyStopping(
-            monitor="val_loss", patience=50, restore_best_weights=True, min_delta=0.001
+        self.mlp_model = fit_mlp(
+            self.X_train_scaled,
+            self.model_data.y_train,
+            self.X_cv_scaled,
+            self.model_data.y_cv,
+            self._sample_weight_array(),
+            self._base_model_params("mlp"),
         )
 
-        reduce_lr = keras.callbacks.ReduceLROnPlateau(
-            monitor="val_loss", factor=0.5, patience=10, min_lr=1e-7
-        )
+    def train_base_models_parallel(self):
+        """Train XGBoost, LightGBM and the MLP concurrently in worker processes.
 
-        sample_weights = np.array([class_weights[y] for y in self.model_data.y_train])
-        self.mlp_model.fit(
-            self.X_train_scaled,
-            self.model_data.y_train,
-            sample_weight=sample_weights,
-            validation_data=(self.X_cv_scaled, self.model_data.y_cv),
-            epochs=300,
-            batch_size=32,
-            callbacks=[early_stop, reduce_lr],
-            verbose=1,
+        The ``n_jobs`` thread budget is split across the three workers so the
+        libraries do not oversubscribe the cores between them.
+        """
+        thread_budget = split_thread_budget(self.n_jobs, len(BASE_MODELS))
+        logger.info(
+            f"Training base models in parallel with thread budget "
+            f"{dict(zip(BASE_MODELS, thread_budget))}"
         )
 
-        train_loss, train_acc = self.mlp_model.evaluate(
-            self.X_train_scaled, self.model_data.y_train, verbose=0
+        sample_weights = self._sample_weight_array()
+        fitted = {}
+        # Spawned (not forked) workers: TensorFlow and the OpenMP runtimes of
+        # XGBoost/LightGBM are not fork-safe once initialised in the parent.
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=len(BASE_MODELS), mp_context=context
+        ) as executor:
+            futures = [
+                executor.submit(
+                    train_base_model_worker,
+                    model_name,
+                    self.X_train_scaled,
+                    self.model_data.y_train,
+                    self.X_cv_scaled,
+                    self.model_data.y_cv,
+                    sample_weights,
+                    self._base_model_params(model_name),
+                    n_threads,
+                )
+                for model_name, n_threads in zip(BASE_MODELS, thread_budget)
+            ]
+            for future in futures:
+                model_name, model, elapsed = future.result()
+                fitted[model_name] = model
+                self.stage_times[f"train_{model_name}"] = elapsed
+                logger.info(f"{model_name} worker finished in {elapsed:.2f}s")
+                if self.profiler is not None:
+                    self.profiler.add_step(
+                        f"train_{model_name}",
+                        elapsed,
+                        rows=len(self.model_data.y_train),
+                    )
+
+        self.xgb_model = fitted["xgboost"]
+        self.lgb_model = fitted["lightgbm"]
+        self.mlp_model = keras_model_from_bytes(fitted["mlp"])
+
+    def train_base_models(self):
+        self.base_params = {
+            model_name: self._base_model_params(model_name)
+            for model_name in BASE_MODELS
+        }
+        if self.parallel:
+            self._timed("train_base_models", self.train_base_models_parallel)
+            return
+
+        start = time.perf_counter()
+        self._timed("train_xgboost", self.build_xgboost_model)
+        self._timed("train_lightgbm", self.build_lightgbm_model)
+        self._timed("train_mlp", self.build_mlp_model)
+        self.stage_times["train_base_models"] = time.perf_counter() - start
+
+    def _timed(self, stage: str, func, *args, **kwargs):
+        profiled = (
+            self.profiler.step(stage, rows=len(self.model_data.y_train))
+            if self.profiler is not None
+            else nullcontext()
         )
-        cv_loss, cv_acc = self.mlp_model.evaluate(
-            self.X_cv_scaled, self.model_data.y_cv, verbose=0
+        start = time.perf_counter()
+        with profiled:
+            result = func(*args, **kwargs)
+        self.stage_times[stage] = time.perf_counter() - start
+        logger.info(f"Stage '{stage}' took {self.stage_times[stage]:.2f}s")
+        return result
+
+    def _score_base_models(self, *matrices: np.ndarray) -> list[np.ndarray]:
+        """
+        Score the given matrices with every base model and return one
+        meta-feature matrix per input.
+
+        The matrices are concatenated so each base model makes a single
+        prediction call regardless of how many splits are scored.
+        """
+        X_all = np.vstack(matrices)
+        meta_all = np.hstack(
+            [
+                self.xgb_model.predict_proba(X_all),
+                self.lgb_model.predict_proba(X_all),
+                self.mlp_model.predict(X_all, batch_size=1024, verbose=0),
+            ]
         )
-
-        logger.info(f"MLP Train Accuracy: {train_acc:.4f}")
-        logger.info(f"MLP CV Accuracy: {cv_acc:.4f}")
+        split_points = np.cumsum([len(matrix) for matrix in matrices])[:-1]
+        return np.split(meta_all, split_points)
 
     def generate_meta_features(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        logging.info("Generate meta-features")
-
-        xgb_train_proba = self.xgb_model.predict_proba(self.X_train_scaled)
-        xgb_cv_proba = self.xgb_model.predict_proba(self.X_cv_scaled)
-        xgb_test_proba = self.xgb_model.predict_proba(self.X_test_scaled)
-
-        lgb_train_proba = self.lgb_model.predict_proba(self.X_train_scaled)
-        lgb_cv_proba = self.lgb_model.predict_proba(self.X_cv_scaled)
-        lgb_test_proba = self.lgb_model.predict_proba(self.X_test_scaled)
-
-        mlp_train_proba = self.mlp_model.predict(self.X_train_scaled)
-        mlp_cv_proba = self.mlp_model.predict(self.X_cv_scaled)
-        mlp_test_proba = self.mlp_model.predict(self.X_test_scaled)
+        logger.info("Generate meta-features")
 
-        meta_train = np.hstack([xgb_train_proba, lgb_train_proba, mlp_train_proba])
-        meta_cv = np.hstack([xgb_cv_proba, lgb_cv_proba, mlp_cv_proba])
-        meta_test = np.hstack([xgb_test_proba, lgb_test_proba, mlp_test_proba])
+        cache_key = MetaFeatureCache.key(
+            self.xgb_model,
+            self.lgb_model,
+            self.mlp_model,
+            self.X_train_scaled,
+            self.X_cv_scaled,
+            self.X_test_scaled,
+            oof_folds=self.oof_folds,
+        )
+        cached = self.meta_feature_cache.load(cache_key)
+        if cached is not None:
+            meta_train, meta_cv, meta_test = cached
+            logger.info(f"Meta-features shape: {meta_train.shape} (cached)")
+            return meta_train, meta_cv, meta_test
+
+        if self.oof_folds > 1:
+            meta_train = self.generate_oof_meta_features()
+            meta_cv, meta_test = self._score_base_models(
+                self.X_cv_scaled, self.X_test_scaled
+            )
+        else:
+            meta_train, meta_cv, meta_test = self._score_base_models(
+                self.X_train_scaled, self.X_cv_scaled, self.X_test_scaled
+            )
 
+        self.meta_feature_cache.save(cache_key, meta_train, meta_cv, meta_test)
         logger.info(f"Meta-features shape: {meta_train.shape}")
 
         return meta_train, meta_cv, meta_test
 
+    def generate_oof_meta_features(self) -> np.ndarray:
+        """
+        Training-set meta-features from K-fold out-of-fold predictions instead
+        of in-sample predictions of the full base models.
+
+        The CV and test rows are still scored by the full base models, which
+        are the ones served at inference time.
+        """
+        logger.info(f"Generating {self.oof_folds}-fold out-of-fold meta-features")
+
+        stacker = OutOfFoldStacker(
+            X_train=self.X_train_scaled,
+            y_train=self.model_data.y_train,
+            X_cv=self.X_cv_scaled,
+            y_cv=self.model_data.y_cv,
+            sample_weights=self._sample_weight_array(),
+            base_params={
+                model_name: self._base_model_params(model_name)
+                for model_name in BASE_MODELS
+            },
+            cache_folder=self.save_folder / "oof_cache",
+            n_folds=self.oof_folds,
+            n_jobs=self.n_jobs,
+        )
+        return stacker.generate()
+
     def build_meta_model(self, meta_train: np.ndarray, meta_cv: np.ndarray):
         logger.info("Training meta-model")
 
         n_meta_features = meta_train.shape[1]
 
-        self.meta_model = models.Sequential(
-            [
-                layers.Input(shape=(n_meta_features,)),
-                layers.Dense(64, activation="relu"),
-                layers.BatchNormalization(),
-                layers.Dropout(0.3),
-                layers.Dense(32, activation="relu"),
-                layers.Dropout(0.2),
-                layers.Dense(3, activation="softmax"),
-            ]
-        )
+        self.meta_model = build_meta_network(n_meta_features)
 
+        learning_rate = scaled_learning_rate(0.001, self.batch_size, self.lr_scaling)
         self.meta_model.compile(
-            optimizer=keras.optimizers.Adam(learning_rate=0.001),
+            optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
             loss="sparse_categorical_crossentropy",
             metrics=["accuracy"],
         )
@@ -271,21 +463,24 @@ class StackedEnsembleTrainer:
             monitor="val_loss", patience=30, restore_best_weights=True
         )
 
-        self.meta_model.fit(
+        fit_with_input_pipeline(
+            self.meta_model,
             meta_train,
             self.model_data.y_train,
-            validation_data=(meta_cv, self.model_data.y_cv),
+            meta_cv,
+            self.model_data.y_cv,
+            batch_size=self.batch_size,
             epochs=200,
-            batch_size=32,
+            warmup_epochs=DEFAULT_WARMUP_EPOCHS,
             callbacks=[early_stop],
-            verbose=1,
+            name="Meta-model",
         )
 
         train_loss, train_acc = self.meta_model.evaluate(
-            meta_train, self.model_data.y_train, verbose=0
+            meta_train, self.model_data.y_train, batch_size=EVAL_BATCH_SIZE, verbose=0
         )
         cv_loss, cv_acc = self.meta_model.evaluate(
-            meta_cv, self.model_data.y_cv, verbose=0
+            meta_cv, self.model_data.y_cv, batch_size=EVAL_BATCH_SIZE, verbose=0
         )
 
         logger.info(f"Meta-Model Train Accuracy: {train_acc:.4f}")
@@ -320,6 +515,9 @@ class StackedEnsembleTrainer:
         joblib.dump(self.feature_scaler, model_dir / "feature_scaler.pkl")
         logger.info("Saved feature scaler")
 
+        joblib.dump(self.build_imputer_state(), model_dir / "imputer_state.pkl")
+        logger.info("Saved imputer state")
+
         joblib.dump(self.xgb_model, model_dir / "xgboost_model.pkl")
         logger.info("Saved XGBoost model")
 
@@ -329,41 +527,107 @@ class StackedEnsembleTrainer:
         self.mlp_model.save(model_dir / "mlp_model.keras")
         logger.info("Saved MLP model")
 
+        self.save_meta_model()
+
+        logger.info(f"All models saved successfully to: {model_dir}")
+        logger.info("\nSaved files:")
+        for file in sorted(model_dir.glob("*")):
+            if file.is_file():
+                size_mb = file.stat().st_size / (1024 * 1024)
+                logger.info(f"  - {file.name} ({size_mb:.2f} MB)")
+
+    def build_imputer_state(self) -> dict:
+        """
+        Imputation state for serving: the preprocessing imputer summary plus
+        per-feature medians of the training matrix, which fill missing values
+        in the final feature space before scaling. When training imputed with
+        KNN, a random sample of training rows (float32) is kept as the donor
+        pool, so serving imputes against the same feature space.
+        """
+        X_train = self.model_data.X_train
+        state = dict(self.imputation_state or {})
+        state.update(
+            {
+                "feature_names": list(X_train.columns),
+                "feature_fill_values": X_train.median().to_numpy(dtype=np.float64),
+                "reference_set": None,
+            }
+        )
+        if state.get("n_neighbors"):
+            reference = X_train.sample(
+                n=min(IMPUTER_REFERENCE_ROWS, len(X_train)), random_state=RANDOM_STATE
+            )
+            state["reference_set"] = reference.to_numpy(dtype=np.float32)
+        return state
+
+    def save_meta_model(self):
+        model_dir = self.save_folder
+
         self.meta_model.save(model_dir / "meta_model.keras")
         logger.info("Saved meta-model")
 
         ensemble_info = {
             "version": "1.0",
             "n_features": self.X_train_scaled.shape[1],
+            "feature_names": list(self.model_data.X_train.columns),
             "class_names": ["FALSE_POSITIVE", "CANDIDATE", "CONFIRMED"],
             "training_date": pd.Timestamp.now().isoformat(),
         }
+        if self.base_params is not None:
+            ensemble_info["base_params"] = self.base_params
         joblib.dump(ensemble_info, model_dir / "ensemble_info.pkl")
         logger.info("Saved ensemble metadata")
 
-        logger.info(f"All models saved successfully to: {model_dir}")
-        logger.info("\nSaved files:")
-        for file in sorted(model_dir.glob("*")):
-            size_mb = file.stat().st_size / (1024 * 1024)
-            logger.info(f"  - {file.name} ({size_mb:.2f} MB)")
+        # Both save paths end here, so the bundle always matches the files.
+        write_model_bundle(model_dir)
+
+    def load_base_models(self):
+        """
+        Load the fitted scaler and base models saved by a previous run, and
+        the parameters they were trained with when the run recorded them.
+        """
+        model_dir = self.save_folder
+
+        ensemble_info = joblib.load(model_dir / "ensemble_info.pkl")
+        self.base_params = ensemble_info.get("base_params")
+
+        self.feature_scaler = joblib.load(model_dir / "feature_scaler.pkl")
+        self.xgb_model = joblib.load(model_dir / "xgboost_model.pkl")
+        self.lgb_model = joblib.load(model_dir / "lightgbm_model.pkl")
+        self.mlp_model = keras.models.load_model(model_dir / "mlp_model.keras")
+
+        self.X_train_scaled = self.feature_scaler.transform(self.model_data.X_train)
+        self.X_test_scaled = self.feature_scaler.transform(self.model_data.X_test)
+        self.X_cv_scaled = self.feature_scaler.transform(self.model_data.X_cv)
+        logger.info(f"Loaded scaler and base models from {model_dir}")
 
     def train_pipeline(self):
         """Execute complete training pipeline."""
         logger.info("Starting stacked ensemble training pipeline...")
 
-        self.preprocess_features()
+        self.stage_times = {}
+        pipeline_start = time.perf_counter()
 
-        self.build_xgboost_model()
-        self.build_lightgbm_model()
-        self.build_mlp_model()
+        self._timed("preprocess_features", self.preprocess_features)
+
+        self.train_base_models()
+
+        meta_train, meta_cv, meta_test = self._timed(
+            "generate_meta_features", self.generate_meta_features
+        )
 
-        meta_train, meta_cv, meta_test = self.generate_meta_features()
+        self._timed("train_meta_model", self.build_meta_model, meta_train, meta_cv)
 
-        self.build_meta_model(meta_train, meta_cv)
+        test_acc, report, cm = self._timed(
+            "evaluate_ensemble", self.evaluate_ensemble, meta_test
+        )
 
-        test_acc, report, cm = self.evaluate_ensemble(meta_test)
+        self._timed("save_models", self.save_models)
 
-        self.save_models()
+        self.stage_times["total"] = time.perf_counter() - pipeline_start
+        logger.info("Stage wall-clock times:")
+        for stage, elapsed in self.stage_times.items():
+            logger.info(f"  - {stage}: {elapsed:.2f}s")
 
         logger.info("Training pipeline complete!")
 
@@ -371,7 +635,60 @@ class StackedEnsembleTrainer:
             "test_accuracy": test_acc,
             "classification_report": report,
             "confusion_matrix": cm,
+            "stage_times": dict(self.stage_times),
+        }
+
+    def retrain_meta_model(self):
+        """
+        Retrain only the meta-model on top of the saved base models.
+
+        Base-model inference is skipped entirely when the meta-features for
+        these base models and this data split are already cached.
+        """
+        logger.info("Starting meta-model-only retraining...")
+
+        self.stage_times = {}
+        pipeline_start = time.perf_counter()
+
+        self._timed("load_base_models", self.load_base_models)
+
+        if self.oof_folds > 1 and self.base_params is None:
+            if self.optimized_params:
+                logger.warning(
+                    "Saved models do not record their parameters; fitting "
+                    "out-of-fold models with the tuned parameters"
+                )
+            else:
+                # Default parameters would fit fold models unlike the served
+                # ones, so score the training rows with the saved models.
+                logger.warning(
+                    "Saved models do not record their parameters and no tuned "
+                    "parameters were given; scoring training rows with the "
+                    "saved base models instead of out-of-fold"
+                )
+                self.oof_folds = 0
+
+        meta_train, meta_cv, meta_test = self._timed(
+            "generate_meta_features", self.generate_meta_features
+        )
+
+        self._timed("train_meta_model", self.build_meta_model, meta_train, meta_cv)
+
+        test_acc, report, cm = self._timed(
+            "evaluate_ensemble", self.evaluate_ensemble, meta_test
+        )
+
+        self._timed("save_models", self.save_meta_model)
+
+        self.stage_times["total"] = time.perf_counter() - pipeline_start
+        logger.info("Meta-model retraining complete!")
+
+        return {
+            "test_accuracy": test_acc,
+            "classification_report": report,
+            "confusion_matrix": cm,
+            "stage_times": dict(self.stage_times),
         }
 
 
-__all__ = ["StackedEnsembleTrainer"]
+__all__ = ["StackedEnsembleTrainer", "build_meta_network"]
@@ -0,0 +1,248 @@
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import Optional
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sklearn.model_selection import StratifiedKFold
+import joblib
+
+from ..utils.common import setup_logger
+from .base_models import (
+    BASE_MODELS,
+    BASE_MODEL_FITTERS,
+    limit_worker_threads,
+)
+
+RANDOM_STATE = 42
+N_CLASSES = 3
+LOGGER_FILE_PATH = Path("reports") / "logs" / "OOF_stacking.log"
+logger = setup_logger("OutOfFoldStacker", LOGGER_FILE_PATH)
+
+# Training matrices shared by every fold job of a worker process; set once by
+# the pool initializer instead of being pickled with each submitted fold.
+_WORKER_DATA = {}
+
+
+def _init_fold_worker(
+    X_train: np.ndarray,
+    y_train: np.ndarray,
+    X_cv: np.ndarray,
+    y_cv: np.ndarray,
+    sample_weights: np.ndarray,
+    n_threads: int,
+):
+    limit_worker_threads(n_threads)
+    _WORKER_DATA.update(
+        X_train=X_train,
+        y_train=y_train,
+        X_cv=X_cv,
+        y_cv=y_cv,
+        sample_weights=sample_weights,
+        n_threads=n_threads,
+    )
+
+
+def _fit_fold_worker(
+    model_name: str,
+    fold: int,
+    train_idx: np.ndarray,
+    val_idx: np.ndarray,
+    params: Optional[dict],
+    fold_dir: Path,
+):
+    data = _WORKER_DATA
+    start = time.perf_counter()
+
+    model = BASE_MODEL_FITTERS[model_name](
+        data["X_train"][train_idx],
+        data["y_train"][train_idx],
+        data["X_cv"],
+        data["y_cv"],
+        data["sample_weights"][train_idx],
+        params,
+        n_jobs=data["n_threads"],
+    )
+
+    X_val = data["X_train"][val_idx]
+    if model_name == "mlp":
+        proba = model.predict(X_val, verbose=0)
+        model.save(fold_dir / f"{model_name}_fold{fold}.keras")
+    else:
+        proba = model.predict_proba(X_val)
+        joblib.dump(model, fold_dir / f"{model_name}_fold{fold}.pkl")
+
+    # The prediction file marks the fold as complete, so it is written last
+    # and atomically; an interrupted fold is simply retrained on the next run.
+    output_path = OutOfFoldStacker.fold_prediction_path(fold_dir, model_name, fold)
+    tmp_path = output_path.with_suffix(".tmp.npz")
+    np.savez(tmp_path, indices=val_idx, proba=proba.astype(np.float64))
+    os.replace(tmp_path, output_path)
+
+    return model_name, fold, time.perf_counter() - start
+
+
+class OutOfFoldStacker:
+    """
+    Build meta-model training features from K-fold out-of-fold predictions.
+
+    Each base model is trained K times, each time without one fold of the
+    training set, and only predicts the rows it did not see. The fold jobs run
+    in parallel worker processes, and every finished fold is cached under
+    ``cache_folder`` keyed by a fingerprint of the data and parameters, so a
+    rerun only trains the folds that are missing.
+    """
+
+    def __init__(
+        self,
+        X_train: np.ndarray,
+        y_train: pd.Series,
+        X_cv: np.ndarray,
+        y_cv: pd.Series,
+        sample_weights: np.ndarray,
+        base_params: dict,
+        cache_folder: Path,
+        n_folds: int = 5,
+        n_jobs: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ):
+        if n_folds < 2:
+            raise ValueError(f"n_folds must be at least 2, got {n_folds}")
+
+        self.X_train = np.ascontiguousarray(X_train)
+        self.y_train = np.asarray(y_train)
+        self.X_cv = np.ascontiguousarray(X_cv)
+        self.y_cv = np.asarray(y_cv)
+        self.sample_weights = np.asarray(sample_weights)
+        self.base_params = base_params
+        self.n_folds = n_folds
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.max_workers = max_workers
+
+        self.cache_dir = cache_folder / self.fingerprint()
+
+    def fingerprint(self) -> str:
+        digest = hashlib.sha256()
+        for array in (
+            self.X_train,
+            self.y_train,
+            self.X_cv,
+            self.y_cv,
+            self.sample_weights,
+        ):
+            digest.update(str(array.shape).encode())
+            digest.update(np.ascontiguousarray(array).tobytes())
+
+        settings = {
+            "n_folds": self.n_folds,
+            "random_state": RANDOM_STATE,
+            "params": self.base_params,
+        }
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+        return digest.hexdigest()[:16]
+
+    @staticmethod
+    def fold_prediction_path(fold_dir: Path, model_name: str, fold: int) -> Path:
+        return fold_dir / f"{model_name}_fold{fold}_oof.npz"
+
+    def _folds(self) -> list[tuple[np.ndarray, np.ndarray]]:
+        splitter = StratifiedKFold(
+            n_splits=self.n_folds, shuffle=True, random_state=RANDOM_STATE
+        )
+        return list(splitter.split(self.X_train, self.y_train))
+
+    def _pending_jobs(self, folds) -> list[tuple[str, int]]:
+        pending = []
+        for model_name in BASE_MODELS:
+            for fold in range(len(folds)):
+                path = self.fold_prediction_path(self.cache_dir, model_name, fold)
+                if not path.exists():
+                    pending.append((model_name, fold))
+        return pending
+
+    def _run_jobs(self, jobs: list[tuple[str, int]], folds) -> None:
+        n_workers = min(len(jobs), self.max_workers or self.n_jobs)
+        n_threads = max(1, self.n_jobs // n_workers)
+        logger.info(
+            f"Training {len(jobs)} fold models on {n_workers} workers "
+            f"with {n_threads} thread(s) each"
+        )
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            mp_context=context,
+            initializer=_init_fold_worker,
+            initargs=(
+                self.X_train,
+                self.y_train,
+                self.X_cv,
+                self.y_cv,
+                self.sample_weights,
+                n_threads,
+            ),
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _fit_fold_worker,
+                    model_name,
+                    fold,
+                    folds[fold][0],
+                    folds[fold][1],
+                    self.base_params.get(model_name),
+                    self.cache_dir,
+                )
+                for model_name, fold in jobs
+            ]
+            for future in futures:
+                model_name, fold, elapsed = future.result()
+                logger.info(f"{model_name} fold {fold} finished in {elapsed:.2f}s")
+
+    def generate(self) -> np.ndarray:
+        """
+        Return the out-of-fold probability matrix for the training set.
+
+        Returns:
+            Array of shape ``(n_train, 3 * len(BASE_MODELS))`` with the class
+            probabilities of each base model in ``BASE_MODELS`` order.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        folds = self._folds()
+
+        pending = self._pending_jobs(folds)
+        cached = len(BASE_MODELS) * len(folds) - len(pending)
+        logger.info(
+            f"OOF cache {self.cache_dir}: {cached} fold(s) cached, "
+            f"{len(pending)} to train"
+        )
+
+        start = time.perf_counter()
+        if pending:
+            self._run_jobs(pending, folds)
+        logger.info(f"OOF fold training took {time.perf_counter() - start:.2f}s")
+
+        oof = np.full((len(self.y_train), N_CLASSES * len(BASE_MODELS)), np.nan)
+        for model_idx, model_name in enumerate(BASE_MODELS):
+            columns = slice(model_idx * N_CLASSES, (model_idx + 1) * N_CLASSES)
+            for fold in range(len(folds)):
+                path = self.fold_prediction_path(self.cache_dir, model_name, fold)
+                with np.load(path) as fold_predictions:
+                    oof[fold_predictions["indices"], columns] = fold_predictions[
+                        "proba"
+                    ]
+
+        if np.isnan(oof).any():
+            raise RuntimeError(
+                f"Incomplete out-of-fold predictions in {self.cache_dir}"
+            )
+
+        logger.info(f"OOF meta-features shape: {oof.shape}")
+        return oof
+
+
+__all__ = ["OutOfFoldStacker"]
@@ -1,31 +1,131 @@
+import atexit
+import io
 import logging
+import logging.handlers
+import multiprocessing
+import os
+import queue
 import sys
+import threading
 from pathlib import Path
 
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# Comma-separated "<logger name>=<level>" pairs; "*" sets the default, e.g.
+# LOG_LEVELS="*=WARNING,ModelTrainer=INFO,DataPreprocessor=DEBUG".
+LOG_LEVELS_ENV = "LOG_LEVELS"
+DEFAULT_LOG_LEVEL = logging.INFO
+
+
+class Lazy:
+    """
+    Log argument computed only when the record is actually emitted, e.g.
+    ``logger.debug("Describe:\n%s", Lazy(df.describe))``.
+    """
+
+    __slots__ = ("func", "args")
+
+    def __init__(self, func, *args):
+        self.func = func
+        self.args = args
+
+    def __str__(self) -> str:
+        return str(self.func(*self.args))
+
+
+def frame_info(df) -> str:
+    """``DataFrame.info()`` as a string instead of printed to stdout."""
+    buffer = io.StringIO()
+    df.info(buf=buffer)
+    return buffer.getvalue()
+
+
+class _DelayedFileHandler(logging.FileHandler):
+    """Creates the log folder and opens the file on the first record only."""
+
+    def __init__(self, filename: Path, mode: str):
+        super().__init__(filename, mode=mode, delay=True)
+
+    def _open(self):
+        Path(self.baseFilename).parent.mkdir(parents=True, exist_ok=True)
+        return super()._open()
 
-def setup_logger(name: str, log_file_path: Path) -> logging.Logger:
-    log_file_path.parent.mkdir(parents=True, exist_ok=True)
 
-    file_handler = logging.FileHandler(log_file_path, mode="w")
-    file_handler.setLevel(logging.INFO)
+class _RoutingHandler(logging.Handler):
+    """Passes each dequeued record to the handlers of the logger that made it."""
 
-    stream_handler = logging.StreamHandler(sys.stdout)
-    stream_handler.setLevel(logging.INFO)
+    def __init__(self):
+        super().__init__()
+        self.routes = {}
 
-    formatter = logging.Formatter(
-        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-    )
-    file_handler.setFormatter(formatter)
-    stream_handler.setFormatter(formatter)
+    def handle(self, record: logging.LogRecord) -> bool:
+        for handler in self.routes.get(record.name, ()):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+        return True
 
+
+_log_queue = queue.SimpleQueue()
+_router = _RoutingHandler()
+_stream_handler = logging.StreamHandler(sys.stdout)
+_stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+_listener = None
+_listener_lock = threading.Lock()
+_pipeline_loggers = set()
+
+
+def _start_listener() -> None:
+    """File and console writes happen on one background thread, off the callers."""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = logging.handlers.QueueListener(_log_queue, _router)
+            _listener.start()
+            atexit.register(_listener.stop)
+
+
+def parse_log_levels(spec: str) -> dict[str, int]:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level_name = item.rpartition("=")
+        level = logging.getLevelName(level_name.strip().upper())
+        if not isinstance(level, int):
+            raise ValueError(f"Unknown log level in {LOG_LEVELS_ENV}: {item}")
+        levels[name.strip() or "*"] = level
+    return levels
+
+
+def apply_log_levels(spec: str = None) -> None:
+    """
+    Set the level of every pipeline logger from ``spec`` (or the
+    ``LOG_LEVELS`` environment variable). Call again after loading a .env file.
+    """
+    spec = spec if spec is not None else os.environ.get(LOG_LEVELS_ENV, "")
+    levels = parse_log_levels(spec)
+    default = levels.get("*", DEFAULT_LOG_LEVEL)
+    for name in _pipeline_loggers:
+        logging.getLogger(name).setLevel(levels.get(name, default))
+
+
+def setup_logger(name: str, log_file_path: Path) -> logging.Logger:
     logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    if logger.handlers:
+        return logger
+
+    # Worker processes re-import the pipeline modules; appending keeps them from
+    # truncating the log the parent process is writing to.
+    mode = "w" if multiprocessing.parent_process() is None else "a"
+    file_handler = _DelayedFileHandler(log_file_path, mode=mode)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    _router.routes[name] = [file_handler, _stream_handler]
+    _start_listener()
 
-    if not logger.handlers:
-        logger.addHandler(file_handler)
-        logger.addHandler(stream_handler)
+    logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+    logger.propagate = False
+    _pipeline_loggers.add(name)
+    apply_log_levels()
 
     return logger
 
 
-__all__ = ["setup_logger"]
+__all__ = ["setup_logger", "apply_log_levels", "Lazy", "frame_info"]
@@ -0,0 +1,263 @@
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Iterator, Optional
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from .entity import ModelData
+
+DEFAULT_FORMAT = "feather"
+DEFAULT_COMPRESSION = "lz4"
+SUPPORTED_FORMATS = ["feather", "parquet", "csv"]
+
+FEATURE_SPLITS = ["X_train", "X_test", "X_cv"]
+TARGET_SPLITS = ["y_train", "y_test", "y_cv"]
+ROW_ID_SPLITS = ["train", "test", "cv"]
+
+
+def canonical_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    ``df`` in a dtype-independent form, so equal rows hash equally however
+    they were read: columns in name order, numbers at the float32 precision
+    the catalog loader reads them with (widened to float64), and everything
+    else, categoricals included, as strings.
+    """
+    columns = {}
+    for col in sorted(df.columns):
+        values = df[col]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(
+            values
+        ):
+            columns[col] = values.to_numpy(dtype=np.float32, na_value=np.nan).astype(
+                np.float64
+            )
+        else:
+            columns[col] = values.astype("string").to_numpy(dtype=object, na_value=None)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def row_ids(df: pd.DataFrame) -> pd.Series:
+    """
+    Content hash of every row, which identifies a merged catalog row across
+    runs: a changed row gets a new id. Computed over ``canonical_rows``, so a
+    snapshot saved as float64 CSV and the same rows loaded as float32 and
+    categoricals get the same ids.
+    """
+    return pd.util.hash_pandas_object(canonical_rows(df), index=False).rename("row_id")
+
+
+def write_frame(
+    df: pd.DataFrame, path: Path, compression: str = DEFAULT_COMPRESSION
+) -> None:
+    """
+    Write a DataFrame as a typed columnar file chosen by the path suffix.
+
+    Args:
+        df: DataFrame to write; its index is not stored
+        path: Destination ending in ``.feather``, ``.parquet`` or ``.csv``
+        compression: Codec for Feather/Parquet (``"lz4"``, ``"zstd"`` or
+            ``"uncompressed"``; uncompressed Feather loads zero-copy)
+    """
+    path = Path(path)
+    df = df.reset_index(drop=True)
+
+    if path.suffix == ".feather":
+        feather.write_feather(df, path, compression=compression)
+    elif path.suffix == ".parquet":
+        df.to_parquet(
+            path,
+            index=False,
+            compression=None if compression == "uncompressed" else compression,
+        )
+    elif path.suffix == ".csv":
+        df.to_csv(path, index=False)
+    else:
+        raise ValueError(f"Unsupported file format: {path.suffix}")
+
+
+def read_frame(
+    path: Path, columns: Optional[list[str]] = None, memory_map: bool = True
+) -> pd.DataFrame:
+    """
+    Read a file written by ``write_frame``.
+
+    Feather and Parquet files are memory-mapped instead of read into a Python
+    buffer, and come back with the dtypes they were written with.
+    """
+    path = Path(path)
+
+    if path.suffix == ".feather":
+        table = feather.read_table(path, columns=columns, memory_map=memory_map)
+        return table.to_pandas()
+    if path.suffix == ".parquet":
+        table = pq.read_table(path, columns=columns, memory_map=memory_map)
+        return table.to_pandas()
+    if path.suffix == ".csv":
+        return pd.read_csv(path, usecols=columns)
+    raise ValueError(f"Unsupported file format: {path.suffix}")
+
+
+def iter_frames(
+    path: Path, chunk_size: int, columns: Optional[list[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a file written by ``write_frame`` as DataFrames of at most
+    ``chunk_size`` rows, without loading the whole file.
+    """
+    path = Path(path)
+    if path.suffix.lstrip(".") not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported file format: {path.suffix}")
+
+    dataset = ds.dataset(path, format=path.suffix.lstrip("."))
+    pending, pending_rows = [], 0
+    for batch in dataset.to_batches(columns=columns, batch_size=chunk_size):
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        if pending_rows >= chunk_size:
+            yield pa.Table.from_batches(pending).to_pandas()
+            pending, pending_rows = [], 0
+    if pending_rows:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+
+class FrameWriter:
+    """
+    Append DataFrame chunks to a single file that ``read_frame`` can load.
+
+    The schema is fixed by the first chunk; later chunks are cast to it. The
+    file is opened on the first ``write`` call, so a writer that never gets a
+    chunk leaves no file behind.
+    """
+
+    def __init__(self, path: Path, compression: str = DEFAULT_COMPRESSION):
+        self.path = Path(path)
+        self.compression = compression
+        self.schema = None
+        self.n_rows = 0
+        self._writer = None
+
+    def _open(self, schema: pa.Schema):
+        compression = None if self.compression == "uncompressed" else self.compression
+
+        if self.path.suffix == ".feather":
+            return pa.ipc.new_file(
+                self.path,
+                schema,
+                options=pa.ipc.IpcWriteOptions(compression=compression),
+            )
+        if self.path.suffix == ".parquet":
+            return pq.ParquetWriter(self.path, schema, compression=compression)
+        if self.path.suffix == ".csv":
+            return pa_csv.CSVWriter(self.path, schema)
+        raise ValueError(f"Unsupported file format: {self.path.suffix}")
+
+    def write(self, df: pd.DataFrame) -> None:
+        table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        if self._writer is None:
+            self.schema = table.schema
+            self._writer = self._open(self.schema)
+
+        self._writer.write_table(table)
+        self.n_rows += len(df)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self) -> "FrameWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def find_frame(folder: Path, name: str) -> Optional[Path]:
+    """Return the first existing ``<name>.<format>`` in ``SUPPORTED_FORMATS`` order."""
+    for file_format in SUPPORTED_FORMATS:
+        path = Path(folder) / f"{name}.{file_format}"
+        if path.exists():
+            return path
+    return None
+
+
+def save_model_data(
+    data: ModelData,
+    data_folder: Path,
+    file_format: str = DEFAULT_FORMAT,
+    compression: str = DEFAULT_COMPRESSION,
+) -> None:
+    data_folder.mkdir(parents=True, exist_ok=True)
+
+    for name in FEATURE_SPLITS:
+        write_frame(
+            getattr(data, name),
+            data_folder / f"{name}.{file_format}",
+            compression=compression,
+        )
+    for name in TARGET_SPLITS:
+        write_frame(
+            getattr(data, name).to_frame(),
+            data_folder / f"{name}.{file_format}",
+            compression=compression,
+        )
+
+    for split in ROW_ID_SPLITS:
+        name = f"row_ids_{split}"
+        if data.row_ids is not None:
+            write_frame(
+                data.row_ids[split].to_frame("row_id"),
+                data_folder / f"{name}.{file_format}",
+                compression=compression,
+            )
+            continue
+        # Ids left over from an earlier run would not match these splits.
+        for stale_format in SUPPORTED_FORMATS:
+            (data_folder / f"{name}.{stale_format}").unlink(missing_ok=True)
+
+
+def load_model_data(data_folder: Path, memory_map: bool = True) -> ModelData:
+    """
+    Rebuild ``ModelData`` from the splits written by ``save_model_data``.
+
+    Columnar files are preferred; CSV splits from older runs still load.
+    Row ids are attached when they were saved with the splits.
+    """
+    splits = {}
+    for name in FEATURE_SPLITS + TARGET_SPLITS:
+        path = find_frame(data_folder, name)
+        if path is None:
+            raise FileNotFoundError(f"No saved '{name}' split in {data_folder}")
+        splits[name] = read_frame(path, memory_map=memory_map)
+
+    for name in TARGET_SPLITS:
+        splits[name] = splits[name].iloc[:, 0]
+
+    paths = {
+        split: find_frame(data_folder, f"row_ids_{split}") for split in ROW_ID_SPLITS
+    }
+    if all(paths.values()):
+        splits["row_ids"] = {
+            split: read_frame(path, memory_map=memory_map)["row_id"]
+            for split, path in paths.items()
+        }
+
+    return ModelData(**splits)
+
+
+__all__ = [
+    "write_frame",
+    "read_frame",
+    "iter_frames",
+    "FrameWriter",
+    "find_frame",
+    "canonical_rows",
+    "row_ids",
+    "save_model_data",
+    "load_model_data",
+]
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from enum import IntEnum
+from typing import Optional
 import pandas as pd
 
 
@@ -23,6 +24,9 @@ class ModelData:
     y_test: pd.Series
     X_cv: pd.DataFrame
     y_cv: pd.Series
+    # Content hash of the merged catalog row behind every split row, keyed
+    # by split name ("train", "test", "cv"), when the preprocessor kept it.
+    row_ids: Optional[dict] = None
 
 
 __all__ = ["Disposition", "Source", "ModelData"]
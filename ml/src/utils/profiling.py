@@ -0,0 +1,283 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from .common import setup_logger
+
+LOGGER_FILE_PATH = Path("reports") / "logs" / "Run_profiler.log"
+logger = setup_logger("RunProfiler", LOGGER_FILE_PATH)
+
+REPORT_FOLDER = Path("reports") / "run_reports"
+SAMPLE_INTERVAL_SECONDS = 0.2
+# A step regresses when it is this much slower or larger than last time and
+# the absolute difference is above the noise floor.
+REGRESSION_RATIO = 0.2
+MIN_REGRESSION_SECONDS = 1.0
+MIN_REGRESSION_MB = 50.0
+
+
+def _rss_bytes() -> Optional[int]:
+    """Resident memory of this process and its workers, when psutil is installed."""
+    if psutil is None:
+        return None
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except psutil.Error:
+            pass
+    return rss
+
+
+def _max_rss_bytes() -> Optional[int]:
+    """Largest RSS reached so far by this process or a finished worker."""
+    if resource is None:
+        return None
+    # Kilobytes on Linux, bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return scale * max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+
+def _rss_source() -> Optional[str]:
+    """How step peaks are measured; peaks from different sources do not compare."""
+    if psutil is not None:
+        return "psutil_sampled"
+    if resource is not None:
+        return "ru_maxrss"
+    return None
+
+
+def _cpu_seconds() -> float:
+    """CPU time of this process plus its finished worker processes."""
+    if resource is None:
+        return time.process_time()
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+class RunProfiler:
+    """
+    Per-step wall time, CPU time, peak memory and row counts for one pipeline
+    run, written as a JSON report under ``reports/run_reports/``.
+
+    With psutil installed, the peak RSS of a step is sampled in a background
+    thread (including worker processes); without it, the process high-water
+    mark at the end of the step is reported instead. The report records
+    which as ``rss_source``. ``save`` compares the report with the previous
+    one and logs the steps that regressed; peak RSS is only compared between
+    reports with the same source.
+    """
+
+    def __init__(self, report_folder: Path = REPORT_FOLDER):
+        self.report_folder = report_folder
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.steps = []
+
+        self._start_wall = time.perf_counter()
+        self._start_cpu = _cpu_seconds()
+        self._open_steps = []
+        self._lock = threading.Lock()
+        self._stop_sampling = threading.Event()
+        self._sampler = None
+
+    def _sample(self):
+        while not self._stop_sampling.wait(SAMPLE_INTERVAL_SECONDS):
+            rss = _rss_bytes()
+            with self._lock:
+                for record in self._open_steps:
+                    record["_peak"] = max(record["_peak"], rss)
+
+    def _start_sampler(self):
+        if psutil is None or self._sampler is not None:
+            return
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+
+    @contextmanager
+    def step(self, name: str, rows: Optional[int] = None):
+        """
+        Profile the enclosed block as step ``name``. The yielded dict can be
+        updated inside the block, e.g. with ``rows`` once they are known.
+        """
+        self._start_sampler()
+        record = {
+            "name": name,
+            "parent": self._open_steps[-1]["name"] if self._open_steps else None,
+            "rows": rows,
+            "_peak": _rss_bytes() or 0,
+        }
+        with self._lock:
+            self._open_steps.append(record)
+
+        start_wall = time.perf_counter()
+        start_cpu = _cpu_seconds()
+        try:
+            yield record
+        finally:
+            wall = time.perf_counter() - start_wall
+            cpu = _cpu_seconds() - start_cpu
+            with self._lock:
+                self._open_steps.remove(record)
+            peak = max(record.pop("_peak"), _rss_bytes() or _max_rss_bytes() or 0)
+            self.add_step(
+                name,
+                wall,
+                cpu_seconds=cpu,
+                peak_rss_mb=peak / 1024**2 if peak else None,
+                rows=record["rows"],
+                parent=record["parent"],
+            )
+
+    def add_step(
+        self,
+        name: str,
+        wall_seconds: float,
+        cpu_seconds: Optional[float] = None,
+        peak_rss_mb: Optional[float] = None,
+        rows: Optional[int] = None,
+        parent: Optional[str] = None,
+    ) -> None:
+        """Record a step measured elsewhere, e.g. in a worker process."""
+        if parent is None and self._open_steps:
+            parent = self._open_steps[-1]["name"]
+
+        self.steps.append(
+            {
+                "name": name,
+                "parent": parent,
+                "wall_seconds": round(wall_seconds, 3),
+                "cpu_seconds": None if cpu_seconds is None else round(cpu_seconds, 3),
+                "peak_rss_mb": None if peak_rss_mb is None else round(peak_rss_mb, 1),
+                "rows": rows,
+                "rows_per_second": round(rows / wall_seconds, 1)
+                if rows and wall_seconds > 0
+                else None,
+            }
+        )
+        logger.info(
+            f"Step '{name}': {wall_seconds:.2f}s wall"
+            + ("" if cpu_seconds is None else f", {cpu_seconds:.2f}s CPU")
+            + ("" if peak_rss_mb is None else f", peak RSS {peak_rss_mb:.0f} MB")
+            + ("" if rows is None else f", {rows} rows")
+        )
+
+    def report(self) -> dict:
+        peak = _max_rss_bytes()
+        return {
+            "started_at": self.started_at,
+            "command": sys.argv,
+            "cpu_count": os.cpu_count(),
+            "rss_source": _rss_source(),
+            "total": {
+                "wall_seconds": round(time.perf_counter() - self._start_wall, 3),
+                "cpu_seconds": round(_cpu_seconds() - self._start_cpu, 3),
+                "max_rss_mb": None if peak is None else round(peak / 1024**2, 1),
+            },
+            "steps": list(self.steps),
+        }
+
+    @staticmethod
+    def compare(current: dict, previous: dict) -> list[dict]:
+        """Steps of ``current`` that got slower or bigger than in ``previous``."""
+        previous_steps = {step["name"]: step for step in previous["steps"]}
+        metrics = [("wall_seconds", MIN_REGRESSION_SECONDS)]
+        if current.get("rss_source") == previous.get("rss_source"):
+            metrics.append(("peak_rss_mb", MIN_REGRESSION_MB))
+        regressions = []
+        for step in current["steps"]:
+            before = previous_steps.get(step["name"])
+            if before is None:
+                continue
+
+            for metric, floor in metrics:
+                old, new = before.get(metric), step.get(metric)
+                if old is None or new is None:
+                    continue
+                if new - old > floor and new > old * (1 + REGRESSION_RATIO):
+                    regressions.append(
+                        {
+                            "step": step["name"],
+                            "metric": metric,
+                            "previous": old,
+                            "current": new,
+                            "change": round(new / old - 1, 3) if old else None,
+                        }
+                    )
+        return regressions
+
+    def _previous_report_path(self) -> Optional[Path]:
+        reports = sorted(self.report_folder.glob("run_*.json"))
+        return reports[-1] if reports else None
+
+    def save(self) -> Path:
+        self._stop_sampling.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+        report = self.report()
+        previous_path = self._previous_report_path()
+        if previous_path is not None:
+            with open(previous_path) as file:
+                previous = json.load(file)
+            regressions = self.compare(report, previous)
+            report["comparison"] = {
+                "previous_report": previous_path.name,
+                "regressions": regressions,
+            }
+            for regression in regressions:
+                logger.warning(
+                    f"Regression in step '{regression['step']}': "
+                    f"{regression['metric']} {regression['previous']} -> "
+                    f"{regression['current']}"
+                )
+
+        self.report_folder.mkdir(parents=True, exist_ok=True)
+        path = self.report_folder / f"run_{time.strftime('%Y%m%d-%H%M%S')}.json"
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+        logger.info(f"Saved run report to {path}")
+        return path
+
+
+def main(argv=None):
+    """Compare two saved run reports: ``python -m src.utils.profiling OLD NEW``."""
+    argv = argv if argv is not None else sys.argv[1:]
+    if len(argv) != 2:
+        raise SystemExit("usage: python -m src.utils.profiling OLD_REPORT NEW_REPORT")
+
+    old, new = (json.loads(Path(path).read_text()) for path in argv)
+    regressions = RunProfiler.compare(new, old)
+    for regression in regressions:
+        print(
+            f"{regression['step']:<28} {regression['metric']:<13} "
+            f"{regression['previous']:>10} -> {regression['current']:>10}"
+        )
+    if not regressions:
+        print("No regressions")
+    return 1 if regressions else 0
+
+
+__all__ = ["RunProfiler"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Optional
+
+from .common import setup_logger
+
+LOGGER_FILE_PATH = Path("reports") / "logs" / "Step_cache.log"
+logger = setup_logger("StepCache", LOGGER_FILE_PATH)
+
+_READ_CHUNK_SIZE = 1 << 20
+
+
+def fingerprint_file(path: Path) -> str:
+    """SHA-256 of a file's content, or ``"missing"`` when it does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return "missing"
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(_READ_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(**parts: Any) -> str:
+    """Stable short hash of JSON-serialisable pipeline parameters."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class StepCache:
+    """
+    Content-addressed cache for the outputs of pipeline steps.
+
+    Each step output is pickled under ``<step>-<key>.pkl``, where the key is a
+    fingerprint of everything the step depends on. Only the latest entry of a
+    step is kept, and ``<step>.latest`` records its key so a run can resume
+    from it without re-fingerprinting the inputs.
+    """
+
+    def __init__(self, cache_folder: Path):
+        self.cache_folder = cache_folder
+
+    def _entry_path(self, step: str, key: str) -> Path:
+        return self.cache_folder / f"{step}-{key}.pkl"
+
+    def _latest_path(self, step: str) -> Path:
+        return self.cache_folder / f"{step}.latest"
+
+    def load(self, step: str, key: str) -> Optional[Any]:
+        path = self._entry_path(step, key)
+        if not path.exists():
+            logger.info(f"Cache miss for step '{step}' ({key})")
+            return None
+
+        with open(path, "rb") as file:
+            value = pickle.load(file)
+        logger.info(f"Cache hit for step '{step}' ({key})")
+        return value
+
+    def load_latest(self, step: str) -> tuple[str, Any]:
+        latest_path = self._latest_path(step)
+        if not latest_path.exists():
+            raise FileNotFoundError(
+                f"No cached output for step '{step}' in {self.cache_folder}"
+            )
+
+        key = latest_path.read_text().strip()
+        value = self.load(step, key)
+        if value is None:
+            raise FileNotFoundError(
+                f"Cached output for step '{step}' ({key}) is missing"
+            )
+        return key, value
+
+    def save(self, step: str, key: str, value: Any) -> None:
+        self.cache_folder.mkdir(parents=True, exist_ok=True)
+
+        path = self._entry_path(step, key)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+        for stale_path in self.cache_folder.glob(f"{step}-*.pkl"):
+            if stale_path != path:
+                stale_path.unlink()
+        self._latest_path(step).write_text(key)
+        logger.info(f"Cached output of step '{step}' ({key})")
+
+
+__all__ = ["StepCache", "fingerprint", "fingerprint_file"]
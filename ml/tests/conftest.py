@@ -0,0 +1,98 @@
+import os
+import tempfile
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+from sklearn.preprocessing import StandardScaler
+from tensorflow import keras
+
+from src.utils.data_io import row_ids
+from src.utils.entity import ModelData
+
+FEATURES = ["period", "depth", "teff"]
+
+
+def pytest_configure(config):
+    # The pipeline loggers write to reports/logs relative to the working
+    # directory; keep test runs out of the tracked run logs.
+    os.chdir(tempfile.mkdtemp(prefix="ml-tests-"))
+
+
+def frame(rng, n):
+    y = pd.Series(np.arange(n) % 3)
+    X = pd.DataFrame(
+        rng.normal(size=(n, len(FEATURES))) + y.to_numpy()[:, None], columns=FEATURES
+    )
+    return X, y
+
+
+@pytest.fixture
+def model_data():
+    rng = np.random.default_rng(0)
+    (X_train, y_train), (X_test, y_test), (X_cv, y_cv) = (
+        frame(rng, n) for n in (90, 30, 30)
+    )
+    return ModelData(
+        X_train,
+        y_train,
+        X_test,
+        y_test,
+        X_cv,
+        y_cv,
+        row_ids={
+            "train": row_ids(X_train),
+            "test": row_ids(X_test),
+            "cv": row_ids(X_cv),
+        },
+    )
+
+
+@pytest.fixture
+def new_rows():
+    return frame(np.random.default_rng(1), 12)
+
+
+def compiled(n_inputs):
+    model = keras.Sequential(
+        [keras.Input((n_inputs,)), keras.layers.Dense(3, activation="softmax")]
+    )
+    model.compile(
+        optimizer=keras.optimizers.Adam(1e-3),
+        loss="sparse_categorical_crossentropy",
+        metrics=["accuracy"],
+    )
+    return model
+
+
+def save_ensemble(model_folder, data):
+    """A small trained ensemble laid out like StackedEnsembleTrainer saves it."""
+    model_folder.mkdir()
+    n_features = data.X_train.shape[1]
+    scaler = StandardScaler().fit(data.X_train)
+    X_scaled = scaler.transform(data.X_train)
+    joblib.dump(scaler, model_folder / "feature_scaler.pkl")
+    joblib.dump(
+        xgb.XGBClassifier(n_estimators=3).fit(X_scaled, data.y_train),
+        model_folder / "xgboost_model.pkl",
+    )
+    joblib.dump(
+        lgb.LGBMClassifier(n_estimators=3, min_child_samples=2, verbose=-1).fit(
+            X_scaled, data.y_train
+        ),
+        model_folder / "lightgbm_model.pkl",
+    )
+    compiled(n_features).save(model_folder / "mlp_model.keras")
+    compiled(9).save(model_folder / "meta_model.keras")
+    joblib.dump(
+        {
+            "n_features": n_features,
+            "feature_names": list(data.X_train.columns),
+            "class_names": ["FALSE_POSITIVE", "CANDIDATE", "CONFIRMED"],
+            "training_date": "2025-01-01T00:00:00",
+        },
+        model_folder / "ensemble_info.pkl",
+    )
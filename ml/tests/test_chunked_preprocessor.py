@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.chunked_preprocessor import SPLITS, ChunkedDataPreprocessor
+from src.data.data_loader_and_merger import TARGET_FEATURES
+from src.data.data_preprocessor import DataPreprocessor
+from src.utils.data_io import load_model_data, write_frame
+
+LABELS = ["CONFIRMED", "CANDIDATE", "FALSE POSITIVE"]
+
+
+def merged_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    numeric = [name for name in TARGET_FEATURES if name != "disposition"]
+    df = pd.DataFrame(
+        rng.uniform(0.5, 50, size=(n, len(numeric))).astype(np.float32),
+        columns=numeric,
+    )
+    df = df.mask(rng.random(df.shape) < 0.1)
+    labels = np.array(LABELS + [" CONFIRMED ", "NOT DISPOSITIONED"])
+    df["disposition"] = pd.Categorical(labels[rng.integers(0, len(labels), n)])
+    df["source"] = pd.Categorical(rng.choice(["Kepler", "K2", "TESS"], n))
+    return df
+
+
+@pytest.fixture
+def merged(tmp_path):
+    df = merged_frame(300)
+    path = tmp_path / "Merged_data.feather"
+    write_frame(df, path)
+    return df, path
+
+
+def by_row_id(model_data):
+    X = pd.concat(
+        [model_data.X_train, model_data.X_test, model_data.X_cv], ignore_index=True
+    )
+    ids = pd.concat(
+        [model_data.row_ids[split] for split in SPLITS], ignore_index=True
+    )
+    order = np.argsort(ids.to_numpy(), kind="stable")
+    return X.iloc[order].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("strategy", ["median", "knn"])
+def test_chunked_features_match_in_memory(tmp_path, merged, strategy):
+    df, path = merged
+    in_memory = DataPreprocessor(df, imputation_strategy=strategy)
+    expected = in_memory.processing_pipeline()
+
+    chunked = ChunkedDataPreprocessor(
+        path, tmp_path / "processed", imputation_strategy=strategy, chunk_size=37
+    )
+    paths = chunked.processing_pipeline()
+    actual = load_model_data(tmp_path / "processed")
+
+    assert set(paths) == {
+        f"{prefix}_{split}" for prefix in ["X", "y", "row_ids"] for split in SPLITS
+    }
+    np.testing.assert_allclose(
+        chunked.numeric_fill_values, in_memory.numeric_fill_values, rtol=1e-6
+    )
+    pd.testing.assert_frame_equal(
+        by_row_id(actual), by_row_id(expected), check_dtype=False, rtol=1e-5
+    )
+
+
+def test_splits_follow_row_content(merged):
+    df, _ = merged
+    doubled = pd.concat([df, df], ignore_index=True)
+
+    assignment = ChunkedDataPreprocessor.assign_splits(doubled)
+
+    np.testing.assert_array_equal(assignment[: len(df)], assignment[len(df) :])
+    np.testing.assert_array_equal(
+        assignment, ChunkedDataPreprocessor.assign_splits(doubled)
+    )
+    shares = pd.Series(assignment).value_counts(normalize=True)
+    assert shares["train"] == pytest.approx(0.7, abs=0.1)
+
+
+def test_sample_is_bounded(tmp_path, merged):
+    _, path = merged
+    chunked = ChunkedDataPreprocessor(
+        path, tmp_path / "processed", chunk_size=50, sample_size=40
+    )
+
+    sample = chunked.collect_statistics()
+
+    assert sample.shape == (40, len(chunked.numeric_columns))
+    assert chunked.n_rows > 40
+
+
+def test_preprocessor_leaves_input_frame_untouched():
+    df = merged_frame(60)
+    before = df.copy()
+
+    DataPreprocessor(df, imputation_strategy="median").processing_pipeline()
+
+    pd.testing.assert_frame_equal(df, before)
@@ -0,0 +1,82 @@
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data import data_preprocessor
+from src.data.data_preprocessor import DataPreprocessor
+from src.utils.common import Lazy, frame_info, parse_log_levels
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, *args):
+        self.calls += 1
+        return "-".join(map(str, args))
+
+
+@pytest.fixture
+def list_logger():
+    records = []
+    handler = logging.Handler()
+    handler.emit = lambda record: records.append(record.getMessage())
+    logger = logging.getLogger("tests.lazy")
+    logger.addHandler(handler)
+    logger.propagate = False
+    yield logger, records
+    logger.removeHandler(handler)
+
+
+def test_lazy_is_only_evaluated_for_emitted_records(list_logger):
+    logger, records = list_logger
+    func = Counter()
+
+    logger.setLevel(logging.INFO)
+    logger.debug("value %s", Lazy(func, 1, 2))
+    assert func.calls == 0
+
+    logger.setLevel(logging.DEBUG)
+    logger.debug("value %s", Lazy(func, 1, 2))
+    assert func.calls >= 1
+    assert records == ["value 1-2"]
+
+
+def test_missing_value_counts_are_deferred(monkeypatch):
+    df = pd.DataFrame(
+        {"period": [1.0, np.nan, 3.0, 4.0], "disposition": ["CONFIRMED"] * 4}
+    )
+    calls = []
+    isnull = pd.DataFrame.isnull
+    monkeypatch.setattr(
+        pd.DataFrame, "isnull", lambda self: calls.append(1) or isnull(self)
+    )
+    logger = data_preprocessor.logger
+    previous_level = logger.level
+    try:
+        logger.setLevel(logging.INFO)
+        DataPreprocessor(df, imputation_strategy="median").handle_missing_values(df)
+        # Only the count that decides the dropped columns.
+        assert len(calls) == 1
+
+        logger.setLevel(logging.DEBUG)
+        DataPreprocessor(df, imputation_strategy="median").handle_missing_values(df)
+        assert len(calls) > 2
+    finally:
+        logger.setLevel(previous_level)
+
+
+def test_frame_info_returns_the_summary():
+    info = frame_info(pd.DataFrame({"a": [1, 2]}))
+    assert "RangeIndex: 2 entries" in info
+
+
+def test_parse_log_levels():
+    assert parse_log_levels("*=warning, ModelTrainer=DEBUG") == {
+        "*": logging.WARNING,
+        "ModelTrainer": logging.DEBUG,
+    }
+    with pytest.raises(ValueError):
+        parse_log_levels("ModelTrainer=LOUD")
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.data_io import load_model_data, row_ids, save_model_data
+from src.utils.entity import ModelData
+
+
+def split(rng, n):
+    X = pd.DataFrame(rng.normal(size=(n, 3)), columns=["period", "depth", "teff"])
+    y = pd.Series(rng.integers(0, 3, n), name="disposition")
+    return X, y
+
+
+@pytest.fixture
+def model_data():
+    rng = np.random.default_rng(0)
+    (X_train, y_train), (X_test, y_test), (X_cv, y_cv) = (
+        split(rng, n) for n in (50, 20, 10)
+    )
+    return ModelData(
+        X_train,
+        y_train,
+        X_test,
+        y_test,
+        X_cv,
+        y_cv,
+        row_ids={
+            "train": row_ids(X_train),
+            "test": row_ids(X_test),
+            "cv": row_ids(X_cv),
+        },
+    )
+
+
+def assert_model_data_equal(actual, expected):
+    for name in ["X_train", "X_test", "X_cv"]:
+        pd.testing.assert_frame_equal(getattr(actual, name), getattr(expected, name))
+    for name in ["y_train", "y_test", "y_cv"]:
+        pd.testing.assert_series_equal(getattr(actual, name), getattr(expected, name))
+
+
+def test_round_trip(tmp_path, model_data):
+    save_model_data(model_data, tmp_path)
+    loaded = load_model_data(tmp_path)
+
+    assert_model_data_equal(loaded, model_data)
+    for split_name, ids in model_data.row_ids.items():
+        pd.testing.assert_series_equal(loaded.row_ids[split_name], ids)
+
+
+def test_round_trip_without_memory_map(tmp_path, model_data):
+    save_model_data(model_data, tmp_path)
+    assert_model_data_equal(load_model_data(tmp_path, memory_map=False), model_data)
+
+
+def test_saving_without_row_ids_removes_stale_ones(tmp_path, model_data):
+    save_model_data(model_data, tmp_path)
+    model_data.row_ids = None
+    save_model_data(model_data, tmp_path)
+
+    assert load_model_data(tmp_path).row_ids is None
+
+
+def test_missing_split(tmp_path, model_data):
+    save_model_data(model_data, tmp_path)
+    next(tmp_path.glob("y_cv.*")).unlink()
+
+    with pytest.raises(FileNotFoundError, match="y_cv"):
+        load_model_data(tmp_path)
+
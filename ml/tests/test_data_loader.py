@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.data_loader_and_merger import ExoPlanetData
+from src.utils.profiling import RunProfiler
+
+
+@pytest.fixture
+def data_loader(tmp_path):
+    paths = {}
+    for source, rows in (("kepler", 6), ("k2", 4), ("tess", 5)):
+        path = tmp_path / f"{source}.csv"
+        pd.DataFrame(
+            {
+                "koi_period": np.arange(rows, dtype=float),
+                "koi_depth": np.arange(rows, dtype=float) * 10,
+                "koi_disposition": ["CONFIRMED"] * rows,
+                "unmapped": ["x"] * rows,
+            }
+        ).to_csv(path, index=False)
+        paths[f"{source}_path"] = path
+    return ExoPlanetData(**paths, data_folder=tmp_path / "processed")
+
+
+def test_merge_reads_mapped_columns_with_compact_dtypes(data_loader):
+    df = data_loader.merge_data(save=False)
+
+    assert list(df.columns) == ["period", "depth", "disposition", "source"]
+    assert df["period"].dtype == np.float32
+    assert df["disposition"].dtype == "category"
+    assert df["source"].value_counts().to_dict() == {"Kepler": 6, "TESS": 5, "K2": 4}
+
+    stats = data_loader.load_stats
+    assert {name: s["rows"] for name, s in stats.items()} == {
+        "Kepler": 6,
+        "K2": 4,
+        "TESS": 5,
+    }
+    assert all(s["frame_mb"] > 0 for s in stats.values())
+    assert all("peak_rss_mb" not in s for s in stats.values())
+
+
+def test_profiled_merge_records_a_step_per_source(data_loader, tmp_path):
+    profiler = RunProfiler(tmp_path / "reports")
+
+    df = data_loader.merge_data(save=False, profiler=profiler)
+
+    assert len(df) == 15
+    steps = {step["name"]: step for step in profiler.steps}
+    assert list(steps) == ["load_kepler", "load_k2", "load_tess"]
+    assert [step["rows"] for step in steps.values()] == [6, 4, 5]
+    for name, stats in data_loader.load_stats.items():
+        assert stats["peak_rss_mb"] == steps[f"load_{name.lower()}"]["peak_rss_mb"]
@@ -0,0 +1,103 @@
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+
+from src.data.feature_kernels import derive_features, derived_feature_names
+from src.models.distiller import (
+    STUDENT_INFO_FILE,
+    STUDENT_MODEL_FILE,
+    EnsembleDistiller,
+    agreement_metrics,
+)
+from src.models.model_bundle import BUNDLE_FILE, PREFIX
+from src.utils.entity import ModelData
+
+from .conftest import save_ensemble
+
+SOURCE_COLUMNS = [
+    "period",
+    "duration",
+    "depth",
+    "planet_radius",
+    "star_radius",
+    "semi_major_axis",
+    "teff",
+]
+
+
+def catalog(rng, n):
+    y = pd.Series(np.arange(n) % 3)
+    source = pd.DataFrame(
+        rng.lognormal(0, 0.5, size=(n, len(SOURCE_COLUMNS)))
+        * (1 + y.to_numpy()[:, None]),
+        columns=SOURCE_COLUMNS,
+    )
+    return derive_features(source), y
+
+
+@pytest.fixture
+def catalog_data():
+    rng = np.random.default_rng(0)
+    (X_train, y_train), (X_test, y_test), (X_cv, y_cv) = (
+        catalog(rng, n) for n in (90, 30, 30)
+    )
+    return ModelData(X_train, y_train, X_test, y_test, X_cv, y_cv)
+
+
+def test_agreement_metrics():
+    teacher = np.array([[0.7, 0.2, 0.1], [0.1, 0.8, 0.1]])
+
+    same = agreement_metrics(teacher, teacher)
+    assert same["top1_agreement"] == 1.0
+    assert same["mean_total_variation"] == pytest.approx(0.0)
+    assert same["mean_kl_divergence"] == pytest.approx(0.0)
+
+    flipped = agreement_metrics(teacher, teacher[::-1])
+    assert flipped["top1_agreement"] == 0.0
+    assert flipped["mean_total_variation"] == pytest.approx(0.6)
+    assert flipped["mean_kl_divergence"] > 0
+
+
+def test_augmented_rows_jitter_sources_and_rederive(catalog_data, tmp_path):
+    X = catalog_data.X_train
+    distiller = EnsembleDistiller(catalog_data, tmp_path, augment_factor=1.5)
+    distiller.teacher = {"feature_scaler": StandardScaler().fit(X)}
+
+    augmented = distiller.augment(X)
+
+    assert len(augmented) == 135
+    assert list(augmented.columns) == list(X.columns)
+    source = [col for col in X.columns if col not in derived_feature_names(X.columns)]
+    assert (augmented[source].min() >= X[source].min()).all()
+    assert (augmented[source].max() <= X[source].max()).all()
+    assert not augmented[source].isin(X[source]).all().all()
+    pd.testing.assert_frame_equal(
+        augmented, derive_features(augmented[source])[list(X.columns)]
+    )
+
+
+def test_run_saves_the_student_and_bundles_it(catalog_data, tmp_path):
+    model_folder = tmp_path / "models"
+    save_ensemble(model_folder, catalog_data)
+    distiller = EnsembleDistiller(
+        catalog_data,
+        model_folder,
+        student_params={"n_estimators": 20, "min_child_samples": 2},
+    )
+
+    student_info = distiller.run()
+
+    assert joblib.load(model_folder / STUDENT_INFO_FILE) == student_info
+    student = joblib.load(model_folder / STUDENT_MODEL_FILE)
+    proba = student.predict_proba(catalog_data.X_test[student_info["feature_names"]])
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+    assert student_info["feature_names"] == list(catalog_data.X_train.columns)
+    assert 0.0 <= student_info["agreement"]["top1_agreement"] <= 1.0
+    with open(model_folder / BUNDLE_FILE, "rb") as file:
+        *_, header_length = PREFIX.unpack(file.read(PREFIX.size))
+        header = json.loads(file.read(header_length))
+    assert {"student_model", "student_info"} <= set(header["objects"])
@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.models.ensemble_compressor import REPORT_FILE, EnsembleCompressor
+
+from .conftest import FEATURES, save_ensemble
+
+
+def live_files(folder):
+    return {path.name: path.read_bytes() for path in folder.iterdir() if path.is_file()}
+
+
+@pytest.fixture
+def model_folder(tmp_path, model_data):
+    folder = tmp_path / "models"
+    save_ensemble(folder, model_data)
+    return folder
+
+
+def test_round_selection_never_adds_rounds(model_folder, model_data):
+    compressor = EnsembleCompressor(model_data, model_folder, round_tolerance=0.5)
+    live = compressor.load_ensemble(model_folder)
+
+    rounds = compressor.select_rounds(live)
+
+    for name in ["xgboost", "lightgbm"]:
+        assert rounds[name]["before"] == 3
+        assert 1 <= rounds[name]["after"] <= 3
+        assert rounds[name]["cv_log_loss_after"] <= rounds[name][
+            "cv_log_loss_before"
+        ] * 1.5
+
+
+def test_feature_gains_cover_every_feature(model_folder, model_data):
+    compressor = EnsembleCompressor(model_data, model_folder, n_repeats=1)
+
+    gains = compressor.feature_gains(compressor.load_ensemble(model_folder))
+
+    assert sorted(gains.index) == sorted(FEATURES)
+    assert gains.is_monotonic_decreasing
+
+
+def test_feature_selection_keeps_a_minimum_in_training_order(model_data, tmp_path):
+    gains = pd.Series({"teff": 0.5, "period": 0.2, "depth": 0.0})
+
+    assert EnsembleCompressor(
+        model_data, tmp_path, min_feature_gain=0.1, min_features=1
+    ).select_features(gains) == ["period", "teff"]
+    assert EnsembleCompressor(
+        model_data, tmp_path, min_feature_gain=1.0, min_features=1
+    ).select_features(gains) == ["teff"]
+
+
+def test_run_writes_a_compressed_copy_and_report(model_folder, model_data):
+    before = live_files(model_folder)
+    compressor = EnsembleCompressor(
+        model_data,
+        model_folder,
+        min_feature_gain=np.inf,
+        min_features=2,
+        n_repeats=1,
+        batch_size=32,
+    )
+
+    report = compressor.run()
+
+    assert live_files(model_folder) == before
+    output = model_folder / "compressed"
+    saved = json.loads((output / REPORT_FILE).read_text())
+    assert saved["features"]["after"] == 2
+    assert len(saved["features"]["dropped"]) == 1
+    assert saved["accepted"] == report["accepted"]
+    assert set(saved["single_row_latency_ms"]) == {"before", "after", "change"}
+    assert compressor.load_ensemble(output)["ensemble_info"]["n_features"] == 2
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.data_preprocessor import DataPreprocessor
+from src.data.feature_kernels import derive_features, derived_feature_names
+
+
+@pytest.fixture
+def catalog():
+    rng = np.random.default_rng(0)
+    n = 200
+    df = pd.DataFrame(
+        {
+            "period": rng.lognormal(2, 1, n),
+            "duration": rng.lognormal(1, 0.5, n),
+            "depth": rng.lognormal(6, 2, n),
+            "planet_radius": rng.lognormal(0.5, 1, n),
+            "star_radius": rng.lognormal(0, 0.3, n),
+            "semi_major_axis": rng.lognormal(-2, 1, n),
+            "teff": rng.normal(5500, 800, n),
+            "disposition": rng.choice(["CANDIDATE", "CONFIRMED"], n),
+        }
+    )
+    # Values the sanitizer rewrites: zeros and negatives in critical
+    # columns, infinities and missing values anywhere.
+    df.loc[0:4, "period"] = 0.0
+    df.loc[5:9, "star_radius"] = -1.0
+    df.loc[10:14, "depth"] = np.inf
+    df.loc[15:19, "semi_major_axis"] = np.nan
+    df.loc[20:24, "teff"] = -np.inf
+    return df
+
+
+def test_matches_the_pandas_chain(catalog):
+    preprocessor = DataPreprocessor(catalog)
+    expected = preprocessor.sanitize_dataframe(
+        preprocessor.add_derived_features(catalog.copy())
+    )
+
+    actual = derive_features(catalog)
+
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+
+def test_does_not_modify_the_input(catalog):
+    before = catalog.copy()
+    derive_features(catalog)
+    pd.testing.assert_frame_equal(catalog, before)
+
+
+def test_derived_feature_names_follow_the_present_columns(catalog):
+    names = derived_feature_names(catalog.drop(columns="depth").columns)
+    assert "log_depth" not in names
+    assert "log_period" in names
@@ -0,0 +1,209 @@
+import joblib
+import numpy as np
+import optuna
+import pandas as pd
+import pytest
+
+from src.models.hyperparameter_tuner import (
+    OBJECTIVES,
+    HyperparameterTuner,
+    pareto_front,
+    select_under_budget,
+)
+from src.models.model_trainer import StackedEnsembleTrainer
+from src.utils.entity import ModelData
+
+FEATURES = ["period", "depth", "teff"]
+
+
+def entry(trial, score, latency_ms):
+    return {
+        "trial": trial,
+        "params": {"n_estimators": 100 * (trial + 1)},
+        "score": score,
+        "batch_latency_ms": 10 * latency_ms,
+        "single_row_latency_ms": latency_ms,
+        "model_size_mb": 1.0,
+    }
+
+
+def multi_objective_study(values):
+    study = optuna.create_study(directions=["maximize"] + ["minimize"] * 3)
+    distributions = {"n_estimators": optuna.distributions.IntDistribution(1, 1000)}
+    for i, trial_values in enumerate(values):
+        study.add_trial(
+            optuna.trial.create_trial(
+                params={"n_estimators": i + 1},
+                distributions=distributions,
+                values=trial_values,
+            )
+        )
+    return study
+
+
+@pytest.fixture
+def model_data():
+    rng = np.random.default_rng(0)
+
+    def split(n):
+        return (
+            pd.DataFrame(rng.normal(size=(n, len(FEATURES))), columns=FEATURES),
+            pd.Series(np.arange(n) % 3),
+        )
+
+    (X_train, y_train), (X_test, y_test), (X_cv, y_cv) = map(split, (30, 9, 9))
+    return ModelData(X_train, y_train, X_test, y_test, X_cv, y_cv)
+
+
+def test_pareto_front_keeps_non_dominated_trials_best_score_first():
+    study = multi_objective_study(
+        [
+            (0.80, 5.0, 0.5, 1.0),
+            (0.90, 9.0, 0.9, 2.0),
+            # Dominated by the first trial on every objective.
+            (0.70, 6.0, 0.6, 1.5),
+        ]
+    )
+
+    front = pareto_front(study)
+
+    assert [entry["trial"] for entry in front] == [1, 0]
+    assert set(front[0]) == {"trial", "params"} | set(OBJECTIVES)
+    assert front[0]["params"] == {"n_estimators": 2}
+
+
+def test_pair_fits_the_budget_together():
+    xgb_front = [entry(0, 0.90, 3.0), entry(1, 0.85, 1.0)]
+    lgb_front = [entry(0, 0.88, 3.0), entry(1, 0.80, 0.5)]
+
+    # Each best configuration fits 5 ms on its own, but not both together.
+    xgb_choice, lgb_choice = select_under_budget(xgb_front, lgb_front, 5.0)
+    assert (xgb_choice["trial"], lgb_choice["trial"]) == (1, 0)
+
+    xgb_choice, lgb_choice = select_under_budget(
+        xgb_front, lgb_front, 5.0, overhead_ms=1.5
+    )
+    assert (xgb_choice["trial"], lgb_choice["trial"]) == (0, 1)
+
+
+def test_no_pair_within_budget_falls_back_to_the_fastest():
+    xgb_front = [entry(0, 0.90, 3.0), entry(1, 0.85, 1.0)]
+    lgb_front = [entry(0, 0.88, 3.0), entry(1, 0.80, 0.5)]
+
+    xgb_choice, lgb_choice = select_under_budget(xgb_front, lgb_front, 0.1)
+
+    assert (xgb_choice["trial"], lgb_choice["trial"]) == (1, 1)
+
+
+def test_trainer_selects_both_tree_models_once(tmp_path, monkeypatch, model_data):
+    optimized = {
+        "xgboost": {
+            "best_params": {"n_estimators": 1},
+            "best_score": 0.9,
+            "pareto_front": [entry(0, 0.90, 3.0), entry(1, 0.85, 1.0)],
+        },
+        "lightgbm": {
+            "best_params": {"n_estimators": 1},
+            "best_score": 0.88,
+            "pareto_front": [entry(0, 0.88, 3.0), entry(1, 0.80, 0.5)],
+        },
+    }
+    trainer = StackedEnsembleTrainer(
+        model_data, tmp_path, optimized_params=optimized, latency_budget_ms=5.0
+    )
+    measured = []
+    monkeypatch.setattr(
+        trainer, "_keras_latency_ms", lambda: measured.append(1) or 1.5
+    )
+
+    xgb_params = trainer._xgboost_params()
+    lgb_params = trainer._lightgbm_params()
+
+    assert xgb_params["n_estimators"] == 100
+    assert lgb_params["n_estimators"] == 200
+    assert measured == [1]
+
+
+def test_without_a_budget_the_best_params_are_used(tmp_path, model_data):
+    optimized = {
+        "xgboost": {
+            "best_params": {"n_estimators": 7},
+            "best_score": 0.9,
+            "pareto_front": [entry(0, 0.90, 3.0)],
+        }
+    }
+    trainer = StackedEnsembleTrainer(model_data, tmp_path, optimized_params=optimized)
+
+    assert trainer._xgboost_params()["n_estimators"] == 7
+
+
+def test_keras_latency_is_measured(tmp_path, model_data):
+    trainer = StackedEnsembleTrainer(model_data, tmp_path, latency_budget_ms=5.0)
+
+    assert trainer._keras_latency_ms() > 0
+
+
+def tuner_with_previous_study(tmp_path, model_data, warm_start, **study_attrs):
+    previous = multi_objective_study(
+        [(0.5 + i / 10, 5.0 - i, 0.5, 1.0) for i in range(4)]
+    )
+    previous.set_user_attr("feature_names", FEATURES)
+    previous.set_user_attr("metric", "f1_macro")
+    for name, value in study_attrs.items():
+        previous.set_user_attr(name, value)
+    joblib.dump(previous, tmp_path / "xgboost_study.pkl")
+    return HyperparameterTuner(
+        model_data,
+        tmp_path,
+        multi_objective=True,
+        warm_start=warm_start,
+        warm_start_top_k=2,
+    )
+
+
+def test_warm_start_adds_the_previous_trials(tmp_path, model_data):
+    tuner = tuner_with_previous_study(tmp_path, model_data, "trials")
+
+    study = tuner._create_study("xgboost", "f1_macro")
+
+    assert len(study.trials) == 4
+    assert study.user_attrs["feature_names"] == FEATURES
+
+
+def test_warm_start_enqueues_the_best_configurations(tmp_path, model_data):
+    tuner = tuner_with_previous_study(tmp_path, model_data, "enqueue")
+
+    study = tuner._create_study("xgboost", "f1_macro")
+
+    waiting = study.get_trials(states=[optuna.trial.TrialState.WAITING])
+    assert [trial.system_attrs["fixed_params"] for trial in waiting] == [
+        {"n_estimators": 4},
+        {"n_estimators": 3},
+    ]
+
+
+@pytest.mark.parametrize(
+    "metric, study_attrs, multi_objective",
+    [
+        ("f1_macro", {"feature_names": FEATURES[:2]}, True),
+        ("accuracy", {}, True),
+        ("f1_macro", {}, False),
+    ],
+)
+def test_incompatible_previous_study_is_ignored(
+    tmp_path, model_data, metric, study_attrs, multi_objective
+):
+    tuner = tuner_with_previous_study(tmp_path, model_data, "trials", **study_attrs)
+    tuner.multi_objective = multi_objective
+
+    study = tuner._create_study("xgboost", metric)
+
+    assert study.trials == []
+
+
+def test_missing_or_unknown_warm_start(tmp_path, model_data):
+    tuner = HyperparameterTuner(model_data, tmp_path, warm_start="trials")
+    assert tuner._create_study("lightgbm", "f1_macro").trials == []
+
+    with pytest.raises(ValueError):
+        HyperparameterTuner(model_data, tmp_path, warm_start="replay")
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.data_preprocessor import DataPreprocessor
+from src.models.model_trainer import StackedEnsembleTrainer
+from src.utils.entity import ModelData
+
+FEATURES = ["period", "depth", "teff"]
+
+
+def catalog(rng, n):
+    df = pd.DataFrame(rng.normal(size=(n, len(FEATURES))), columns=FEATURES)
+    df.iloc[::7, 1] = np.nan
+    df["disposition"] = np.arange(n) % 3
+    return df
+
+
+def split(rng, n):
+    return (
+        pd.DataFrame(rng.normal(size=(n, len(FEATURES))), columns=FEATURES),
+        pd.Series(np.arange(n) % 3),
+    )
+
+
+@pytest.mark.parametrize(
+    "strategy, n_neighbors", [("knn", 5), ("knn_sklearn", 5), ("median", None)]
+)
+def test_preprocessor_state_records_neighbours_only(strategy, n_neighbors):
+    df = catalog(np.random.default_rng(0), 40)
+    preprocessor = DataPreprocessor(df, imputation_strategy=strategy)
+    preprocessor.handle_missing_values(df)
+
+    state = preprocessor.get_imputation_state()
+
+    assert state["n_neighbors"] == n_neighbors
+    assert "reference_set" not in state
+    assert state["numeric_columns"] == FEATURES
+
+
+@pytest.mark.parametrize("n_neighbors", [5, None])
+def test_trainer_state_keeps_donor_pool_in_feature_space(tmp_path, n_neighbors):
+    rng = np.random.default_rng(0)
+    X_train, y_train = split(rng, 30)
+    X_test, y_test = split(rng, 9)
+    model_data = ModelData(X_train, y_train, X_test, y_test, X_test, y_test)
+    trainer = StackedEnsembleTrainer(
+        model_data,
+        tmp_path,
+        imputation_state={"strategy": "knn", "n_neighbors": n_neighbors},
+    )
+
+    state = trainer.build_imputer_state()
+
+    assert state["feature_names"] == FEATURES
+    np.testing.assert_allclose(state["feature_fill_values"], X_train.median())
+    if n_neighbors is None:
+        assert state["reference_set"] is None
+    else:
+        reference = state["reference_set"]
+        assert reference.dtype == np.float32
+        assert reference.shape == X_train.shape
+        np.testing.assert_allclose(
+            np.sort(reference, axis=0),
+            np.sort(X_train.to_numpy(dtype=np.float32), axis=0),
+        )
@@ -0,0 +1,112 @@
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.data.data_loader_and_merger import ExoPlanetData
+from src.models.incremental_trainer import IncrementalTrainer
+from src.models.model_bundle import BUNDLE_FILE
+from src.utils.data_io import load_model_data, row_ids
+
+from .conftest import save_ensemble
+
+def test_stale_rows_are_dropped_from_every_split(model_data, tmp_path, new_rows):
+    stale = pd.concat(
+        [model_data.row_ids["train"].iloc[:3], model_data.row_ids["test"].iloc[:2]]
+    )
+    trainer = IncrementalTrainer(model_data, *new_rows, tmp_path, stale_row_ids=stale)
+
+    assert len(trainer.model_data.X_train) == 87
+    assert len(trainer.model_data.y_test) == 28
+    assert len(trainer.model_data.X_cv) == 30
+    assert not trainer.model_data.row_ids["train"].isin(stale).any()
+    assert trainer.model_data.X_train.index.equals(pd.RangeIndex(87))
+
+
+def test_update_set_replays_every_class(model_data, tmp_path, new_rows):
+    X_new, y_new = new_rows
+    X_new, y_new = X_new[y_new == 0], y_new[y_new == 0]
+    trainer = IncrementalTrainer(model_data, X_new, y_new, tmp_path)
+
+    assert set(trainer.y_update) == {0, 1, 2}
+    assert len(trainer.X_update) >= 2 * len(X_new)
+
+
+def test_updated_model_data_appends_the_new_rows(model_data, tmp_path, new_rows):
+    X_new, y_new = new_rows
+    new_ids = row_ids(X_new)
+    trainer = IncrementalTrainer(
+        model_data, X_new, y_new, tmp_path, new_row_ids=new_ids
+    )
+
+    updated = trainer.updated_model_data()
+    assert len(updated.X_train) == 90 + len(X_new)
+    assert updated.row_ids["train"].iloc[-len(X_new) :].tolist() == new_ids.tolist()
+    assert updated.X_test is model_data.X_test
+
+
+def test_run_promotes_and_saves_the_splits(model_data, tmp_path, new_rows):
+    model_folder = tmp_path / "models"
+    data_folder = tmp_path / "processed"
+    save_ensemble(model_folder, model_data)
+    X_new, y_new = new_rows
+
+    results = IncrementalTrainer(
+        model_data,
+        X_new,
+        y_new,
+        model_folder,
+        boost_rounds=2,
+        mlp_epochs=1,
+        meta_epochs=1,
+        tolerance=1.0,
+        batch_size=32,
+        data_folder=data_folder,
+        new_row_ids=row_ids(X_new),
+    ).run()
+
+    assert results["promoted"]
+    assert not (model_folder / "candidate").exists()
+    assert (model_folder / "previous" / "xgboost_model.pkl").exists()
+    assert (model_folder / BUNDLE_FILE).exists()
+    info = joblib.load(model_folder / "ensemble_info.pkl")
+    assert info["incremental_updates"] == 1
+    booster = joblib.load(model_folder / "xgboost_model.pkl").get_booster()
+    assert booster.num_boosted_rounds() == 5
+
+    saved = load_model_data(data_folder)
+    assert len(saved.X_train) == 90 + len(X_new)
+    assert len(saved.row_ids["train"]) == 90 + len(X_new)
+
+
+def test_legacy_snapshot_dtypes_do_not_mark_rows_as_new():
+    current = pd.DataFrame(
+        {
+            "period": np.array([0.1, 1.5, np.nan], dtype=np.float32),
+            "disposition": pd.Categorical(["CANDIDATE", None, "CONFIRMED"]),
+            "source": ["kepler", "tess", "k2"],
+        }
+    )
+    # The same rows as a float64 CSV snapshot with object columns.
+    previous = pd.DataFrame(
+        {
+            "source": ["kepler", "tess", "k2"],
+            "period": [0.1, 1.5, np.nan],
+            "disposition": ["CANDIDATE", np.nan, "CONFIRMED"],
+        }
+    )
+
+    assert row_ids(current).tolist() == row_ids(previous).tolist()
+    assert ExoPlanetData.select_new_rows(current, previous).empty
+
+    previous.loc[1, "period"] = 1.6
+    new_rows = ExoPlanetData.select_new_rows(current, previous)
+    assert new_rows.index.tolist() == [1]
+
+
+def test_row_ids_change_with_the_row():
+    df = pd.DataFrame({"period": [1.0, 2.0], "depth": [3.0, 4.0]})
+    changed = df.copy()
+    changed.loc[1, "depth"] = 5.0
+
+    assert row_ids(df)[0] == row_ids(changed)[0]
+    assert row_ids(df)[1] != row_ids(changed)[1]
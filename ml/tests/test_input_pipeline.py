@@ -0,0 +1,110 @@
+import math
+
+import numpy as np
+import pytest
+from tensorflow import keras
+
+from src.models.input_pipeline import (
+    LearningRateWarmup,
+    ReduceLROnPlateau,
+    fit_with_input_pipeline,
+    make_dataset,
+    scaled_learning_rate,
+)
+
+
+def compiled_model(learning_rate=1e-2):
+    model = keras.Sequential(
+        [keras.Input((4,)), keras.layers.Dense(3, activation="softmax")]
+    )
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate),
+        loss="sparse_categorical_crossentropy",
+    )
+    return model
+
+
+def rate(value) -> float:
+    return float(keras.ops.convert_to_numpy(value))
+
+
+@pytest.mark.parametrize(
+    "rule, expected", [("linear", 1.6e-2), ("sqrt", 4e-3), ("none", 1e-3)]
+)
+def test_scaled_learning_rate(rule, expected):
+    assert scaled_learning_rate(1e-3, 512, rule, base_batch_size=32) == pytest.approx(
+        expected
+    )
+
+
+def test_scaled_learning_rate_rejects_unknown_rules():
+    with pytest.raises(ValueError):
+        scaled_learning_rate(1e-3, 64, "cubic")
+
+
+def test_dataset_batches_every_row_with_weights():
+    X = np.arange(20, dtype=np.float64).reshape(10, 2)
+    y = np.arange(10) % 3
+    weights = np.linspace(0.5, 1.5, 10)
+
+    batches = list(make_dataset(X, y, weights, batch_size=4))
+
+    assert [len(batch[0]) for batch in batches] == [4, 4, 2]
+    X_seen, y_seen, w_seen = (
+        np.concatenate([batch[i].numpy() for batch in batches]) for i in range(3)
+    )
+    order = np.argsort(X_seen[:, 0])
+    np.testing.assert_array_equal(X_seen[order], X.astype(np.float32))
+    np.testing.assert_array_equal(y_seen[order], y)
+    np.testing.assert_allclose(w_seen[order], weights, rtol=1e-6)
+
+
+def test_dataset_reshuffles_every_epoch_but_not_for_evaluation():
+    X, y = np.arange(50, dtype=np.float32)[:, None], np.zeros(50)
+    shuffled = make_dataset(X, y, batch_size=50)
+    ordered = make_dataset(X, y, batch_size=50, shuffle=False)
+
+    first, second = (next(iter(shuffled))[0].numpy().ravel() for _ in range(2))
+
+    assert not np.array_equal(first, second)
+    np.testing.assert_array_equal(next(iter(ordered))[0].numpy().ravel(), X.ravel())
+
+
+def test_warmup_ramps_up_then_stays_constant():
+    schedule = LearningRateWarmup(1e-2, warmup_steps=4)
+
+    rates = [rate(schedule(step)) for step in range(6)]
+
+    np.testing.assert_allclose(rates, [2.5e-3, 5e-3, 7.5e-3, 1e-2, 1e-2, 1e-2])
+    restored = LearningRateWarmup.from_config(schedule.get_config())
+    assert rate(restored(1)) == pytest.approx(5e-3)
+
+
+def test_plateau_lowers_the_warmup_rate():
+    model = compiled_model()
+    model.optimizer.learning_rate = LearningRateWarmup(1e-2, warmup_steps=2)
+    callback = ReduceLROnPlateau(factor=0.5, min_lr=4e-3)
+    callback.set_model(model)
+
+    assert callback._reduce_optimizer_lr(model.optimizer, 0)
+    assert rate(model.optimizer._learning_rate.learning_rate) == pytest.approx(5e-3)
+    callback._reduce_optimizer_lr(model.optimizer, 1)
+    assert rate(model.optimizer._learning_rate.learning_rate) == pytest.approx(4e-3)
+    assert not callback._reduce_optimizer_lr(model.optimizer, 2)
+
+
+def test_fit_warms_up_and_measures_throughput():
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(64, 4)), rng.integers(0, 3, 64)
+    model = compiled_model()
+
+    history = fit_with_input_pipeline(
+        model, X, y, X[:16], y[:16], batch_size=16, epochs=3, warmup_epochs=2, verbose=0
+    )
+
+    schedule = model.optimizer._learning_rate
+    assert isinstance(schedule, LearningRateWarmup)
+    assert schedule.warmup_steps == 2 * math.ceil(64 / 16)
+    assert len(history.history["loss"]) == 3
+    assert len(history.history["steps_per_second"]) == 3
+    assert all(value > 0 for value in history.history["steps_per_second"])
@@ -0,0 +1,93 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+from sklearn.impute import KNNImputer
+
+from src.data.knn_imputer import (
+    _BLOCK_MATRICES,
+    EQUIVALENCE_ATOL,
+    EQUIVALENCE_RTOL,
+    BlockedKNNImputer,
+)
+
+
+def with_missing(rng, shape, fraction):
+    X = rng.normal(size=shape)
+    X[rng.random(shape) < fraction] = np.nan
+    return X
+
+
+@pytest.mark.parametrize("weights", ["uniform", "distance"])
+def test_matches_sklearn(weights):
+    rng = np.random.default_rng(0)
+    fit_X = with_missing(rng, (400, 6), 0.2)
+    X = with_missing(rng, (150, 6), 0.3)
+
+    expected = KNNImputer(n_neighbors=5, weights=weights).fit(fit_X).transform(X)
+    actual = BlockedKNNImputer(
+        n_neighbors=5, weights=weights, working_memory_mb=1
+    ).fit(fit_X).transform(X)
+
+    np.testing.assert_allclose(
+        actual, expected, rtol=EQUIVALENCE_RTOL, atol=EQUIVALENCE_ATOL
+    )
+
+
+def test_shortlist_fallback_matches_sklearn():
+    # With a one-row shortlist most columns run out of donors and fall back
+    # to the full column scan.
+    rng = np.random.default_rng(1)
+    fit_X = with_missing(rng, (200, 4), 0.5)
+    X = with_missing(rng, (50, 4), 0.5)
+
+    expected = KNNImputer(n_neighbors=3).fit(fit_X).transform(X)
+    actual = BlockedKNNImputer(
+        n_neighbors=3, weights="uniform", shortlist_factor=1
+    ).fit(fit_X).transform(X)
+
+    np.testing.assert_allclose(
+        actual, expected, rtol=EQUIVALENCE_RTOL, atol=EQUIVALENCE_ATOL
+    )
+
+
+@pytest.mark.filterwarnings("ignore:Mean of empty slice")
+def test_all_missing_column_is_kept():
+    rng = np.random.default_rng(2)
+    X = with_missing(rng, (30, 3), 0.1)
+    X[:, 1] = np.nan
+
+    imputed = BlockedKNNImputer().fit_transform(X)
+
+    assert imputed.shape == X.shape
+    assert np.isnan(imputed[:, 1]).all()
+    assert not np.isnan(imputed[:, [0, 2]]).any()
+
+
+@pytest.mark.parametrize("n_jobs", [1, 4, 64])
+def test_blocks_in_flight_fit_the_working_memory(n_jobs):
+    rng = np.random.default_rng(3)
+    imputer = BlockedKNNImputer(n_jobs=n_jobs, working_memory_mb=8).fit(
+        with_missing(rng, (20000, 4), 0.1)
+    )
+
+    block_size, concurrent = imputer._plan_blocks(5000)
+
+    assert 1 <= concurrent <= n_jobs
+    assert concurrent * block_size * _BLOCK_MATRICES * 20000 * 8 <= 8 * 1024**2
+
+
+def test_peak_memory_stays_within_the_working_memory():
+    rng = np.random.default_rng(4)
+    fit_X = with_missing(rng, (20000, 4), 0.1)
+    X = with_missing(rng, (4000, 4), 0.5)
+    imputer = BlockedKNNImputer(n_jobs=4, working_memory_mb=16).fit(fit_X)
+
+    tracemalloc.start()
+    try:
+        imputer.transform(X)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert peak <= 16 * 1024**2
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from src.models.base_models import BASE_MODELS
+from src.models.oof_stacking import N_CLASSES, OutOfFoldStacker
+
+BASE_PARAMS = {
+    "xgboost": {"n_estimators": 5, "max_depth": 2},
+    "lightgbm": {"n_estimators": 5, "min_child_samples": 2, "verbose": -1},
+    "mlp": {"epochs": 2, "warmup_epochs": 0, "batch_size": 16},
+}
+
+
+def make_stacker(cache_folder, params=BASE_PARAMS, n_folds=2):
+    rng = np.random.default_rng(0)
+    y_train = np.arange(60) % N_CLASSES
+    X_train = rng.normal(size=(60, 4)) + y_train[:, None]
+    y_cv = np.arange(15) % N_CLASSES
+    X_cv = rng.normal(size=(15, 4)) + y_cv[:, None]
+    return OutOfFoldStacker(
+        X_train,
+        y_train,
+        X_cv,
+        y_cv,
+        np.ones(len(y_train)),
+        params,
+        cache_folder,
+        n_folds=n_folds,
+        n_jobs=2,
+        max_workers=2,
+    )
+
+
+def test_generates_oof_probabilities_and_reuses_cached_folds(tmp_path, monkeypatch):
+    stacker = make_stacker(tmp_path)
+    oof = stacker.generate()
+
+    assert oof.shape == (60, N_CLASSES * len(BASE_MODELS))
+    for model_idx in range(len(BASE_MODELS)):
+        proba = oof[:, model_idx * N_CLASSES : (model_idx + 1) * N_CLASSES]
+        np.testing.assert_allclose(proba.sum(axis=1), 1, rtol=1e-5)
+
+    # Every training row is predicted by exactly one fold model, which did
+    # not see it.
+    for model_name in BASE_MODELS:
+        indices = []
+        for fold, (train_idx, val_idx) in enumerate(stacker._folds()):
+            path = stacker.fold_prediction_path(stacker.cache_dir, model_name, fold)
+            with np.load(path) as fold_predictions:
+                np.testing.assert_array_equal(fold_predictions["indices"], val_idx)
+            assert not set(train_idx) & set(val_idx)
+            indices.extend(val_idx)
+        assert sorted(indices) == list(range(60))
+
+    def fail(*args):
+        raise AssertionError("cached folds were retrained")
+
+    monkeypatch.setattr(OutOfFoldStacker, "_run_jobs", fail)
+    np.testing.assert_array_equal(make_stacker(tmp_path).generate(), oof)
+
+
+def test_only_missing_folds_are_pending(tmp_path):
+    stacker = make_stacker(tmp_path)
+    stacker.cache_dir.mkdir(parents=True)
+    folds = stacker._folds()
+    for model_name in BASE_MODELS:
+        for fold in range(len(folds)):
+            path = stacker.fold_prediction_path(stacker.cache_dir, model_name, fold)
+            path.write_bytes(b"")
+    stacker.fold_prediction_path(stacker.cache_dir, "lightgbm", 1).unlink()
+
+    assert stacker._pending_jobs(folds) == [("lightgbm", 1)]
+
+
+def test_fingerprint_covers_params_and_folds(tmp_path):
+    stacker = make_stacker(tmp_path)
+    changed_params = {**BASE_PARAMS, "xgboost": {"n_estimators": 6, "max_depth": 2}}
+
+    assert make_stacker(tmp_path).cache_dir == stacker.cache_dir
+    assert make_stacker(tmp_path, params=changed_params).cache_dir != stacker.cache_dir
+    assert make_stacker(tmp_path, n_folds=3).cache_dir != stacker.cache_dir
+
+
+def test_rejects_a_single_fold(tmp_path):
+    with pytest.raises(ValueError, match="n_folds"):
+        make_stacker(tmp_path, n_folds=1)
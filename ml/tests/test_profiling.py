@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from src.utils import profiling
+from src.utils.profiling import RunProfiler
+
+
+def report(steps, rss_source="psutil_sampled"):
+    return {"rss_source": rss_source, "steps": steps}
+
+
+def step(name, wall_seconds, peak_rss_mb=None):
+    return {"name": name, "wall_seconds": wall_seconds, "peak_rss_mb": peak_rss_mb}
+
+
+def test_steps_record_nesting_and_rows(tmp_path):
+    profiler = RunProfiler(tmp_path)
+
+    with profiler.step("train") as outer:
+        with profiler.step("tune", rows=10):
+            pass
+        outer["rows"] = 20
+    profiler.add_step("worker", 2.0, rows=50)
+
+    steps = {s["name"]: s for s in profiler.steps}
+    assert list(steps) == ["tune", "train", "worker"]
+    assert steps["tune"]["parent"] == "train"
+    assert steps["train"]["parent"] is None
+    assert steps["train"]["rows"] == 20
+    assert steps["worker"]["rows_per_second"] == 25.0
+    if profiling._rss_source() is not None:
+        assert steps["train"]["peak_rss_mb"] > 0
+
+
+def test_compare_flags_slower_and_larger_steps():
+    previous = report([step("load", 10.0, 500.0), step("train", 100.0, 1000.0)])
+    current = report([step("load", 10.5, 800.0), step("train", 130.0, 1020.0)])
+
+    regressions = RunProfiler.compare(current, previous)
+
+    assert {(r["step"], r["metric"]) for r in regressions} == {
+        ("load", "peak_rss_mb"),
+        ("train", "wall_seconds"),
+    }
+
+
+def test_compare_ignores_noise_and_other_rss_sources():
+    previous = report([step("load", 0.1, 10.0)], rss_source="ru_maxrss")
+    current = report([step("load", 0.5, 900.0), step("new", 50.0)])
+
+    assert RunProfiler.compare(current, previous) == []
+
+
+def test_save_compares_with_the_previous_report(tmp_path):
+    previous_path = tmp_path / "run_20000101-000000.json"
+    previous_path.write_text(json.dumps(report([step("train", 10.0)])))
+
+    profiler = RunProfiler(tmp_path)
+    profiler.add_step("train", 20.0)
+    saved = json.loads(profiler.save().read_text())
+
+    assert saved["comparison"]["previous_report"] == previous_path.name
+    assert saved["comparison"]["regressions"][0]["step"] == "train"
+    assert saved["steps"][0]["wall_seconds"] == 20.0
+
+
+@pytest.mark.parametrize("new_seconds, exit_code", [(10.0, 0), (30.0, 1)])
+def test_cli_exit_code_reports_regressions(tmp_path, new_seconds, exit_code):
+    old, new = tmp_path / "old.json", tmp_path / "new.json"
+    old.write_text(json.dumps(report([step("train", 10.0)])))
+    new.write_text(json.dumps(report([step("train", new_seconds)])))
+
+    assert profiling.main([str(old), str(new)]) == exit_code
@@ -0,0 +1,38 @@
+from src.utils.step_cache import StepCache, fingerprint, fingerprint_file
+
+
+def test_miss_then_hit(tmp_path):
+    cache = StepCache(tmp_path / "cache")
+    key = fingerprint(step="preprocess", knn_neighbors=5)
+
+    assert cache.load("preprocess", key) is None
+    cache.save("preprocess", key, {"rows": 3})
+    assert cache.load("preprocess", key) == {"rows": 3}
+    assert cache.load_latest("preprocess") == (key, {"rows": 3})
+
+
+def test_changed_inputs_invalidate_the_entry(tmp_path):
+    cache = StepCache(tmp_path / "cache")
+    source = tmp_path / "merged.csv"
+    source.write_text("a,b\n1,2\n")
+    old_key = fingerprint(data=fingerprint_file(source), knn_neighbors=5)
+    cache.save("preprocess", old_key, "old")
+
+    source.write_text("a,b\n1,3\n")
+    new_key = fingerprint(data=fingerprint_file(source), knn_neighbors=5)
+    assert new_key != old_key
+    assert cache.load("preprocess", new_key) is None
+
+    cache.save("preprocess", new_key, "new")
+    # Only the latest entry of a step is kept.
+    assert cache.load("preprocess", old_key) is None
+    assert cache.load_latest("preprocess") == (new_key, "new")
+
+
+def test_parameters_are_part_of_the_key():
+    assert fingerprint(knn_neighbors=5) != fingerprint(knn_neighbors=7)
+    assert fingerprint(a=1, b=2) == fingerprint(b=2, a=1)
+
+
+def test_missing_file_fingerprint(tmp_path):
+    assert fingerprint_file(tmp_path / "absent.csv") == "missing"